@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_photo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='photo_original',
+            field=models.ImageField(blank=True, editable=False, upload_to='user_photos/originals/', verbose_name='Foto original'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='photo_thumb',
+            field=models.ImageField(blank=True, editable=False, upload_to='user_photos/', verbose_name='Foto 3x4 (miniatura)'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+from accounts.utils import digits_only, fold_search_text, surname_first
+
+
+def fill_search_columns(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    users = list(User.objects.only('first_name', 'last_name', 'whatsapp_number'))
+    for user in users:
+        user.search_name = fold_search_text(f'{user.first_name} {user.last_name}')
+        if user.last_name:
+            user.search_surname = fold_search_text(f'{user.last_name} {user.first_name}')
+        else:
+            user.search_surname = surname_first(user.search_name)
+        user.search_phone = digits_only(user.whatsapp_number)
+    User.objects.bulk_update(users, ['search_name', 'search_surname', 'search_phone'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_auth_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=301),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='search_phone',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='search_surname',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=301),
+        ),
+        migrations.RunPython(fill_search_columns, migrations.RunPython.noop),
+    ]
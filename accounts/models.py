@@ -3,7 +3,7 @@ from django.contrib.auth.models import PermissionsMixin
 from django.db import models
 from django.utils import timezone
 
-from .utils import normalize_whatsapp_number
+from .utils import digits_only, fold_search_text, normalize_whatsapp_number, surname_first
 
 
 class UserManager(BaseUserManager):
@@ -59,6 +59,16 @@ class User(AbstractBaseUser, PermissionsMixin):
     last_name = models.CharField('Sobrenome', max_length=150, blank=True)
     email = models.EmailField('E-mail', blank=True)
     photo = models.ImageField('Foto 3x4', upload_to='user_photos/', blank=True, null=True)
+    photo_thumb = models.ImageField('Foto 3x4 (miniatura)', upload_to='user_photos/', blank=True, editable=False)
+    photo_original = models.ImageField('Foto original', upload_to='user_photos/originals/', blank=True, editable=False)
+
+    # Sobe quando role ou grupos mudam; invalida os perfis guardados na sessão (accounts/signals.py)
+    auth_version = models.PositiveIntegerField('Versão das permissões', default=0, editable=False)
+
+    # Colunas de busca (preenchidas no save): nome sem acentos/minúsculo e WhatsApp só com dígitos
+    search_name = models.CharField(max_length=301, blank=True, editable=False, db_index=True)
+    search_surname = models.CharField(max_length=301, blank=True, editable=False, db_index=True)
+    search_phone = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
 
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
@@ -76,8 +86,20 @@ class User(AbstractBaseUser, PermissionsMixin):
     def save(self, *args, **kwargs):
         if self.whatsapp_number:
             self.whatsapp_number = normalize_whatsapp_number(self.whatsapp_number)
+        self.fill_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'first_name', 'last_name', 'whatsapp_number'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_name', 'search_surname', 'search_phone'}
         super().save(*args, **kwargs)
 
+    def fill_search_fields(self):
+        self.search_name = fold_search_text(f'{self.first_name} {self.last_name}')
+        if self.last_name:
+            self.search_surname = fold_search_text(f'{self.last_name} {self.first_name}')
+        else:
+            self.search_surname = surname_first(self.search_name)
+        self.search_phone = digits_only(self.whatsapp_number)
+
     def __str__(self):
         return self.whatsapp_number
 
@@ -0,0 +1,46 @@
+from django.contrib.auth.models import Group
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import User
+
+
+def bump_auth_version(queryset) -> None:
+    """Invalida os perfis em cache na sessão dos usuários do queryset."""
+    queryset.update(auth_version=F('auth_version') + 1)
+
+
+@receiver(post_init, sender=User)
+def remember_role(sender, instance: User, **kwargs):
+    # __dict__ para não disparar consulta quando o campo foi adiado com only()/defer()
+    instance._loaded_role = instance.__dict__.get('role')
+
+
+@receiver(post_save, sender=User)
+def bump_on_role_change(sender, instance: User, created, **kwargs):
+    loaded = getattr(instance, '_loaded_role', None)
+    if not created and loaded is not None and loaded != instance.role:
+        bump_auth_version(User.objects.filter(pk=instance.pk))
+        instance.auth_version += 1
+    instance._loaded_role = instance.role
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def bump_on_groups_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        bump_auth_version(User.objects.filter(pk=instance.pk))
+    elif action == 'pre_clear':
+        bump_auth_version(User.objects.filter(groups=instance))
+    elif pk_set:
+        bump_auth_version(User.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def bump_on_group_change(sender, instance: Group, **kwargs):
+    # O nome do grupo decide o perfil (core.utils.get_available_roles)
+    if instance.pk:
+        bump_auth_version(User.objects.filter(groups=instance))
@@ -1,6 +1,9 @@
 import re
+import unicodedata
+from functools import lru_cache
 
 import phonenumbers
+from django.db.models import Q
 
 
 def normalize_whatsapp_number(value: str, default_region: str = 'BR') -> str:
@@ -27,3 +30,37 @@ def normalize_whatsapp_number(value: str, default_region: str = 'BR') -> str:
         return f'+{digits}'
 
     return digits
+
+
+@lru_cache(maxsize=4096)
+def cached_whatsapp_number(value: str) -> str:
+    """normalize_whatsapp_number memorizado: em importações o mesmo número se repete em várias linhas."""
+    return normalize_whatsapp_number(value)
+
+
+def fold_search_text(value: str) -> str:
+    """Texto para as colunas de busca: sem acentos, minúsculo e com espaços simples ("João  Silva" -> "joao silva")."""
+    normalized = unicodedata.normalize('NFKD', str(value or ''))
+    stripped = ''.join(ch for ch in normalized if not unicodedata.combining(ch))
+    return ' '.join(stripped.lower().split())
+
+
+def surname_first(folded_name: str) -> str:
+    """Nome com a última palavra na frente ("joao da silva" -> "silva joao da"), para buscar pelo sobrenome."""
+    words = folded_name.split()
+    if len(words) < 2:
+        return folded_name
+    return ' '.join([words[-1], *words[:-1]])
+
+
+def digits_only(value: str) -> str:
+    return re.sub(r'\D', '', str(value or ''))
+
+
+def prefix_lookup(field: str, prefix: str) -> Q:
+    """
+    Filtro de prefixo como faixa (campo >= prefixo e < prefixo + U+FFFF), que o banco responde
+    pelo índice da coluna. `startswith` vira LIKE e, no SQLite, LIKE sem distinção de maiúsculas
+    não usa índice.
+    """
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\uffff'})
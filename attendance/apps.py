@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class AttendanceConfig(AppConfig):
     name = 'attendance'
+
+    def ready(self):
+        # Import signals
+        from . import signals  # noqa: F401
@@ -0,0 +1,282 @@
+"""
+Índice de rostos para a chamada por foto (só CPU).
+
+Os rostos são localizados pelo detector YuNet e descritos pelo SFace (modelos ONNX do
+OpenCV Zoo, rodados pelo OpenCV; caminhos em FACE_DETECTOR_MODEL e FACE_RECOGNIZER_MODEL).
+Cada ChildFace ativo de aventureiro ativo vira o descritor de 128 dimensões do rosto mais
+nítido da foto, alinhado pelos olhos e normalizado. Os vetores ficam num único arquivo NumPy
+(`FACE_INDEX_PATH`, .npz) com as matrizes `vectors` (N x D, float32), `face_ids` e
+`child_ids`. A busca é um produto matriz-vetor: com vetores normalizados, o produto
+interno é a similaridade de cosseno, e milhares de rostos levam poucos milissegundos.
+
+Sem o OpenCV ou sem os arquivos dos modelos a chamada por foto fica indisponível
+(FaceModelsUnavailable) e a chamada manual continua funcionando.
+
+O índice é atualizado por rosto (signals em attendance/signals.py) e pode ser refeito do
+zero com `manage.py rebuild_face_index`. Cada processo mantém o arquivo carregado e só o
+relê quando a data de modificação muda. Quem altera o índice segura um lock de arquivo
+(`<índice>.lock`, fcntl) durante todo o ciclo ler–alterar–trocar, para que workers
+diferentes não desfaçam as alterações uns dos outros.
+"""
+import functools
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows (desenvolvimento): só o lock entre threads
+    fcntl = None
+
+try:
+    import cv2
+except ImportError:  # opencv-python-headless não instalado: chamada por foto indisponível
+    cv2 = None
+
+import numpy as np
+from django.conf import settings
+from PIL import Image, UnidentifiedImageError
+
+from children.models import ChildFace
+from core.images import open_image, resized_copy
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 128
+# O detector trabalha na foto reduzida a este lado máximo (fotos de celular têm 4000px)
+DETECTION_MAX_SIDE = 640
+DETECTION_SCORE = 0.8
+
+_lock = threading.Lock()
+_loaded = {'mtime': None, 'data': None}
+
+
+class FaceModelsUnavailable(Exception):
+    pass
+
+
+def index_path() -> Path:
+    return Path(settings.FACE_INDEX_PATH)
+
+
+def models_available() -> bool:
+    return cv2 is not None and all(
+        Path(path).is_file() for path in (settings.FACE_DETECTOR_MODEL, settings.FACE_RECOGNIZER_MODEL)
+    )
+
+
+@functools.cache
+def _models(detector_path: str, recognizer_path: str):
+    # Um par por processo (e por caminho, para os testes com override_settings)
+    detector = cv2.FaceDetectorYN.create(detector_path, '', (320, 320), DETECTION_SCORE)
+    recognizer = cv2.FaceRecognizerSF.create(recognizer_path, '')
+    return detector, recognizer
+
+
+def _face_descriptor(image: Image.Image) -> np.ndarray | None:
+    """Descritor do rosto de maior confiança na imagem (RGB); None se não houver rosto."""
+    if not models_available():
+        raise FaceModelsUnavailable('Modelos de rosto não configurados (FACE_DETECTOR_MODEL/FACE_RECOGNIZER_MODEL)')
+    detector, recognizer = _models(str(settings.FACE_DETECTOR_MODEL), str(settings.FACE_RECOGNIZER_MODEL))
+    image = resized_copy(image.convert('RGB'), (DETECTION_MAX_SIDE, DETECTION_MAX_SIDE))
+    pixels = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR)
+    detector.setInputSize((pixels.shape[1], pixels.shape[0]))
+    _, found = detector.detect(pixels)
+    if found is None or not len(found):
+        return None
+    best = found[int(np.argmax(found[:, -1]))]
+    aligned = recognizer.alignCrop(pixels, best)
+    return recognizer.feature(aligned).reshape(-1).astype(np.float32)
+
+
+def compute_embedding(fileobj) -> np.ndarray | None:
+    """
+    Descritor normalizado do rosto da foto; None se o arquivo não for uma imagem legível ou
+    não tiver rosto. Levanta FaceModelsUnavailable sem os modelos.
+    """
+    try:
+        image = open_image(fileobj)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return None
+    vector = _face_descriptor(image)
+    if vector is None:
+        return None
+    norm = np.linalg.norm(vector)
+    if not norm:
+        return None
+    return vector / norm
+
+
+def _empty():
+    return {
+        'vectors': np.zeros((0, EMBEDDING_DIM), dtype=np.float32),
+        'face_ids': np.zeros(0, dtype=np.int64),
+        'child_ids': np.zeros(0, dtype=np.int64),
+    }
+
+
+def _read_index(path: Path) -> dict:
+    with np.load(path) as data:
+        loaded = {key: data[key] for key in ('vectors', 'face_ids', 'child_ids')}
+    if loaded['vectors'].shape[1:] != (EMBEDDING_DIM,):
+        # Índice gerado por outro descritor: não dá para comparar, vale como vazio até o rebuild
+        logger.warning('Índice de rostos %s incompatível; rode manage.py rebuild_face_index', path)
+        return _empty()
+    return loaded
+
+
+def load_index() -> dict:
+    path = index_path()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return _empty()
+    if _loaded['mtime'] != mtime:
+        _loaded['data'] = _read_index(path)
+        _loaded['mtime'] = mtime
+    return _loaded['data']
+
+
+@contextmanager
+def _index_lock():
+    """Exclusão mútua entre threads e entre processos para alterar o índice."""
+    path = index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _lock, open(path.with_name(path.name + '.lock'), 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _locked_load() -> dict:
+    # Já com o lock: lê do disco, sem confiar no cache por mtime (outro processo pode ter
+    # trocado o arquivo no mesmo instante de relógio da última leitura).
+    path = index_path()
+    if not path.exists():
+        return _empty()
+    return _read_index(path)
+
+
+def _save_index(data: dict) -> None:
+    path = index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Grava num temporário e troca de uma vez: leitores nunca veem um arquivo pela metade.
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.npz', delete=False) as tmp:
+        np.savez(tmp, **data)
+    os.replace(tmp.name, path)
+
+
+def _face_embedding(face: ChildFace) -> np.ndarray | None:
+    try:
+        with face.image.open('rb') as fh:
+            vector = compute_embedding(fh)
+    except (FileNotFoundError, ValueError):
+        logger.warning('Imagem do rosto %s não encontrada', face.pk)
+        return None
+    if vector is None:
+        logger.info('Nenhum rosto encontrado na foto %s', face.pk)
+    return vector
+
+
+def upsert_face(face: ChildFace) -> None:
+    """
+    Inclui ou troca o vetor de um rosto ativo de aventureiro ativo (mesmo critério do
+    rebuild_index); os demais saem do índice.
+    """
+    if not face.is_active or not face.image or not face.child.active:
+        remove_faces([face.pk])
+        return
+    if not models_available():
+        logger.warning('Rosto %s não indexado: modelos de rosto não configurados', face.pk)
+        return
+    vector = _face_embedding(face)
+    if vector is None:
+        remove_faces([face.pk])
+        return
+    with _index_lock():
+        data = _locked_load()
+        keep = data['face_ids'] != face.pk
+        _save_index(
+            {
+                'vectors': np.vstack([data['vectors'][keep], vector[np.newaxis, :]]),
+                'face_ids': np.append(data['face_ids'][keep], face.pk),
+                'child_ids': np.append(data['child_ids'][keep], face.child_id),
+            }
+        )
+
+
+def remove_faces(face_ids=(), child_id: int | None = None) -> None:
+    """Tira do índice os rostos indicados e/ou todos os de um aventureiro, numa só gravação."""
+    with _index_lock():
+        data = _locked_load()
+        drop = np.isin(data['face_ids'], np.fromiter(face_ids, dtype=np.int64))
+        if child_id is not None:
+            drop |= data['child_ids'] == child_id
+        if not drop.any():
+            return
+        _save_index({key: value[~drop] for key, value in data.items()})
+
+
+def sync_child(child) -> None:
+    """Aventureiro desativado sai do índice; reativado volta com os rostos ativos que faltam."""
+    if not child.active:
+        remove_faces(child_id=child.pk)
+        return
+    indexed = set(load_index()['face_ids'].tolist())
+    for face in child.faces.filter(is_active=True).exclude(image='').exclude(pk__in=indexed):
+        upsert_face(face)
+
+
+def rebuild_index() -> int:
+    """Recalcula todos os rostos ativos. Retorna quantos entraram no índice."""
+    if not models_available():
+        raise FaceModelsUnavailable('Modelos de rosto não configurados (FACE_DETECTOR_MODEL/FACE_RECOGNIZER_MODEL)')
+    vectors, face_ids, child_ids = [], [], []
+    for face in ChildFace.objects.filter(is_active=True, child__active=True).exclude(image='').iterator():
+        vector = _face_embedding(face)
+        if vector is None:
+            continue
+        vectors.append(vector)
+        face_ids.append(face.pk)
+        child_ids.append(face.child_id)
+    data = _empty()
+    if vectors:
+        data = {
+            'vectors': np.vstack(vectors).astype(np.float32),
+            'face_ids': np.asarray(face_ids, dtype=np.int64),
+            'child_ids': np.asarray(child_ids, dtype=np.int64),
+        }
+    with _index_lock():
+        _save_index(data)
+    return len(face_ids)
+
+
+def match_face(fileobj, allowed_child_ids=None, threshold: float | None = None) -> tuple[int, float] | None:
+    """
+    Procura o aventureiro mais parecido com a foto. `allowed_child_ids` restringe a busca
+    (ex.: crianças da turma da sessão). Retorna (child_id, similaridade) ou None.
+    Levanta FaceModelsUnavailable sem os modelos.
+    """
+    vector = compute_embedding(fileobj)
+    if vector is None:
+        return None
+    data = load_index()
+    vectors, child_ids = data['vectors'], data['child_ids']
+    if allowed_child_ids is not None:
+        mask = np.isin(child_ids, np.fromiter(allowed_child_ids, dtype=np.int64))
+        vectors, child_ids = vectors[mask], child_ids[mask]
+    if not len(child_ids):
+        return None
+    scores = vectors @ vector
+    best = int(np.argmax(scores))
+    limit = settings.FACE_MATCH_THRESHOLD if threshold is None else threshold
+    if scores[best] < limit:
+        return None
+    return int(child_ids[best]), float(scores[best])
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from children.models import Child, ChildFace
+
+from .faces import remove_faces, sync_child, upsert_face
+
+
+@receiver(post_save, sender=ChildFace)
+def index_child_face(sender, instance: ChildFace, **kwargs):
+    # Depois do commit: o arquivo da imagem já está gravado e um rollback não deixa vetor órfão.
+    transaction.on_commit(lambda: upsert_face(instance))
+
+
+@receiver(post_delete, sender=ChildFace)
+def unindex_child_face(sender, instance: ChildFace, **kwargs):
+    face_id = instance.pk
+    transaction.on_commit(lambda: remove_faces([face_id]))
+
+
+@receiver(post_save, sender=Child)
+def sync_child_faces(sender, instance: Child, created, update_fields=None, **kwargs):
+    # Aventureiro novo ainda não tem rosto; nos demais só interessa a troca de `active`
+    if created or (update_fields is not None and 'active' not in update_fields):
+        return
+    transaction.on_commit(lambda: sync_child(instance))
@@ -1,9 +1,19 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
 from django.urls import reverse
+import numpy as np
+from PIL import Image, ImageDraw
 
+from attendance.faces import _save_index, load_index
 from attendance.models import AttendanceRecord, AttendanceSession
-from children.models import Child, GuardianChild
+from children.models import Child, ChildFace, GuardianChild
 
 
 class AttendanceTests(TestCase):
@@ -39,3 +49,103 @@ class AttendanceTests(TestCase):
         resp = self.client.get(reverse('attendance-my'))
         self.assertContains(resp, 'Filho 1')
         self.assertNotContains(resp, 'Filho 2')
+
+
+def _fake_descriptor(image):
+    # Os modelos ONNX não vêm no repositório: nos testes o "descritor" depende só do desenho da
+    # foto (mesma figura -> mesmo vetor), o resto do fluxo (índice, busca, presença) é o real.
+    dark = (np.asarray(image.convert('L')) < 128).mean()
+    seed = 1 if dark > 0.25 else 2  # círculo ocupa bem mais área escura que a barra, com ou sem recorte 3x4
+    return np.random.default_rng(seed).standard_normal(128).astype(np.float32)
+
+
+class PhotoCheckinTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=tmp, FACE_INDEX_PATH=os.path.join(tmp, 'faces.npz'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for target, kwargs in (
+            ('attendance.faces._face_descriptor', {'side_effect': _fake_descriptor}),
+            ('attendance.faces.models_available', {'return_value': True}),
+            ('attendance.views.models_available', {'return_value': True}),
+        ):
+            patcher = mock.patch(target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        User = get_user_model()
+        self.staff = User.objects.create_user('+5511999999999', 'senha123', role=User.Role.PROFESSOR)
+        self.ana = Child.objects.create(name='Ana', birth_date='2018-01-01', class_group='Lobos')
+        self.bia = Child.objects.create(name='Bia', birth_date='2018-02-02', class_group='Lobos')
+        self.session = AttendanceSession.objects.create(date='2024-01-01', type='REUNIAO', class_group='Lobos')
+
+    def _photo(self, shape, name='rosto.jpg'):
+        image = Image.new('RGB', (200, 200), (230, 230, 230))
+        draw = ImageDraw.Draw(image)
+        if shape == 'circle':
+            draw.ellipse((40, 40, 160, 160), fill=(40, 40, 40))
+        else:
+            draw.rectangle((20, 90, 180, 120), fill=(40, 40, 40))
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def test_checkin_matches_indexed_face(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ChildFace.objects.create(child=self.ana, image=self._photo('circle'))
+            face = ChildFace.objects.create(child=self.bia, image=self._photo('bar'))
+        self.assertEqual(len(load_index()['face_ids']), 2)
+
+        self.client.force_login(self.staff)
+        resp = self.client.post(reverse('attendance-checkin', args=[self.session.pk]), {'photo': self._photo('circle')})
+        self.assertEqual(resp.status_code, 302)
+        record = AttendanceRecord.objects.get(session=self.session)
+        self.assertEqual(record.child, self.ana)
+        self.assertTrue(record.present)
+
+        face.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            face.save()
+        self.assertEqual(list(load_index()['child_ids']), [self.ana.pk])
+
+    def test_inactive_child_leaves_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            face = ChildFace.objects.create(child=self.ana, image=self._photo('circle'))
+        self.ana.active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ana.save()
+        self.assertEqual(len(load_index()['face_ids']), 0)
+        # Rosto salvo de aventureiro inativo não entra (mesmo critério do rebuild_index)
+        with self.captureOnCommitCallbacks(execute=True):
+            face.save()
+        self.assertEqual(len(load_index()['face_ids']), 0)
+
+        self.ana.active = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ana.save()
+        self.assertEqual(list(load_index()['face_ids']), [face.pk])
+
+    def test_update_keeps_changes_written_by_other_process(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ChildFace.objects.create(child=self.ana, image=self._photo('circle'))
+        data = load_index()
+        # Outro worker acrescenta um rosto direto no arquivo; o cache deste processo fica velho
+        _save_index(
+            {
+                'vectors': data['vectors'].repeat(2, axis=0),
+                'face_ids': data['face_ids'].tolist() + [999],
+                'child_ids': data['child_ids'].tolist() + [self.bia.pk],
+            }
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            face = ChildFace.objects.create(child=self.bia, image=self._photo('bar'))
+        self.assertCountEqual(load_index()['face_ids'], [data['face_ids'][0], 999, face.pk])
+
+    def test_checkin_unavailable_without_models(self):
+        self.client.force_login(self.staff)
+        url = reverse('attendance-checkin', args=[self.session.pk])
+        with mock.patch('attendance.views.models_available', return_value=False):
+            self.assertContains(self.client.get(url), 'indisponível')
+            self.client.post(url, {'photo': self._photo('circle')})
+        self.assertFalse(AttendanceRecord.objects.exists())
@@ -6,5 +6,6 @@ urlpatterns = [
     path('sessions/', views.session_list, name='attendance-sessions'),
     path('sessions/new', views.session_create, name='attendance-session-new'),
     path('sessions/<int:pk>/take', views.take_attendance, name='attendance-take'),
+    path('sessions/<int:pk>/checkin', views.photo_checkin, name='attendance-checkin'),
     path('my/', views.my_attendance, name='attendance-my'),
 ]
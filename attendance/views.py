@@ -7,6 +7,7 @@ from accounts.models import User
 from children.models import Child, GuardianChild
 from core.permissions import role_required
 
+from .faces import match_face, models_available
 from .forms import AttendanceSessionForm
 from .models import AttendanceRecord, AttendanceSession
 
@@ -75,6 +76,43 @@ def take_attendance(request, pk):
     )
 
 
+@role_required(STAFF_ROLES)
+def photo_checkin(request, pk):
+    """Chamada por foto: compara o rosto da foto tirada na entrada com o índice e marca presença."""
+    session = get_object_or_404(AttendanceSession, pk=pk)
+    available = models_available()
+    if request.method == 'POST':
+        photo = request.FILES.get('photo')
+        if not available:
+            messages.error(request, 'Chamada por foto indisponível. Marque a presença manualmente.')
+            return redirect('attendance-checkin', pk=session.pk)
+        if not photo:
+            messages.error(request, 'Tire ou escolha uma foto.')
+            return redirect('attendance-checkin', pk=session.pk)
+        children_qs = Child.objects.filter(active=True)
+        if session.class_group:
+            children_qs = children_qs.filter(class_group=session.class_group)
+        match = match_face(photo, allowed_child_ids=children_qs.values_list('id', flat=True))
+        if match is None:
+            messages.error(request, 'Rosto não reconhecido. Marque a presença manualmente.')
+            return redirect('attendance-checkin', pk=session.pk)
+        child_id, score = match
+        child = Child.objects.get(pk=child_id)
+        AttendanceRecord.objects.update_or_create(
+            session=session,
+            child=child,
+            defaults={'present': True, 'marked_by_user': request.user, 'marked_at': timezone.now()},
+        )
+        messages.success(request, f'Presença de {child.name} registrada ({score:.0%} de similaridade).')
+        return redirect('attendance-checkin', pk=session.pk)
+    present_count = AttendanceRecord.objects.filter(session=session, present=True).count()
+    return render(
+        request,
+        'attendance/photo_checkin.html',
+        {'session': session, 'present_count': present_count, 'available': available, 'title': 'Chamada por foto'},
+    )
+
+
 @role_required([User.Role.RESPONSAVEL])
 def my_attendance(request):
     guardian_links = GuardianChild.objects.filter(guardian_user=request.user).select_related('child')
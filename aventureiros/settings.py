@@ -52,7 +52,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.UnchangedSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -63,6 +63,21 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'aventureiros.urls'
 
+# Cache: sem configuração é o LocMem, um por processo. Com vários workers, aponte para um cache
+# compartilhado, ex.: CACHE_BACKEND=django.core.cache.backends.redis.RedisCache e
+# CACHE_LOCATION=redis://127.0.0.1:6379 (limite de login e sessões 'cached_db' dependem disso).
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHES = {'default': {'BACKEND': CACHE_BACKEND, 'LOCATION': os.getenv('CACHE_LOCATION', '')}}
+SHARED_CACHE = not CACHE_BACKEND.endswith(('.LocMemCache', '.DummyCache'))
+
+# Sessões: 'db', 'cached_db' (lê do cache e só vai ao banco quando falta ou grava),
+# 'signed_cookies' (nada no servidor, dados assinados no cookie) ou 'cache'. O padrão só é
+# 'cached_db' com cache compartilhado: com LocMem, um logout em um worker não apagaria a
+# sessão do cache dos outros. O UnchangedSessionMiddleware evita gravar sessões que
+# terminaram o request iguais.
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'cached_db' if SHARED_CACHE else 'db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -130,9 +145,46 @@ LOGOUT_REDIRECT_URL = 'login'
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# Carrinhos abertos sem atividade por mais que isso são cancelados pelo comando sweep_carts
+STORE_CART_IDLE_DAYS = int(os.getenv('STORE_CART_IDLE_DAYS', '30'))
+# Produtos ativos com estoque até este valor aparecem como "estoque baixo" nos painéis
+STORE_LOW_STOCK_THRESHOLD = int(os.getenv('STORE_LOW_STOCK_THRESHOLD', '3'))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Documentos e fotos passam pela view protected-media, que confere o acesso e delega o envio:
+# 'nginx' (X-Accel-Redirect para PROTECTED_MEDIA_INTERNAL_URL), 'sendfile' (X-Sendfile) ou 'django' (dev).
+PROTECTED_MEDIA_BACKEND = os.getenv('PROTECTED_MEDIA_BACKEND', 'django')
+PROTECTED_MEDIA_INTERNAL_URL = os.getenv('PROTECTED_MEDIA_INTERNAL_URL', '/protected-media/')
+
+# Chamada por foto: índice NumPy dos rostos (fora de media/), modelos ONNX do OpenCV Zoo
+# (github.com/opencv/opencv_zoo: models/face_detection_yunet/face_detection_yunet_2023mar.onnx e
+# models/face_recognition_sface/face_recognition_sface_2021dec.onnx) e similaridade de cosseno
+# mínima para aceitar (0.363 é o limiar de mesma pessoa publicado para o SFace)
+FACE_INDEX_PATH = os.getenv('FACE_INDEX_PATH', str(BASE_DIR / 'var' / 'face_index.npz'))
+FACE_DETECTOR_MODEL = os.getenv(
+    'FACE_DETECTOR_MODEL', str(BASE_DIR / 'var' / 'face_models' / 'face_detection_yunet_2023mar.onnx')
+)
+FACE_RECOGNIZER_MODEL = os.getenv(
+    'FACE_RECOGNIZER_MODEL', str(BASE_DIR / 'var' / 'face_models' / 'face_recognition_sface_2021dec.onnx')
+)
+FACE_MATCH_THRESHOLD = float(os.getenv('FACE_MATCH_THRESHOLD', '0.363'))
+
+# Fotos 3x4 (usuários e rostos): processar no próprio upload ou só pelo comando process_photos,
+# e se o original enviado deve ser guardado além das versões comprimidas
+PHOTO_PROCESSING_INLINE = os.getenv('PHOTO_PROCESSING_INLINE', 'True').lower() == 'true'
+KEEP_ORIGINAL_PHOTOS = os.getenv('KEEP_ORIGINAL_PHOTOS', 'False').lower() == 'true'
+
+# Limite de tentativas de login (core/throttle.py): fichas por IP e por número de WhatsApp.
+# O IP vem de LOGIN_THROTTLE_IP_HEADER; atrás do nginx use HTTP_X_REAL_IP.
+LOGIN_THROTTLE_ENABLED = os.getenv('LOGIN_THROTTLE_ENABLED', 'True').lower() == 'true'
+LOGIN_THROTTLE_IP_HEADER = os.getenv('LOGIN_THROTTLE_IP_HEADER', 'REMOTE_ADDR')
+LOGIN_THROTTLE_IP_BURST = int(os.getenv('LOGIN_THROTTLE_IP_BURST', '20'))
+LOGIN_THROTTLE_IP_PER_MINUTE = float(os.getenv('LOGIN_THROTTLE_IP_PER_MINUTE', '10'))
+LOGIN_THROTTLE_NUMBER_BURST = int(os.getenv('LOGIN_THROTTLE_NUMBER_BURST', '10'))
+LOGIN_THROTTLE_NUMBER_PER_MINUTE = float(os.getenv('LOGIN_THROTTLE_NUMBER_PER_MINUTE', '1'))
+
 LOG_DIR = BASE_DIR / 'logs'
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -1,6 +1,10 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.shortcuts import render
+from django.urls import path
 
-from .models import Child, ChildFace, GuardianChild
+from .forms import FamilyImportForm
+from .importer import COLUMNS, import_families
+from .models import Child, ChildFace, ClassGroupHistory, GuardianChild
 
 
 @admin.register(Child)
@@ -8,6 +12,40 @@ class ChildAdmin(admin.ModelAdmin):
     list_display = ('name', 'class_group', 'birth_date', 'active')
     list_filter = ('class_group', 'active')
     search_fields = ('name', 'class_group')
+    change_list_template = 'admin/children/child/change_list.html'
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                'importar/',
+                self.admin_site.admin_view(self.import_view),
+                name='children_child_import',
+            ),
+        ]
+        return custom_urls + urls
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return self.admin_site.login(request)
+        form = FamilyImportForm(request.POST or None, request.FILES or None)
+        report = None
+        if request.method == 'POST' and form.is_valid():
+            report = import_families(form.cleaned_data['csv_file'], dry_run=form.cleaned_data['dry_run'])
+            if report['errors'] or report['conflicts']:
+                skipped = len(report['errors']) + len(report['conflicts'])
+                messages.warning(request, f'{skipped} linha(s) com erro ou conflito ficaram de fora.')
+            elif not form.cleaned_data['dry_run']:
+                messages.success(request, 'Importação concluída.')
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Importar famílias (CSV)',
+            'opts': self.model._meta,
+            'form': form,
+            'report': report,
+            'columns': COLUMNS,
+        }
+        return render(request, 'admin/children/child/import_csv.html', context)
 
 
 @admin.register(GuardianChild)
@@ -21,3 +59,10 @@ class ChildFaceAdmin(admin.ModelAdmin):
     list_display = ('child', 'is_active', 'created_at')
     list_filter = ('is_active',)
     search_fields = ('child__name',)
+
+
+@admin.register(ClassGroupHistory)
+class ClassGroupHistoryAdmin(admin.ModelAdmin):
+    list_display = ('child', 'old_class_group', 'new_class_group', 'reference_date', 'changed_at')
+    list_filter = ('reference_date', 'new_class_group')
+    search_fields = ('child__name',)
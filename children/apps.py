@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ChildrenConfig(AppConfig):
     name = 'children'
+
+    def ready(self):
+        # Import signals
+        from . import signals  # noqa: F401
@@ -46,3 +46,8 @@ class GuardianChildForm(forms.ModelForm):
         self.fields['guardian_user'].queryset = User.objects.filter(role=User.Role.RESPONSAVEL)
         self.fields['guardian_user'].label = 'Responsável'
         self.fields['child'].label = 'Aventureiro'
+
+
+class FamilyImportForm(forms.Form):
+    csv_file = forms.FileField(label='Planilha (CSV)')
+    dry_run = forms.BooleanField(label='Só validar, sem gravar', required=False)
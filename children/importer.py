@@ -0,0 +1,274 @@
+"""
+Importação de famílias por planilha CSV (comando import_families e página no admin de Aventureiros).
+
+Uma linha por aventureiro; as linhas com o mesmo WhatsApp de responsável formam uma família.
+O arquivo é lido linha a linha e validado por inteiro antes de gravar qualquer coisa; linhas
+com erro ficam de fora e voltam no relatório com o número da linha. A gravação é feita em
+lotes de famílias, cada lote numa transação com bulk_create de usuários, aventureiros, fichas
+de saúde, vínculos e mensalidades.
+
+Pode ser rodada de novo com o mesmo arquivo: responsáveis são reconhecidos pelo WhatsApp e
+aventureiros pelo nome (sem acentos) + data de nascimento dentro da mesma família, e só o que
+falta é criado. Um aventureiro com o mesmo nome e nascimento em outra família não é
+vinculado: a linha volta como conflito para a secretaria resolver.
+Responsáveis novos entram sem senha; a diretoria define a senha em Usuários > Editar.
+"""
+import csv
+import datetime
+import io
+
+from django.db import transaction
+
+from accounts.models import User
+from accounts.utils import cached_whatsapp_number, fold_search_text
+
+from .models import Child, ChildHealth, GuardianChild
+from .utils import _split_identity_document, determine_class_group, refresh_after_bulk_children
+
+# coluna -> descrição (mostrada na página de importação)
+COLUMNS = {
+    'responsavel_nome': 'Nome do responsável (obrigatório)',
+    'responsavel_sobrenome': 'Sobrenome do responsável',
+    'responsavel_whatsapp': 'WhatsApp do responsável (obrigatório)',
+    'responsavel_email': 'E-mail do responsável',
+    'responsavel_endereco': 'Endereço',
+    'aventureiro_nome': 'Nome completo do aventureiro (obrigatório)',
+    'nascimento': 'Data de nascimento, AAAA-MM-DD ou DD/MM/AAAA (obrigatório)',
+    'sexo': 'Sexo',
+    'cpf_ou_certidao': 'CPF ou número da certidão de nascimento',
+    'turma': 'Turma (em branco: calculada pela idade)',
+    'pai_nome': 'Nome do pai',
+    'pai_cpf': 'CPF do pai',
+    'pai_telefone': 'Telefone do pai',
+    'mae_nome': 'Nome da mãe',
+    'mae_cpf': 'CPF da mãe',
+    'mae_telefone': 'Telefone da mãe',
+    'alergias': 'Alergias',
+    'medicamentos': 'Medicamentos de uso contínuo',
+    'restricoes': 'Restrições médicas',
+    'observacoes': 'Observações',
+    'contato_emergencia': 'Contato de emergência',
+    'telefone_emergencia': 'Telefone de emergência',
+    'plano_saude': 'Plano de saúde',
+}
+REQUIRED_COLUMNS = ('responsavel_nome', 'responsavel_whatsapp', 'aventureiro_nome', 'nascimento')
+CHUNK_SIZE = 200
+
+
+def _parse_date(value: str) -> datetime.date | None:
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def read_rows(fileobj):
+    """Gera (número da linha, linha) de um CSV em UTF-8 separado por vírgula ou ponto e vírgula."""
+    if not isinstance(fileobj, io.TextIOBase):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    sample = fileobj.read(4096)
+    fileobj.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(fileobj, dialect=dialect)
+    reader.fieldnames = [(name or '').strip().lower() for name in reader.fieldnames or []]
+    missing = [column for column in REQUIRED_COLUMNS if column not in reader.fieldnames]
+    if missing:
+        raise ValueError(f'Colunas obrigatórias ausentes: {", ".join(missing)}')
+    for row in reader:
+        yield reader.line_num, {key: (value or '').strip() for key, value in row.items() if key}
+
+
+def validate_rows(rows) -> tuple[dict, list[tuple[int, str]]]:
+    """
+    Confere todas as linhas antes de gravar. Retorna ({whatsapp: família}, [(linha, erro)]),
+    com cada família no formato {'guardian': {...}, 'children': [{...}]}.
+    """
+    families = {}
+    errors = []
+    seen_children = set()
+    for line, row in rows:
+        problems = [f'{COLUMNS[column].split(" (")[0]} em branco' for column in REQUIRED_COLUMNS if not row.get(column)]
+        whatsapp = cached_whatsapp_number(row.get('responsavel_whatsapp', ''))
+        # Sem o formato +DDI... o número não serve como login
+        if row.get('responsavel_whatsapp') and not whatsapp.startswith('+'):
+            problems.append('WhatsApp do responsável inválido')
+        birth_date = _parse_date(row.get('nascimento', '')) if row.get('nascimento') else None
+        if row.get('nascimento') and birth_date is None:
+            problems.append(f'data de nascimento inválida: {row["nascimento"]}')
+        key = (whatsapp, fold_search_text(row.get('aventureiro_nome', '')), birth_date)
+        if not problems and key in seen_children:
+            problems.append('aventureiro repetido no arquivo')
+        if problems:
+            errors.append((line, '; '.join(problems)))
+            continue
+        seen_children.add(key)
+        family = families.setdefault(
+            whatsapp,
+            {
+                'guardian': {
+                    'whatsapp_number': whatsapp,
+                    'first_name': row['responsavel_nome'],
+                    'last_name': row.get('responsavel_sobrenome', ''),
+                    'email': row.get('responsavel_email', ''),
+                    'address': row.get('responsavel_endereco', ''),
+                },
+                'children': [],
+            },
+        )
+        family['children'].append({**row, 'birth_date': birth_date, 'line': line})
+    return families, errors
+
+
+def _new_child(row) -> Child:
+    cpf_value, birth_cert_value = _split_identity_document(row.get('cpf_ou_certidao', ''))
+    child = Child(
+        name=row['aventureiro_nome'],
+        birth_date=row['birth_date'],
+        gender=row.get('sexo', ''),
+        cpf=cpf_value,
+        birth_certificate_number=birth_cert_value,
+        class_group=row.get('turma') or determine_class_group(row['birth_date']),
+        active=True,
+        father_name=row.get('pai_nome', ''),
+        father_cpf=row.get('pai_cpf', ''),
+        father_phone=row.get('pai_telefone', ''),
+        mother_name=row.get('mae_nome', ''),
+        mother_cpf=row.get('mae_cpf', ''),
+        mother_phone=row.get('mae_telefone', ''),
+    )
+    # bulk_create não passa pelo save(), que preenche as colunas de busca
+    child.fill_search_fields()
+    return child
+
+
+def _new_health(child: Child, row) -> ChildHealth:
+    return ChildHealth(
+        child=child,
+        allergies=row.get('alergias', ''),
+        medications=row.get('medicamentos', ''),
+        restrictions=row.get('restricoes', ''),
+        observations=row.get('observacoes', ''),
+        emergency_contact=row.get('contato_emergencia', ''),
+        emergency_phone=row.get('telefone_emergencia', ''),
+        health_plan=row.get('plano_saude', ''),
+    )
+
+
+@transaction.atomic
+def _import_chunk(families: list[dict], report: dict) -> tuple[list[int], list[int], set[int]]:
+    """Grava um lote de famílias. Retorna (usuários novos, aventureiros novos, responsáveis com vínculo novo)."""
+    from finance.signals import generate_fees_for_children
+
+    numbers = [family['guardian']['whatsapp_number'] for family in families]
+    guardians = {user.whatsapp_number: user for user in User.objects.filter(whatsapp_number__in=numbers)}
+    report['users_existing'] += len(guardians)
+    new_users = []
+    for family in families:
+        data = family['guardian']
+        if data['whatsapp_number'] in guardians:
+            continue
+        user = User(role=User.Role.RESPONSAVEL, financial_whatsapp=data['whatsapp_number'], **data)
+        user.set_unusable_password()
+        user.fill_search_fields()
+        new_users.append(user)
+    User.objects.bulk_create(new_users)
+    guardians.update((user.whatsapp_number, user) for user in new_users)
+    report['users_created'] += len(new_users)
+
+    rows = [(number, row) for number, family in zip(numbers, families) for row in family['children']]
+    # Aventureiros com o mesmo nome (sem acentos) e nascimento já cadastrados, com os números dos
+    # responsáveis vinculados. Só se reaproveita o que já é da mesma família: homônimo de outra
+    # família vira conflito (vincular daria a este responsável os dados da criança alheia).
+    owned = {}
+    taken = set()
+    for pk, search_name, birth_date, number in Child.objects.filter(
+        search_name__in={fold_search_text(row['aventureiro_nome']) for _, row in rows}
+    ).values_list('pk', 'search_name', 'birth_date', 'guardian_links__guardian_user__whatsapp_number'):
+        taken.add((search_name, birth_date))
+        if number:
+            owned[(number, search_name, birth_date)] = pk
+    new_children = []
+    child_ids = {}
+    for number, row in rows:
+        key = (fold_search_text(row['aventureiro_nome']), row['birth_date'])
+        if (number, *key) in owned:
+            report['children_existing'] += 1
+        elif key in taken:
+            report['conflicts'].append(
+                (row['line'], f'{row["aventureiro_nome"]} ({row["birth_date"]:%d/%m/%Y}) já está cadastrado em outra família; vincule manualmente')
+            )
+            continue
+        else:
+            child = _new_child(row)
+            owned[(number, *key)] = child
+            taken.add(key)
+            new_children.append((row, child))
+        child_ids[row['line']] = owned[(number, *key)]
+    Child.objects.bulk_create([child for _, child in new_children])
+    ChildHealth.objects.bulk_create([_new_health(child, row) for row, child in new_children])
+    generate_fees_for_children([child for _, child in new_children])
+    report['children_created'] += len(new_children)
+    # pk das já cadastradas, objeto (agora com pk) das criadas neste lote
+    child_ids = {line: getattr(found, 'pk', found) for line, found in child_ids.items()}
+
+    wanted = {
+        (guardians[number].pk, child_ids[row['line']]) for number, row in rows if row['line'] in child_ids
+    }
+    linked = set(
+        GuardianChild.objects.filter(
+            guardian_user_id__in={user_id for user_id, _ in wanted}, child_id__in={child_id for _, child_id in wanted}
+        ).values_list('guardian_user_id', 'child_id')
+    )
+    links = [
+        GuardianChild(guardian_user_id=user_id, child_id=child_id, relationship='Responsável')
+        for user_id, child_id in sorted(wanted - linked)
+    ]
+    GuardianChild.objects.bulk_create(links, ignore_conflicts=True)
+    report['links_created'] += len(links)
+    return [user.pk for user in new_users], [child.pk for _, child in new_children], {link.guardian_user_id for link in links}
+
+
+def import_families(fileobj, dry_run: bool = False, chunk_size: int = CHUNK_SIZE) -> dict:
+    """
+    Valida e importa o CSV. Retorna o relatório: famílias/aventureiros válidos, quantos foram
+    criados ou já existiam, vínculos novos, a lista de erros [(linha, mensagem)] e a de
+    conflitos [(linha, mensagem)]: homônimos de outra família, que ficam sem gravar.
+    """
+    from core.search import index_objects
+
+    report = {
+        'families': 0,
+        'children': 0,
+        'users_created': 0,
+        'users_existing': 0,
+        'children_created': 0,
+        'children_existing': 0,
+        'links_created': 0,
+        'errors': [],
+        'conflicts': [],
+    }
+    try:
+        families, report['errors'] = validate_rows(read_rows(fileobj))
+    except (ValueError, UnicodeDecodeError, csv.Error) as exc:
+        report['errors'] = [(1, str(exc))]
+        return report
+    family_list = list(families.values())
+    report['families'] = len(family_list)
+    report['children'] = sum(len(family['children']) for family in family_list)
+    if dry_run:
+        return report
+
+    user_ids, child_ids, relinked = [], [], set()
+    for start in range(0, len(family_list), chunk_size):
+        users, children, guardians = _import_chunk(family_list[start:start + chunk_size], report)
+        user_ids += users
+        child_ids += children
+        relinked |= guardians
+    index_objects(User, user_ids)
+    refresh_after_bulk_children(child_ids, relinked - set(user_ids))
+    return report
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from children.importer import COLUMNS, import_families
+
+
+class Command(BaseCommand):
+    help = "Importa responsáveis e aventureiros de um CSV (uma linha por aventureiro); pode ser rodado de novo"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help=f'Arquivo CSV com as colunas: {", ".join(COLUMNS)}')
+        parser.add_argument('--dry-run', action='store_true', help='Só valida o arquivo, sem gravar')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as fh:
+                report = import_families(fh, dry_run=options['dry_run'])
+        except OSError as exc:
+            raise CommandError(f'Não foi possível ler o arquivo: {exc}')
+        elapsed = time.perf_counter() - started
+
+        for line, message in report['errors']:
+            self.stderr.write(f'Linha {line}: {message}')
+        self.stdout.write(
+            f"{report['families']} família(s) e {report['children']} aventureiro(s) válidos; "
+            f"{len(report['errors'])} linha(s) com erro."
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Simulação: nada foi gravado.'))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Responsáveis: {report['users_created']} novo(s), {report['users_existing']} já cadastrado(s). "
+                f"Aventureiros: {report['children_created']} novo(s), {report['children_existing']} já cadastrado(s). "
+                f"Vínculos novos: {report['links_created']}. ({elapsed:.1f}s)"
+            )
+        )
+        for line, message in report['conflicts']:
+            self.stderr.write(f'Linha {line}: {message}')
@@ -0,0 +1,67 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from children.models import Child, ClassGroupHistory
+from children.utils import class_group_case
+from core.kpis import invalidate_kpis
+from core.search import index_objects
+from documents.utils import invalidate_compliance_matrix
+
+
+class Command(BaseCommand):
+    help = "Recalcula a turma de todos os aventureiros ativos pela idade (CLASS_MAP) com um único UPDATE"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Data de referência AAAA-MM-DD (padrão: hoje)')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas lista as mudanças')
+        parser.add_argument(
+            '--keep-unmapped',
+            action='store_true',
+            help='Mantém a turma de quem está fora das idades do CLASS_MAP (padrão: fica sem turma)',
+        )
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                reference = datetime.date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('Data inválida; use AAAA-MM-DD.')
+        else:
+            reference = datetime.date.today()
+        target = class_group_case(reference, options['keep_unmapped'])
+
+        with transaction.atomic():
+            changes = list(
+                Child.objects.filter(active=True)
+                .exclude(class_group=target)
+                .annotate(target_class=target)
+                .order_by('target_class', 'name')
+                .values_list('id', 'name', 'class_group', 'target_class')
+            )
+            for _, name, old, new in changes:
+                self.stdout.write(f'{name}: {old or "-"} -> {new or "-"}')
+            if options['dry_run']:
+                self.stdout.write(f'{len(changes)} aventureiro(s) mudariam de turma.')
+                return
+            if changes:
+                ClassGroupHistory.objects.bulk_create(
+                    [
+                        ClassGroupHistory(
+                            child_id=child_id,
+                            old_class_group=old,
+                            new_class_group=new,
+                            reference_date=reference,
+                        )
+                        for child_id, _, old, new in changes
+                    ],
+                    batch_size=500,
+                )
+                Child.objects.filter(active=True).exclude(class_group=target).update(class_group=target)
+        if changes:
+            # O UPDATE em massa não dispara signals: caches por turma e busca global são refeitos aqui
+            invalidate_compliance_matrix()
+            invalidate_kpis('documents', 'attendance')
+            index_objects(Child, [child_id for child_id, *_ in changes])
+        self.stdout.write(self.style.SUCCESS(f'{len(changes)} aventureiro(s) mudaram de turma.'))
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0004_child_birth_certificate_number_child_father_absent_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='childface',
+            name='original',
+            field=models.ImageField(blank=True, editable=False, upload_to='child_faces/originals/', verbose_name='Original'),
+        ),
+        migrations.AddField(
+            model_name='childface',
+            name='thumb',
+            field=models.ImageField(blank=True, editable=False, upload_to='child_faces/', verbose_name='Miniatura'),
+        ),
+    ]
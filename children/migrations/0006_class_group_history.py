@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0005_childface_original_childface_thumb'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassGroupHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_class_group', models.CharField(blank=True, max_length=80, verbose_name='Turma anterior')),
+                ('new_class_group', models.CharField(blank=True, max_length=80, verbose_name='Nova turma')),
+                ('reference_date', models.DateField(verbose_name='Data de referência')),
+                ('changed_at', models.DateTimeField(auto_now_add=True, verbose_name='Alterado em')),
+                ('child', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='class_history', to='children.child', verbose_name='Aventureiro')),
+            ],
+            options={
+                'verbose_name': 'Histórico de Turma',
+                'verbose_name_plural': 'Históricos de Turma',
+                'ordering': ['-changed_at'],
+            },
+        ),
+    ]
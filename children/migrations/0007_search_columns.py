@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+from accounts.utils import fold_search_text, surname_first
+
+
+def fill_search_columns(apps, schema_editor):
+    Child = apps.get_model('children', 'Child')
+    children = list(Child.objects.only('name'))
+    for child in children:
+        child.search_name = fold_search_text(child.name)
+        child.search_surname = surname_first(child.search_name)
+    Child.objects.bulk_update(children, ['search_name', 'search_surname'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0006_class_group_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='child',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='child',
+            name='search_surname',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=150),
+        ),
+        migrations.RunPython(fill_search_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0007_search_columns'),
+    ]
+
+    operations = [
+        # Sem default na criação da coluna: os aventureiros já cadastrados ficam com NULL
+        migrations.AddField(
+            model_name='child',
+            name='created_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Cadastrado em'),
+        ),
+        migrations.AlterField(
+            model_name='child',
+            name='created_at',
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False, null=True, verbose_name='Cadastrado em'
+            ),
+        ),
+    ]
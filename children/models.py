@@ -2,6 +2,8 @@ from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from accounts.utils import fold_search_text, surname_first
+
 
 class Child(models.Model):
     name = models.CharField('Nome', max_length=150)
@@ -21,6 +23,23 @@ class Child(models.Model):
     mother_cpf = models.CharField('CPF da mãe', max_length=20, blank=True)
     mother_phone = models.CharField('Telefone da mãe', max_length=30, blank=True)
     mother_absent = models.BooleanField('Mãe ausente/desconhecida', default=False)
+    # Vazio nos cadastros anteriores à coluna
+    created_at = models.DateTimeField('Cadastrado em', default=timezone.now, null=True, editable=False)
+
+    # Colunas de busca (preenchidas no save): nome sem acentos/minúsculo e com o sobrenome na frente
+    search_name = models.CharField(max_length=150, blank=True, editable=False, db_index=True)
+    search_surname = models.CharField(max_length=150, blank=True, editable=False, db_index=True)
+
+    def save(self, *args, **kwargs):
+        self.fill_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_name', 'search_surname'}
+        super().save(*args, **kwargs)
+
+    def fill_search_fields(self):
+        self.search_name = fold_search_text(self.name)
+        self.search_surname = surname_first(self.search_name)
 
     def __str__(self):
         return self.name
@@ -48,6 +67,8 @@ class GuardianChild(models.Model):
 class ChildFace(models.Model):
     child = models.ForeignKey(Child, on_delete=models.CASCADE, related_name='faces', verbose_name='Aventureiro')
     image = models.ImageField(upload_to='child_faces/')
+    thumb = models.ImageField('Miniatura', upload_to='child_faces/', blank=True, editable=False)
+    original = models.ImageField('Original', upload_to='child_faces/originals/', blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
 
@@ -74,3 +95,21 @@ class ChildHealth(models.Model):
 
     def __str__(self):
         return f'Saúde de {self.child}'
+
+
+class ClassGroupHistory(models.Model):
+    """Troca de turma registrada pelo comando promote_classes."""
+
+    child = models.ForeignKey(Child, on_delete=models.CASCADE, related_name='class_history', verbose_name='Aventureiro')
+    old_class_group = models.CharField('Turma anterior', max_length=80, blank=True)
+    new_class_group = models.CharField('Nova turma', max_length=80, blank=True)
+    reference_date = models.DateField('Data de referência')
+    changed_at = models.DateTimeField('Alterado em', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Histórico de Turma'
+        verbose_name_plural = 'Históricos de Turma'
+        ordering = ['-changed_at']
+
+    def __str__(self):
+        return f'{self.child}: {self.old_class_group or "-"} -> {self.new_class_group or "-"}'
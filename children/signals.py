@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from accounts.signals import bump_auth_version
+
+from .models import GuardianChild
+
+
+@receiver(post_init, sender=GuardianChild)
+def remember_guardian(sender, instance: GuardianChild, **kwargs):
+    instance._loaded_guardian_id = instance.__dict__.get('guardian_user_id')
+
+
+@receiver([post_save, post_delete], sender=GuardianChild)
+def refresh_guardian_access(sender, instance: GuardianChild, **kwargs):
+    # Invalida o conjunto de aventureiros acessíveis guardado na sessão (core.permissions),
+    # inclusive do responsável anterior se o vínculo trocou de dono.
+    user_ids = {instance.guardian_user_id, getattr(instance, '_loaded_guardian_id', None)} - {None}
+    bump_auth_version(User.objects.filter(pk__in=user_ids))
+    instance._loaded_guardian_id = instance.guardian_user_id
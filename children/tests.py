@@ -1,8 +1,17 @@
+import datetime
+from io import BytesIO, StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 
-from .models import Child, GuardianChild
+from core.models import SearchEntry
+
+from .models import Child, ClassGroupHistory, GuardianChild
+from .utils import _years_before, determine_class_group
 
 
 class ChildrenAccessTests(TestCase):
@@ -30,3 +39,80 @@ class ChildrenAccessTests(TestCase):
         resp = self.client.get(reverse('children-meus'))
         self.assertContains(resp, 'Aventureiro 1')
         self.assertNotContains(resp, 'Aventureiro 2')
+
+
+class PromoteClassesTests(TestCase):
+    def test_matches_determine_class_group_and_records_history(self):
+        today = datetime.date.today()
+        births = [_years_before(today, years) - datetime.timedelta(days=offset)
+                  for years in (5, 6, 7, 9, 10) for offset in (0, 1, 200)]
+        children = [
+            Child.objects.create(name=f'C{idx}', birth_date=birth, class_group='Luminares')
+            for idx, birth in enumerate(births)
+        ]
+        out = StringIO()
+        call_command('promote_classes', '--dry-run', stdout=out)
+        self.assertFalse(ClassGroupHistory.objects.exists())
+        with mock.patch('children.management.commands.promote_classes.invalidate_kpis') as invalidate_kpis:
+            call_command('promote_classes', stdout=StringIO())
+        invalidate_kpis.assert_called_once_with('documents', 'attendance')
+        for child in children:
+            child.refresh_from_db()
+            self.assertEqual(child.class_group, determine_class_group(child.birth_date), child.birth_date)
+        changed = sum(1 for child in children if child.class_group != 'Luminares')
+        self.assertEqual(ClassGroupHistory.objects.count(), changed)
+        self.assertIn(f'{changed} aventureiro(s) mudariam', out.getvalue())
+        # Quem mudou de turma foi reindexado na busca global
+        self.assertEqual(SearchEntry.objects.filter(kind=SearchEntry.Kind.CHILD).count(), changed)
+
+
+class FamilyImportTests(TestCase):
+    CSV = (
+        'responsavel_nome;responsavel_whatsapp;aventureiro_nome;nascimento;alergias\n'
+        'Carla;(11) 98888-7777;Lucas Lima;2018-03-01;Amendoim\n'
+        'Carla;11988887777;Júlia Lima;05/07/2017;\n'
+        'Pedro;123;Ana Souza;2018-01-01;\n'
+        'Rita;11977776666;Bia Rocha;31/02/2018;\n'
+    ).encode()
+
+    def _import(self, **kwargs):
+        from .importer import import_families
+
+        return import_families(BytesIO(self.CSV), **kwargs)
+
+    def test_import_reports_row_errors_and_is_idempotent(self):
+        report = self._import()
+        self.assertEqual([line for line, _ in report['errors']], [4, 5])
+        self.assertEqual((report['users_created'], report['children_created'], report['links_created']), (1, 2, 2))
+        guardian = get_user_model().objects.get(whatsapp_number='+5511988887777')
+        self.assertFalse(guardian.has_usable_password())
+        lucas = Child.objects.get(name='Lucas Lima')
+        self.assertEqual(lucas.health.allergies, 'Amendoim')
+        self.assertEqual(lucas.search_name, 'lucas lima')
+        self.assertTrue(lucas.fees.exists())
+        self.assertEqual(GuardianChild.objects.filter(guardian_user=guardian).count(), 2)
+
+        again = self._import()
+        self.assertEqual((again['users_created'], again['children_created'], again['links_created']), (0, 0, 0))
+        self.assertEqual(again['children_existing'], 2)
+        self.assertEqual(Child.objects.count(), 2)
+
+    def test_homonym_of_another_family_is_a_conflict(self):
+        other = get_user_model().objects.create_user('+5511955554444', 'senha123')
+        lucas = Child.objects.create(name='Lucas Lima', birth_date='2018-03-01')
+        GuardianChild.objects.create(guardian_user=other, child=lucas)
+        report = self._import()
+        self.assertEqual([line for line, _ in report['conflicts']], [2])
+        self.assertEqual(report['children_created'], 1)
+        guardian = get_user_model().objects.get(whatsapp_number='+5511988887777')
+        self.assertFalse(GuardianChild.objects.filter(guardian_user=guardian, child=lucas).exists())
+        self.assertEqual(Child.objects.filter(search_name='lucas lima').count(), 1)
+
+    def test_admin_page_validates_without_writing(self):
+        admin = get_user_model().objects.create_superuser('+5511990000000', 'senha123')
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile('familias.csv', self.CSV, content_type='text/csv')
+        response = self.client.post(reverse('admin:children_child_import'), {'csv_file': upload, 'dry_run': 'on'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report']['children'], 2)
+        self.assertFalse(Child.objects.exists())
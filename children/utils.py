@@ -1,6 +1,9 @@
 import datetime
 import re
 
+from django.db import transaction
+from django.db.models import Case, CharField, F, Value, When
+
 from children.models import Child, ChildFace, ChildHealth, GuardianChild
 
 
@@ -32,6 +35,30 @@ def determine_class_group(birth_date: datetime.date) -> str:
     return CLASS_MAP.get(_calculate_age(birth_date), '')
 
 
+def _years_before(reference: datetime.date, years: int) -> datetime.date:
+    try:
+        return reference.replace(year=reference.year - years)
+    except ValueError:  # 29/02 em ano não bissexto
+        return reference.replace(year=reference.year - years, day=28)
+
+
+def class_group_case(reference: datetime.date, keep_unmapped: bool = False) -> Case:
+    """
+    Expressão SQL equivalente a determine_class_group na data de referência:
+    idade N <=> nascimento em (referência - N-1 anos, referência - N anos].
+    """
+    whens = [
+        When(
+            birth_date__gt=_years_before(reference, age + 1),
+            birth_date__lte=_years_before(reference, age),
+            then=Value(name),
+        )
+        for age, name in CLASS_MAP.items()
+    ]
+    default = F('class_group') if keep_unmapped else Value('')
+    return Case(*whens, default=default, output_field=CharField())
+
+
 def collect_children_payload(post_data, files=None):
     errors = []
     payloads = []
@@ -124,9 +151,9 @@ def collect_children_payload(post_data, files=None):
     return payloads, errors
 
 
-def create_child_with_health(guardian_user, payload):
+def _child_from_payload(payload) -> Child:
     cpf_value, birth_cert_value = _split_identity_document(payload.get('identity_document', ''))
-    child = Child.objects.create(
+    child = Child(
         name=payload['name'],
         birth_date=payload['birth_date'],
         gender=payload['gender'],
@@ -143,12 +170,13 @@ def create_child_with_health(guardian_user, payload):
         mother_phone=payload.get('mother_phone', '') if not payload.get('mother_absent') else '',
         mother_absent=payload.get('mother_absent', False),
     )
-    GuardianChild.objects.create(
-        guardian_user=guardian_user,
-        child=child,
-        relationship='Responsável',
-    )
-    ChildHealth.objects.create(
+    # bulk_create não passa pelo save(), que preenche as colunas de busca
+    child.fill_search_fields()
+    return child
+
+
+def _health_from_payload(child: Child, payload) -> ChildHealth:
+    return ChildHealth(
         child=child,
         allergies=payload['allergies'],
         medications=payload['meds'],
@@ -161,7 +189,41 @@ def create_child_with_health(guardian_user, payload):
         auth_medical=payload['auth_medical'],
         auth_rules=payload['auth_rules'],
     )
-    face_file = payload.get('face_file')
-    if face_file:
-        ChildFace.objects.create(child=child, image=face_file)
-    return child
+
+
+def refresh_after_bulk_children(child_ids, guardian_ids=()) -> None:
+    """O que os signals de Child e GuardianChild fariam em saves individuais (bulk_create não os dispara)."""
+    from accounts.models import User
+    from accounts.signals import bump_auth_version
+    from core.kpis import invalidate_kpis
+    from core.search import index_objects
+    from documents.utils import invalidate_compliance_matrix
+
+    index_objects(Child, child_ids)
+    bump_auth_version(User.objects.filter(pk__in=list(guardian_ids)))
+    invalidate_compliance_matrix()
+    invalidate_kpis('finance', 'documents')
+
+
+@transaction.atomic
+def create_children_with_health(guardian_user, payloads) -> list[Child]:
+    """
+    Cadastra os aventureiros do formulário com um bulk_create por tabela (Child, vínculo,
+    ficha de saúde). As fotos 3x4 continuam com create() individual: o upload e os signals
+    de ChildFace (processamento da foto e índice de rostos) dependem do save().
+    As mensalidades ficam com o chamador (finance.signals.schedule_fee_generation).
+    """
+    children = Child.objects.bulk_create([_child_from_payload(payload) for payload in payloads])
+    GuardianChild.objects.bulk_create(
+        [GuardianChild(guardian_user=guardian_user, child=child, relationship='Responsável') for child in children]
+    )
+    ChildHealth.objects.bulk_create(
+        [_health_from_payload(child, payload) for child, payload in zip(children, payloads)]
+    )
+    for child, payload in zip(children, payloads):
+        face_file = payload.get('face_file')
+        if face_file:
+            ChildFace.objects.create(child=child, image=face_file)
+    child_ids = [child.pk for child in children]
+    transaction.on_commit(lambda: refresh_after_bulk_children(child_ids, [guardian_user.pk]))
+    return children
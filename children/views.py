@@ -6,10 +6,11 @@ from django.shortcuts import get_object_or_404, redirect, render
 from accounts.models import User
 from core.permissions import role_required
 from core.utils import redirect_for_role
+from finance.signals import schedule_fee_generation
 
 from .forms import ChildForm, GuardianChildForm
 from .models import Child, GuardianChild
-from .utils import collect_children_payload, create_child_with_health
+from .utils import collect_children_payload, create_children_with_health
 
 UserModel = get_user_model()
 
@@ -113,8 +114,8 @@ def add_aventureiro(request):
             for err in errors:
                 messages.error(request, err)
         else:
-            for payload in children_payload:
-                create_child_with_health(request.user, payload)
+            children = create_children_with_health(request.user, children_payload)
+            schedule_fee_generation(child.pk for child in children)
             messages.success(request, 'Aventureiro cadastrado com sucesso.')
             return redirect('children-meus')
     return render(request, 'children/add_for_responsavel.html', {'title': 'Adicionar aventureiro'})
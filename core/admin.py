@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ReportSnapshot
+
+
+@admin.register(ReportSnapshot)
+class ReportSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('date', 'active_children', 'fees_collected', 'attendance_marked', 'created_at')
+    date_hierarchy = 'date'
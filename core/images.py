@@ -0,0 +1,111 @@
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+# Um ano: nomes derivados do conteúdo nunca mudam, então o navegador pode guardar para sempre.
+FAR_FUTURE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def content_hash(fileobj, length: int | None = None) -> str:
+    """SHA-256 do arquivo lido em blocos (não carrega o upload inteiro na memória)."""
+    digest = hashlib.sha256()
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    if hasattr(fileobj, 'chunks'):
+        for chunk in fileobj.chunks():
+            digest.update(chunk)
+    else:
+        for chunk in iter(lambda: fileobj.read(64 * 1024), b''):
+            digest.update(chunk)
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    value = digest.hexdigest()
+    return value[:length] if length else value
+
+
+def output_format() -> tuple[str, str]:
+    """WebP quando o Pillow foi compilado com suporte, senão JPEG."""
+    if features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def open_image(fileobj) -> Image.Image:
+    """Abre a imagem já com a orientação EXIF aplicada e em RGB."""
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    image = Image.open(fileobj)
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+            rgba = image.convert('RGBA')
+            background.paste(rgba, mask=rgba.split()[-1])
+        else:
+            background.paste(image.convert('RGB'))
+        image = background
+    return image.convert('RGB')
+
+
+def encode_image(image: Image.Image, fmt: str, quality: int = 80) -> bytes:
+    """Serializa sem metadados (EXIF/ICC não são repassados ao salvar)."""
+    buffer = BytesIO()
+    options = {'quality': quality}
+    if fmt == 'JPEG':
+        options.update(optimize=True, progressive=True)
+    elif fmt == 'WEBP':
+        options.update(method=4)
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def resized_copy(image: Image.Image, max_size: tuple[int, int]) -> Image.Image:
+    copy = image.copy()
+    copy.thumbnail(max_size, Image.Resampling.LANCZOS)
+    return copy
+
+
+def save_once(name: str, data: bytes) -> str:
+    """Grava o arquivo somente se ainda não existir (nomes por hash são idempotentes)."""
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, ContentFile(data))
+
+
+def build_variants(
+    fileobj,
+    prefix: str,
+    sizes: dict[str, tuple[int, int]],
+    quality: int = 80,
+    image: Image.Image | None = None,
+) -> dict[str, str]:
+    """
+    Gera uma versão redimensionada e recomprimida para cada tamanho pedido, com nome
+    `<prefix>/<hash>-<tamanho>.<ext>`. Retorna {tamanho: nome no storage}.
+    `image` permite passar a imagem já tratada (ex.: recortada); o hash continua sendo do arquivo.
+    """
+    digest = content_hash(fileobj, length=20)
+    fmt, ext = output_format()
+    if image is None:
+        image = open_image(fileobj)
+    names = {}
+    for label, max_size in sizes.items():
+        data = encode_image(resized_copy(image, max_size), fmt, quality)
+        names[label] = save_once(f'{prefix}/{digest}-{label}.{ext}', data)
+    return names
+
+
+def crop_to_ratio(image: Image.Image, ratio_w: int, ratio_h: int) -> Image.Image:
+    """Recorte central na proporção pedida (ex.: 3x4), levemente puxado para cima onde fica o rosto."""
+    width, height = image.size
+    target = ratio_w / ratio_h
+    if width / height > target:
+        new_width = round(height * target)
+        left = (width - new_width) // 2
+        return image.crop((left, 0, left + new_width, height))
+    new_height = round(width / target)
+    top = max(0, min(height - new_height, (height - new_height) // 3))
+    return image.crop((0, top, width, top + new_height))
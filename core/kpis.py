@@ -0,0 +1,112 @@
+"""
+Indicadores dos painéis por função.
+
+Cada grupo de indicadores é calculado com uma ou duas consultas agregadas e fica no cache
+por KPI_CACHE_TTL segundos. Os signals em core/signals.py apagam o grupo afetado quando
+mensalidades, pedidos, produtos, sessões ou documentos mudam; o TTL curto cobre o que
+muda sem signal (ex.: UPDATE em massa). A data entra na chave porque "atrasado" e
+"hoje" mudam na virada do dia.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+KPI_CACHE_TTL = 60
+
+
+def _key(group: str) -> str:
+    return f'core:kpi:{group}:{date.today().isoformat()}'
+
+
+def invalidate_kpis(*groups: str) -> None:
+    cache.delete_many([_key(group) for group in groups])
+
+
+def _finance() -> dict:
+    from finance.models import Fee
+
+    today = date.today()
+    overdue = Q(status=Fee.Status.ATRASADO) | Q(status=Fee.Status.PENDENTE, due_date__lt=today)
+    totals = Fee.objects.aggregate(
+        overdue_count=Count('id', filter=overdue),
+        overdue_total=Sum('final_amount', filter=overdue),
+        open_count=Count('id', filter=Q(status=Fee.Status.PENDENTE, due_date__gte=today)),
+    )
+    totals['overdue_total'] = totals['overdue_total'] or Decimal('0.00')
+    return totals
+
+
+def _store() -> dict:
+    from store.models import Order, Product
+
+    totals = Order.objects.aggregate(
+        unpaid_orders=Count('id', filter=Q(status=Order.Status.PENDING)),
+        unpaid_total=Sum('total', filter=Q(status=Order.Status.PENDING)),
+    )
+    totals['unpaid_total'] = totals['unpaid_total'] or Decimal('0.00')
+    totals['low_stock'] = list(
+        Product.objects.filter(active=True, stock__lte=settings.STORE_LOW_STOCK_THRESHOLD)
+        .order_by('stock', 'name')
+        .values('id', 'name', 'stock')[:10]
+    )
+    return totals
+
+
+def _attendance() -> dict:
+    from attendance.models import AttendanceSession
+
+    sessions = list(
+        AttendanceSession.objects.filter(date=date.today())
+        .annotate(present=Count('records', filter=Q(records__present=True)))
+        .order_by('class_group')
+        .values('id', 'type', 'class_group', 'present')
+    )
+    return {'today_sessions': sessions}
+
+
+def _documents() -> dict:
+    from documents.models import ChildDocument
+    from documents.utils import build_compliance_matrix
+
+    # A matriz já fica em cache e conta também os documentos nunca cadastrados (PENDENTE)
+    totals = build_compliance_matrix()['totals']
+    pending = sum(totals.get(status, 0) for status in (
+        ChildDocument.Status.PENDENTE, ChildDocument.Status.VENCIDO, ChildDocument.Status.REJEITADO
+    ))
+    return {'pending_documents': pending, 'expired_documents': totals.get(ChildDocument.Status.VENCIDO, 0)}
+
+
+GROUPS = {
+    'finance': _finance,
+    'store': _store,
+    'attendance': _attendance,
+    'documents': _documents,
+}
+
+ROLE_GROUPS = {
+    'DIRETORIA': ('finance', 'store', 'attendance', 'documents'),
+    'SECRETARIA': ('attendance', 'documents'),
+    'TESOUREIRO': ('finance', 'store'),
+    'PROFESSOR': ('attendance',),
+}
+
+
+def get_kpis(*groups: str) -> dict:
+    """Junta os grupos pedidos, buscando tudo do cache de uma vez e calculando só o que faltar."""
+    keys = {group: _key(group) for group in groups}
+    cached = cache.get_many(keys.values())
+    result = {}
+    for group, key in keys.items():
+        values = cached.get(key)
+        if values is None:
+            values = GROUPS[group]()
+            cache.set(key, values, KPI_CACHE_TTL)
+        result.update(values)
+    return result
+
+
+def kpis_for_role(role: str) -> dict:
+    return get_kpis(*ROLE_GROUPS.get(role, ()))
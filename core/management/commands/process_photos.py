@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from accounts.models import User
+from children.models import ChildFace
+from core.portraits import PROCESSED_MARKER, process_portrait
+
+
+class Command(BaseCommand):
+    help = "Processa (3x4, EXIF, versões comprimidas) as fotos de usuários e aventureiros ainda não tratadas"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta as fotos pendentes')
+
+    def handle(self, *args, **options):
+        targets = [
+            (User.objects.exclude(Q(photo='') | Q(photo__isnull=True)).exclude(photo__contains=PROCESSED_MARKER),
+             'photo', 'photo_thumb', 'photo_original'),
+            (ChildFace.objects.exclude(image='').exclude(image__contains=PROCESSED_MARKER),
+             'image', 'thumb', 'original'),
+        ]
+        processed = pending = 0
+        for queryset, field, thumb_field, original_field in targets:
+            pending += queryset.count()
+            if options['dry_run']:
+                continue
+            for instance in queryset.iterator(chunk_size=100):
+                if process_portrait(instance, field, thumb_field, original_field):
+                    processed += 1
+        if options['dry_run']:
+            self.stdout.write(f'{pending} foto(s) pendente(s).')
+            return
+        self.stdout.write(self.style.SUCCESS(f'{processed} de {pending} foto(s) processada(s).'))
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = "Apaga as sessões expiradas do banco em lotes curtos (segura o lock do SQLite por pouco tempo)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Sessões apagadas por transação')
+        parser.add_argument('--sleep', type=float, default=0.05, help='Pausa entre lotes, em segundos')
+
+    def handle(self, *args, **options):
+        if not settings.SESSION_ENGINE.endswith(('.db', '.cached_db')):
+            self.stdout.write(f'{settings.SESSION_ENGINE} não guarda sessões no banco; nada a apagar.')
+            return
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now).order_by('expire_date')
+        total = 0
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[: options['batch_size']])
+            if not keys:
+                break
+            with transaction.atomic():
+                deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+            total += deleted
+            if len(keys) < options['batch_size']:
+                break
+            time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'{total} sessão(ões) expirada(s) apagada(s).'))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Refaz o índice da busca global (aventureiros, usuários e solicitações de documento)"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total, fts = rebuild_search_index()
+        elapsed = time.perf_counter() - started
+        engine = 'FTS5' if fts else 'busca simples'
+        self.stdout.write(self.style.SUCCESS(f'{total} entrada(s) indexada(s) em {elapsed:.1f}s ({engine}).'))
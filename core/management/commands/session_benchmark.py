@@ -0,0 +1,92 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+
+BENCH_NUMBER = '+5500991000001'
+ENGINES = ('db', 'cached_db', 'signed_cookies')
+MIDDLEWARES = {
+    'padrão': 'django.contrib.sessions.middleware.SessionMiddleware',
+    'sem regravar': 'core.middleware.UnchangedSessionMiddleware',
+}
+
+
+class Command(BaseCommand):
+    help = "Mede tempo e escritas de sessão por request em cada backend de sessão, com e sem o UnchangedSessionMiddleware"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests por combinação')
+        parser.add_argument(
+            '--path',
+            nargs='+',
+            default=[],
+            help='Caminhos a pedir (padrão: painel do responsável, que só lê a sessão, e troca para o mesmo '
+            'perfil, que reatribui o mesmo valor na sessão)',
+        )
+        parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=ENGINES)
+
+    def handle(self, *args, **options):
+        paths = options['path'] or [
+            reverse('dashboard-responsavel'),
+            reverse('switch-role', args=[User.Role.RESPONSAVEL]),
+        ]
+        user, created = User.objects.get_or_create(
+            whatsapp_number=BENCH_NUMBER, defaults={'first_name': 'Benchmark', 'role': User.Role.RESPONSAVEL}
+        )
+        session_middleware = next(m for m in settings.MIDDLEWARE if m in MIDDLEWARES.values())
+        self.session_keys = []
+        self.stdout.write(f'{options["requests"]} requests por combinação')
+        try:
+            for path in paths:
+                self.stdout.write(f'\n{path}')
+                self.stdout.write(
+                    f'{"backend":<16}{"middleware":<14}{"ms/req":>8}{"p95 ms":>8}{"gravações":>11}{"consultas/req":>15}'
+                )
+                for engine in options['engines']:
+                    for label, middleware_path in MIDDLEWARES.items():
+                        middleware = [middleware_path if m == session_middleware else m for m in settings.MIDDLEWARE]
+                        with override_settings(
+                            SESSION_ENGINE=f'django.contrib.sessions.backends.{engine}',
+                            MIDDLEWARE=middleware,
+                            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                        ):
+                            row = self._run(user, path, options['requests'])
+                        self.stdout.write(
+                            f'{engine:<16}{label:<14}{row["mean"]:>8.2f}{row["p95"]:>8.2f}'
+                            f'{row["writes"]:>11}{row["queries"]:>15.1f}'
+                        )
+        finally:
+            Session.objects.filter(session_key__in=self.session_keys).delete()
+            if created:  # usuário que já existia antes da medição fica
+                user.delete()
+
+    def _run(self, user, path, total):
+        client = Client()
+        client.force_login(user)
+        client.get(path)  # aquece: perfis da sessão, templates, cache
+        timings, writes, queries = [], 0, 0
+        for _ in range(total):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                client.get(path)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries += len(captured)
+            writes += sum(
+                1 for q in captured if 'django_session' in q['sql'] and q['sql'].lstrip().startswith(('INSERT', 'UPDATE'))
+            )
+        self.session_keys.append(client.cookies[settings.SESSION_COOKIE_NAME].value)
+        timings.sort()
+        return {
+            'mean': statistics.mean(timings),
+            'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+            'writes': writes,
+            'queries': queries / total,
+        }
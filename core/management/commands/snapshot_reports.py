@@ -0,0 +1,27 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.reports import build_report_snapshot
+
+
+class Command(BaseCommand):
+    help = "Grava o retrato diário dos números do clube usado no relatório da diretoria (rodar 1x por dia)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Data do retrato AAAA-MM-DD (padrão: hoje)')
+
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            try:
+                day = datetime.date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('Data inválida; use AAAA-MM-DD.')
+        snapshot = build_report_snapshot(day)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{snapshot}: {snapshot.active_children} aventureiro(s) ativo(s), '
+                f'R$ {snapshot.fees_collected} recebidos, {snapshot.attendance_marked} registro(s) de presença.'
+            )
+        )
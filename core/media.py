@@ -0,0 +1,123 @@
+"""
+Entrega de arquivos sensíveis (documentos, fotos das crianças e fotos 3x4).
+
+O Django só confere a permissão; os bytes são enviados pelo servidor web na frente
+(nginx com X-Accel-Redirect ou Apache/lighttpd com X-Sendfile). Em desenvolvimento,
+sem servidor na frente, cai no FileResponse.
+
+Configuração (settings / variáveis de ambiente):
+    PROTECTED_MEDIA_BACKEND = 'django' | 'nginx' | 'sendfile'
+    PROTECTED_MEDIA_INTERNAL_URL = '/protected-media/'   # location `internal` do nginx
+
+Exemplo nginx (a pasta media/ não deve ser exposta diretamente):
+    location /protected-media/ { internal; alias /srv/aventureiros/media/; }
+"""
+import mimetypes
+import posixpath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+
+from accounts.models import User
+from children.models import ChildFace, GuardianChild
+
+from .images import FAR_FUTURE_MAX_AGE
+from .utils import get_available_roles
+
+DOCUMENT_ROLES = {User.Role.SECRETARIA, User.Role.DIRETORIA, User.Role.ADM}
+FACE_ROLES = DOCUMENT_ROLES | {User.Role.PROFESSOR}
+PHOTO_ROLES = DOCUMENT_ROLES
+
+
+def _is_guardian(user, child_id) -> bool:
+    return GuardianChild.objects.filter(guardian_user=user, child_id=child_id).exists()
+
+
+def _document_allowed(user, roles, name):
+    from documents.models import DocumentFile
+
+    # Um mesmo blob pode estar anexado a várias crianças; basta uma acessível.
+    files = DocumentFile.objects.filter(Q(file=name) | Q(blob__preview=name))
+    child_ids = set(files.values_list('child_document__child_id', flat=True))
+    if not child_ids:
+        return None
+    if roles & DOCUMENT_ROLES:
+        return True
+    return User.Role.RESPONSAVEL in roles and GuardianChild.objects.filter(
+        guardian_user=user, child_id__in=child_ids
+    ).exists()
+
+
+def _face_allowed(user, roles, name):
+    face = ChildFace.objects.filter(Q(image=name) | Q(thumb=name) | Q(original=name)).only('child_id').first()
+    if face is None:
+        return None
+    return bool(roles & FACE_ROLES) or (User.Role.RESPONSAVEL in roles and _is_guardian(user, face.child_id))
+
+
+def _photo_allowed(user, roles, name):
+    owner_id = (
+        User.objects.filter(Q(photo=name) | Q(photo_thumb=name) | Q(photo_original=name))
+        .values_list('pk', flat=True)
+        .first()
+    )
+    if owner_id is None:
+        return None
+    return owner_id == user.pk or bool(roles & PHOTO_ROLES)
+
+
+# Prefixo do caminho no storage -> verificação (None = não existe, False = sem acesso)
+PROTECTED_PREFIXES = {
+    'documents/': _document_allowed,
+    'child_faces/': _face_allowed,
+    'user_photos/': _photo_allowed,
+}
+
+# Arquivos com nome derivado do hash do conteúdo (documentos deduplicados e suas miniaturas)
+IMMUTABLE_PREFIXES = ('documents/sha256/',)
+
+
+def check_access(user, name: str, roles=None) -> bool | None:
+    """
+    True/False conforme a permissão; None se nenhum registro aponta para o arquivo.
+    Caminhos fora dos prefixos protegidos levantam Http404.
+    """
+    normalized = posixpath.normpath(name)
+    if normalized != name or name.startswith(('/', '..')):
+        raise Http404
+    check = next((fn for prefix, fn in PROTECTED_PREFIXES.items() if name.startswith(prefix)), None)
+    if check is None:
+        raise Http404
+    return check(user, set(get_available_roles(user) if roles is None else roles), name)
+
+
+def send_protected_file(name: str, download_name: str | None = None, immutable: bool = False) -> HttpResponse:
+    """
+    Monta a resposta que faz o servidor web entregar o arquivo (ou o próprio Django, em dev).
+    `immutable` é para nomes derivados do conteúdo: o navegador guarda por um ano sem revalidar.
+    """
+    backend = getattr(settings, 'PROTECTED_MEDIA_BACKEND', 'django')
+    content_type = mimetypes.guess_type(download_name or name)[0] or 'application/octet-stream'
+    if backend == 'nginx':
+        internal = getattr(settings, 'PROTECTED_MEDIA_INTERNAL_URL', '/protected-media/')
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(internal.rstrip('/') + '/' + name)
+    elif backend == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = default_storage.path(name)
+    else:
+        if not default_storage.exists(name):
+            raise Http404
+        response = FileResponse(default_storage.open(name, 'rb'), content_type=content_type)
+    if download_name:
+        response['Content-Disposition'] = f"inline; filename*=UTF-8''{quote(download_name)}"
+    if immutable:
+        patch_cache_control(response, private=True, max_age=FAR_FUTURE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, private=True, max_age=3600)
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
@@ -0,0 +1,40 @@
+import copy
+
+from django.contrib.sessions.middleware import SessionMiddleware
+
+
+class UnchangedSessionMiddleware(SessionMiddleware):
+    """
+    SessionMiddleware que não grava a sessão quando o conteúdo terminou igual ao do início.
+
+    O Django marca a sessão como modificada em qualquer atribuição, mesmo com o mesmo valor
+    (ex.: `request.session['active_role'] = role` a cada request). Aqui a sessão de quem
+    chega com cookie é lida no início e comparada no fim; sem diferença, não há escrita no
+    banco/cache nem Set-Cookie. Quem já tem cookie teria a sessão lida de qualquer forma pelo
+    AuthenticationMiddleware, então a leitura antecipada não custa uma consulta a mais.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request._session_snapshot = None
+        session = request.session
+        if session.session_key:
+            # Cópia profunda: listas/dicts alterados no lugar também contam como mudança
+            data = copy.deepcopy(dict(session.items()))
+            # Lida a sessão, a chave some se o cookie apontava para uma sessão expirada/inexistente
+            if session.session_key:
+                request._session_snapshot = (session.session_key, data)
+
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        snapshot = getattr(request, '_session_snapshot', None)
+        if (
+            session is not None
+            and snapshot is not None
+            and session.modified
+            # cycle_key (login) troca a chave mesmo sem mudar os dados: precisa gravar
+            and session.session_key == snapshot[0]
+            and dict(session.items()) == snapshot[1]
+        ):
+            session.modified = False
+        return super().process_response(request, response)
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Data')),
+                ('users_count', models.PositiveIntegerField(default=0, verbose_name='Usuários')),
+                ('children_count', models.PositiveIntegerField(default=0, verbose_name='Aventureiros')),
+                ('active_children', models.PositiveIntegerField(default=0, verbose_name='Aventureiros ativos')),
+                ('points_total', models.IntegerField(default=0, verbose_name='Pontos acumulados')),
+                ('sessions_count', models.PositiveIntegerField(default=0, verbose_name='Sessões de presença')),
+                ('attendance_marked', models.PositiveIntegerField(default=0, verbose_name='Registros de presença')),
+                ('attendance_present', models.PositiveIntegerField(default=0, verbose_name='Presenças')),
+                ('fees_collected', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Mensalidades recebidas')),
+                ('fees_final_total', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Mensalidades (valor final)')),
+                ('breakdown', models.JSONField(default=dict, verbose_name='Detalhamento')),
+                ('created_at', models.DateTimeField(auto_now=True, verbose_name='Gerado em')),
+            ],
+            options={
+                'verbose_name': 'Retrato de Relatório',
+                'verbose_name_plural': 'Retratos de Relatório',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+def create_fts_index(apps, schema_editor):
+    from core.search import create_fts_index
+
+    create_fts_index(schema_editor)
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for trigger in ('core_searchentry_ai', 'core_searchentry_ad', 'core_searchentry_au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        schema_editor.execute('DROP TABLE IF EXISTS core_search_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('child', 'Aventureiro'), ('user', 'Usuário'), ('request', 'Solicitação de documento')], max_length=10, verbose_name='Tipo')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID do registro')),
+                ('title', models.CharField(max_length=255, verbose_name='Título')),
+                ('subtitle', models.CharField(blank=True, max_length=255, verbose_name='Detalhe')),
+                ('url', models.CharField(blank=True, max_length=255, verbose_name='Endereço')),
+                ('content', models.TextField(blank=True, verbose_name='Conteúdo')),
+            ],
+            options={
+                'verbose_name': 'Entrada de Busca',
+                'verbose_name_plural': 'Entradas de Busca',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_entry')],
+            },
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -1,3 +1,62 @@
 from django.db import models
 
-# Create your models here.
+
+class ReportSnapshot(models.Model):
+    """Fotografia diária dos números do clube, gerada pelo comando snapshot_reports."""
+
+    date = models.DateField('Data', unique=True)
+    users_count = models.PositiveIntegerField('Usuários', default=0)
+    children_count = models.PositiveIntegerField('Aventureiros', default=0)
+    active_children = models.PositiveIntegerField('Aventureiros ativos', default=0)
+    points_total = models.IntegerField('Pontos acumulados', default=0)
+    sessions_count = models.PositiveIntegerField('Sessões de presença', default=0)
+    attendance_marked = models.PositiveIntegerField('Registros de presença', default=0)
+    attendance_present = models.PositiveIntegerField('Presenças', default=0)
+    fees_collected = models.DecimalField('Mensalidades recebidas', max_digits=12, decimal_places=2, default=0)
+    fees_final_total = models.DecimalField('Mensalidades (valor final)', max_digits=12, decimal_places=2, default=0)
+    # Quebras por perfil/classe/status e totais brutos, no formato usado pelo template
+    breakdown = models.JSONField('Detalhamento', default=dict)
+    created_at = models.DateTimeField('Gerado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Retrato de Relatório'
+        verbose_name_plural = 'Retratos de Relatório'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f'Relatório {self.date:%d/%m/%Y}'
+
+    @property
+    def attendance_rate(self):
+        if not self.attendance_marked:
+            return None
+        return round(100 * self.attendance_present / self.attendance_marked)
+
+
+class SearchEntry(models.Model):
+    """
+    Uma linha por registro pesquisável (aventureiro, usuário, solicitação de documento).
+    Mantida pelos signals de core/signals.py; no SQLite, triggers espelham a tabela no
+    índice FTS5 `core_search_fts` (core/search.py).
+    """
+
+    class Kind(models.TextChoices):
+        CHILD = 'child', 'Aventureiro'
+        USER = 'user', 'Usuário'
+        REQUEST = 'request', 'Solicitação de documento'
+
+    kind = models.CharField('Tipo', max_length=10, choices=Kind.choices)
+    object_id = models.PositiveIntegerField('ID do registro')
+    title = models.CharField('Título', max_length=255)
+    subtitle = models.CharField('Detalhe', max_length=255, blank=True)
+    url = models.CharField('Endereço', max_length=255, blank=True)
+    # Termos pesquisáveis sem acentos e em minúsculas (nomes, dígitos de CPF e telefones, mensagem)
+    content = models.TextField('Conteúdo', blank=True)
+
+    class Meta:
+        verbose_name = 'Entrada de Busca'
+        verbose_name_plural = 'Entradas de Busca'
+        constraints = [models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_entry')]
+
+    def __str__(self):
+        return f'{self.get_kind_display()}: {self.title}'
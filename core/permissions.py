@@ -5,7 +5,8 @@ from django.shortcuts import redirect, render
 from django.urls import reverse
 
 from accounts.models import User
-from .utils import redirect_for_role, get_available_roles
+from children.models import GuardianChild
+from .utils import redirect_for_role, resolve_session_roles, set_session_value
 
 
 def role_required(allowed_roles: list[str] | tuple[str, ...]):
@@ -22,7 +23,7 @@ def role_required(allowed_roles: list[str] | tuple[str, ...]):
                 login_url = f"{reverse('login')}?next={request.get_full_path()}"
                 return redirect(login_url)
 
-            available = get_available_roles(request.user)
+            available = resolve_session_roles(request)
             active_role = request.session.get('active_role') or getattr(request.user, 'role', None)
             if active_role not in available and available:
                 active_role = available[0]
@@ -31,7 +32,6 @@ def role_required(allowed_roles: list[str] | tuple[str, ...]):
                 match = next((r for r in available if r in allowed_roles), None)
                 if match:
                     active_role = match
-                    request.session['active_role'] = match
                 else:
                     return render(
                         request,
@@ -44,10 +44,37 @@ def role_required(allowed_roles: list[str] | tuple[str, ...]):
                     )
 
             request.user.active_role = active_role
-            request.session['active_role'] = active_role
-            request.session['available_roles'] = available
+            set_session_value(request.session, 'active_role', active_role)
             return view_func(request, *args, **kwargs)
 
         return _wrapped_view
 
     return decorator
+
+
+def accessible_child_ids(request: HttpRequest) -> frozenset[int]:
+    """
+    IDs dos aventureiros vinculados ao usuário, calculados uma vez por sessão.
+    A lista fica na sessão junto com `auth_version`, que os signals de GuardianChild
+    incrementam (children/signals.py); dentro do request vira um frozenset.
+    """
+    cached = getattr(request, '_accessible_child_ids', None)
+    if cached is not None:
+        return cached
+    version = f'{request.user.pk}:{request.user.auth_version}'
+    stored = request.session.get('guardian_children')
+    if not stored or stored.get('version') != version:
+        ids = sorted(GuardianChild.objects.filter(guardian_user=request.user).values_list('child_id', flat=True))
+        stored = {'version': version, 'ids': ids}
+        set_session_value(request.session, 'guardian_children', stored)
+    request._accessible_child_ids = frozenset(stored['ids'])
+    return request._accessible_child_ids
+
+
+def can_access_child(request: HttpRequest, child, staff_roles) -> bool:
+    """Responsável só vê os próprios aventureiros; as demais funções dependem de `staff_roles` da tela."""
+    role = getattr(request.user, 'role', None)
+    if role == User.Role.RESPONSAVEL:
+        child_id = getattr(child, 'pk', child)
+        return child_id in accessible_child_ids(request)
+    return role in staff_roles
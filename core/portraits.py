@@ -0,0 +1,88 @@
+"""
+Fotos de pessoas (User.photo e ChildFace.image): orientação EXIF aplicada, metadados
+removidos, recorte 3x4 e duas versões comprimidas (card e thumb) com nome derivado do
+conteúdo. O original enviado pelo celular só é guardado se KEEP_ORIGINAL_PHOTOS estiver
+ligado; senão é apagado depois que as versões são gravadas.
+
+O processamento roda nos signals de post_save (core/signals.py) quando
+PHOTO_PROCESSING_INLINE está ligado; caso contrário o comando `process_photos`
+processa as fotos pendentes em segundo plano (cron).
+"""
+import logging
+import posixpath
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from PIL import Image, UnidentifiedImageError
+
+from .images import build_variants, crop_to_ratio, open_image
+
+logger = logging.getLogger(__name__)
+
+PORTRAIT_SIZES = {
+    'card': (600, 800),
+    'thumb': (150, 200),
+}
+PORTRAIT_QUALITY = 78
+PROCESSED_MARKER = '-card.'
+
+
+def is_processed(name: str) -> bool:
+    return PROCESSED_MARKER in posixpath.basename(name or '')
+
+
+def process_portrait(instance, field: str, thumb_field: str, original_field: str) -> bool:
+    """
+    Gera card/thumb da foto em `field` e grava os nomes com UPDATE (sem disparar signals de novo).
+    Retorna True se processou.
+    """
+    source = getattr(instance, field)
+    if not source or is_processed(source.name):
+        return False
+    original_name = source.name
+    prefix = posixpath.dirname(original_name) or field
+    try:
+        with default_storage.open(original_name, 'rb') as fh:
+            image = crop_to_ratio(open_image(fh), 3, 4)
+            names = build_variants(fh, prefix, PORTRAIT_SIZES, PORTRAIT_QUALITY, image=image)
+    except (FileNotFoundError, UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        logger.warning('Não foi possível processar a foto %s', original_name, exc_info=True)
+        return False
+
+    model = type(instance)
+    previous = model.objects.filter(pk=instance.pk).values_list(thumb_field, original_field).first() or ('', '')
+    updates = {field: names['card'], thumb_field: names['thumb']}
+    if getattr(settings, 'KEEP_ORIGINAL_PHOTOS', False):
+        updates[original_field] = original_name
+    else:
+        updates[original_field] = ''
+    model.objects.filter(pk=instance.pk).update(**updates)
+    for name, value in updates.items():
+        getattr(instance, name).name = value
+
+    # Versões da foto anterior (troca de foto): o card tem o mesmo nome do thumb, só muda o sufixo.
+    # O original enviado também sai se não for guardado. Tudo só depois do commit: se a
+    # transação voltar atrás, o registro continua apontando para arquivos que ainda existem.
+    old_thumb, old_original = previous
+    stale = {old_thumb, old_original, original_name}
+    if old_thumb:
+        stale.add(posixpath.join(posixpath.dirname(old_thumb), posixpath.basename(old_thumb).replace('-thumb.', '-card.')))
+    stale -= {'', *updates.values()}
+    if stale:
+        fields = (field, thumb_field, original_field)
+        transaction.on_commit(lambda: _delete_unreferenced(model, fields, stale))
+    return True
+
+
+def _delete_unreferenced(model, fields, names) -> None:
+    # Nomes vêm do hash do conteúdo: a mesma foto enviada para outra pessoa reaproveita o arquivo
+    lookup = Q()
+    for field in fields:
+        lookup |= Q(**{f'{field}__in': names})
+    in_use = set()
+    for row in model.objects.filter(lookup).values_list(*fields):
+        in_use.update(row)
+    for name in names - in_use:
+        default_storage.delete(name)
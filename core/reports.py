@@ -0,0 +1,78 @@
+"""Cálculo dos números do relatório da diretoria, gravados uma vez por dia em ReportSnapshot."""
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
+
+from children.models import Child
+
+from .models import ReportSnapshot
+
+TREND_DAYS = 90
+
+
+def build_report_snapshot(day: date | None = None) -> ReportSnapshot:
+    """Recalcula os totais atuais e grava (ou regrava) o retrato do dia."""
+    from attendance.models import AttendanceRecord, AttendanceSession
+    from finance.models import Fee
+    from points.models import PointsLedger
+
+    day = day or date.today()
+    UserModel = get_user_model()
+    users_by_role = list(UserModel.objects.values('role').annotate(total=Count('id')).order_by('role'))
+    children_by_class = list(
+        Child.objects.values('class_group').annotate(total=Count('id')).order_by('class_group')
+    )
+    fee_counts = list(Fee.objects.values('status').annotate(total=Count('id')).order_by('status'))
+    fee_totals = Fee.objects.aggregate(
+        total_amount=Sum('amount'),
+        total_discount=Sum('discount_amount'),
+        total_final=Sum('final_amount'),
+        collected=Sum('final_amount', filter=Q(status=Fee.Status.PAGO)),
+    )
+    attendance = AttendanceRecord.objects.aggregate(marked=Count('id'), present=Count('id', filter=Q(present=True)))
+
+    snapshot, _ = ReportSnapshot.objects.update_or_create(
+        date=day,
+        defaults={
+            'users_count': sum(row['total'] for row in users_by_role),
+            'children_count': sum(row['total'] for row in children_by_class),
+            'active_children': Child.objects.filter(active=True).count(),
+            'points_total': PointsLedger.objects.aggregate(total=Sum('points'))['total'] or 0,
+            'sessions_count': AttendanceSession.objects.count(),
+            'attendance_marked': attendance['marked'],
+            'attendance_present': attendance['present'],
+            'fees_collected': fee_totals['collected'] or Decimal('0.00'),
+            'fees_final_total': fee_totals['total_final'] or Decimal('0.00'),
+            'breakdown': {
+                'users_by_role': users_by_role,
+                'children_by_class': children_by_class,
+                'fee_counts': fee_counts,
+                'fee_totals': {
+                    key: str(fee_totals[key] or Decimal('0.00'))
+                    for key in ('total_amount', 'total_discount', 'total_final')
+                },
+            },
+        },
+    )
+    return snapshot
+
+
+def _bars(snapshots, value) -> list[dict]:
+    values = [value(s) for s in snapshots]
+    peak = max((v for v in values if v is not None), default=0) or 1
+    return [
+        {'date': s.date, 'value': v, 'height': round(100 * (v or 0) / peak)}
+        for s, v in zip(snapshots, values)
+    ]
+
+
+def report_trends(snapshots: list[ReportSnapshot]) -> dict:
+    """Séries (mais antiga primeiro) para os gráficos de barras do relatório."""
+    ordered = list(reversed(snapshots))
+    return {
+        'enrollment': _bars(ordered, lambda s: s.active_children),
+        'collections': _bars(ordered, lambda s: s.fees_collected),
+        'attendance': _bars(ordered, lambda s: s.attendance_rate),
+    }
@@ -0,0 +1,213 @@
+"""
+Busca global (aventureiros, usuários e solicitações de documento).
+
+Cada registro vira uma linha de SearchEntry com o texto já sem acentos e em minúsculas
+(nomes, dígitos de CPF e telefones, mensagem). No SQLite a tabela é espelhada por triggers
+no índice FTS5 `core_search_fts` e a busca é um MATCH por prefixo ordenado pelo bm25, com o
+título pesando mais. Em outros bancos, ou num SQLite sem FTS5, a busca cai num filtro
+`contains` por palavra na mesma tabela.
+
+Os signals de core/signals.py atualizam as linhas após o commit; `manage.py rebuild_search_index`
+refaz tudo (necessário depois de UPDATEs em massa, que não disparam signals).
+"""
+import logging
+import re
+
+from django.db import OperationalError, connection, transaction
+from django.urls import reverse
+
+from accounts.models import User
+from accounts.utils import digits_only, fold_search_text
+from children.models import Child
+from documents.models import DocumentRequest
+
+from .models import SearchEntry
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'core_search_fts'
+# Título pesa 5x o restante do conteúdo no ranking
+FTS_RANK = f'bm25({FTS_TABLE}, 5.0, 1.0)'
+FTS_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content, content='core_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_searchentry_ai AFTER INSERT ON core_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_searchentry_ad AFTER DELETE ON core_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_searchentry_au AFTER UPDATE ON core_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+]
+SEARCH_LIMIT = 20
+
+
+def create_fts_index(schema_editor=None) -> bool:
+    """Cria o índice FTS5 e os triggers (só SQLite). Retorna False se o SQLite não tiver FTS5."""
+    conn = schema_editor.connection if schema_editor else connection
+    if conn.vendor != 'sqlite':
+        return False
+    try:
+        with conn.cursor() as cursor:
+            for statement in FTS_SCHEMA:
+                cursor.execute(statement)
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    except OperationalError:
+        logger.warning('SQLite sem FTS5; a busca global usará o filtro simples')
+        return False
+    return True
+
+
+def _phone_terms(*values) -> list[str]:
+    """Dígitos do telefone com e sem +55 e sem DDD, para achar qualquer forma digitada."""
+    terms = []
+    for value in values:
+        digits = digits_only(value)
+        if not digits:
+            continue
+        terms.append(digits)
+        if digits.startswith('55') and len(digits) > 11:
+            digits = digits[2:]
+            terms.append(digits)
+        if len(digits) > 9:
+            terms.append(digits[2:])
+    return terms
+
+
+def _child_entry(child: Child) -> dict:
+    parents = ' e '.join(name for name in (child.father_name, child.mother_name) if name)
+    terms = [child.name, child.father_name, child.mother_name]
+    terms += [digits_only(cpf) for cpf in (child.cpf, child.father_cpf, child.mother_cpf)]
+    terms += _phone_terms(child.father_phone, child.mother_phone)
+    return {
+        'title': child.name,
+        'subtitle': f'Pais: {parents}' if parents else 'Aventureiro',
+        'url': reverse('child-overview', args=[child.pk]),
+        'content': terms,
+    }
+
+
+def _user_entry(user: User) -> dict:
+    terms = [user.full_name, *_phone_terms(user.whatsapp_number, user.financial_whatsapp, user.financial_phone)]
+    return {
+        'title': user.full_name or user.whatsapp_number,
+        'subtitle': f'{user.get_role_display()} · {user.whatsapp_number}',
+        'url': reverse('user-edit', args=[user.pk]),
+        'content': terms,
+    }
+
+
+def _request_entry(doc_request: DocumentRequest) -> dict:
+    return {
+        'title': f'{doc_request.document_type.name} · {doc_request.child.name}',
+        'subtitle': f'{doc_request.get_status_display()} em {doc_request.sent_at:%d/%m/%Y}',
+        'url': reverse('documents-child', args=[doc_request.child_id]),
+        'content': [doc_request.child.name, doc_request.document_type.name, doc_request.message],
+    }
+
+
+# modelo -> (tipo, montagem da entrada, relações carregadas junto na reindexação)
+SOURCES = {
+    Child: (SearchEntry.Kind.CHILD, _child_entry, ()),
+    User: (SearchEntry.Kind.USER, _user_entry, ()),
+    DocumentRequest: (SearchEntry.Kind.REQUEST, _request_entry, ('child', 'document_type')),
+}
+
+
+def _build_entry(obj) -> SearchEntry:
+    kind, builder, _ = SOURCES[type(obj)]
+    values = builder(obj)
+    content = fold_search_text(' '.join(term for term in [values['title'], *values['content']] if term))
+    return SearchEntry(
+        kind=kind,
+        object_id=obj.pk,
+        title=values['title'][:255],
+        subtitle=values['subtitle'][:255],
+        url=values['url'],
+        content=content,
+    )
+
+
+def index_objects(model, pks) -> None:
+    """Grava (ou troca) as entradas dos registros indicados, com uma consulta por modelo."""
+    kind, _, related = SOURCES[model]
+    pks = list(pks)
+    if not pks:
+        return
+    entries = [_build_entry(obj) for obj in model.objects.filter(pk__in=pks).select_related(*related)]
+    with transaction.atomic():
+        SearchEntry.objects.filter(kind=kind, object_id__in=pks).delete()
+        SearchEntry.objects.bulk_create(entries, batch_size=500)
+
+
+def remove_objects(model, pks) -> None:
+    kind = SOURCES[model][0]
+    SearchEntry.objects.filter(kind=kind, object_id__in=list(pks)).delete()
+
+
+def rebuild_search_index() -> tuple[int, bool]:
+    """
+    Apaga e recria todas as entradas e, no SQLite, reconstrói o FTS5 a partir delas.
+    Retorna (entradas gravadas, se o FTS5 está ativo).
+    """
+    total = 0
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        for model, (_, _, related) in SOURCES.items():
+            batch = []
+            for obj in model.objects.select_related(*related).iterator(chunk_size=500):
+                batch.append(_build_entry(obj))
+                if len(batch) >= 500:
+                    SearchEntry.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            SearchEntry.objects.bulk_create(batch)
+            total += len(batch)
+    return total, create_fts_index()
+
+
+def _query_terms(query: str) -> list[str]:
+    return [term for term in re.sub(r'[^\w\s]', ' ', fold_search_text(query)).split() if term]
+
+
+def _fts_search(terms, kinds, limit):
+    # Cada palavra entre aspas (nada do que foi digitado vira operador) e com * para buscar por prefixo
+    match = ' '.join(f'"{term}"*' for term in terms)
+    kind_placeholders = ', '.join(['%s'] * len(kinds))
+    sql = (
+        f'SELECT e.kind, e.object_id, e.title, e.subtitle, e.url FROM {FTS_TABLE} '
+        f'JOIN core_searchentry e ON e.id = {FTS_TABLE}.rowid '
+        f'WHERE {FTS_TABLE} MATCH %s AND e.kind IN ({kind_placeholders}) '
+        f'ORDER BY {FTS_RANK} LIMIT %s'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *kinds, limit])
+        rows = cursor.fetchall()
+    return [dict(zip(('kind', 'id', 'title', 'subtitle', 'url'), row)) for row in rows]
+
+
+def _fallback_search(terms, kinds, limit):
+    entries = SearchEntry.objects.filter(kind__in=kinds)
+    for term in terms:
+        entries = entries.filter(content__contains=term)
+    rows = entries.order_by('kind', 'title').values_list('kind', 'object_id', 'title', 'subtitle', 'url')[:limit]
+    return [dict(zip(('kind', 'id', 'title', 'subtitle', 'url'), row)) for row in rows]
+
+
+def search(query: str, kinds=None, limit: int = SEARCH_LIMIT) -> list[dict]:
+    """Resultados ordenados por relevância: [{'kind', 'id', 'title', 'subtitle', 'url'}]."""
+    terms = _query_terms(query)
+    kinds = list(kinds or SearchEntry.Kind.values)
+    if not terms or not kinds:
+        return []
+    if connection.vendor == 'sqlite':
+        try:
+            return _fts_search(terms, kinds, limit)
+        except OperationalError:
+            logger.warning('Índice FTS5 indisponível; usando busca simples', exc_info=True)
+    return _fallback_search(terms, kinds, limit)
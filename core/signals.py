@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from attendance.models import AttendanceRecord, AttendanceSession
+from children.models import Child, ChildFace
+from documents.models import ChildDocument, DocumentRequest, DocumentType
+from finance.models import Fee
+from store.models import Order, Product
+
+from .kpis import invalidate_kpis
+from .portraits import process_portrait
+from .search import index_objects, remove_objects
+
+
+def _should_process(field: str, update_fields) -> bool:
+    # Saves parciais que não mexem na foto (ex.: last_login) não precisam nem olhar o arquivo
+    return settings.PHOTO_PROCESSING_INLINE and (not update_fields or field in update_fields)
+
+
+@receiver(post_save, sender=User)
+def process_user_photo(sender, instance: User, update_fields=None, **kwargs):
+    if _should_process('photo', update_fields):
+        process_portrait(instance, 'photo', 'photo_thumb', 'photo_original')
+
+
+@receiver(post_save, sender=ChildFace)
+def process_child_face(sender, instance: ChildFace, update_fields=None, **kwargs):
+    if _should_process('image', update_fields):
+        process_portrait(instance, 'image', 'thumb', 'original')
+
+
+@receiver([post_save, post_delete], sender=Fee)
+def refresh_finance_kpis(sender, **kwargs):
+    invalidate_kpis('finance')
+
+
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=Product)
+def refresh_store_kpis(sender, **kwargs):
+    invalidate_kpis('store')
+
+
+@receiver([post_save, post_delete], sender=AttendanceSession)
+@receiver([post_save, post_delete], sender=AttendanceRecord)
+def refresh_attendance_kpis(sender, **kwargs):
+    invalidate_kpis('attendance')
+
+
+@receiver([post_save, post_delete], sender=ChildDocument)
+@receiver([post_save, post_delete], sender=DocumentType)
+@receiver([post_save, post_delete], sender=Child)
+def refresh_document_kpis(sender, **kwargs):
+    invalidate_kpis('documents')
+
+
+# Campos que aparecem na busca global; saves que só mexem em outros (ex.: last_login) não reindexam
+SEARCH_FIELDS = {
+    Child: {'name', 'father_name', 'mother_name', 'cpf', 'father_cpf', 'mother_cpf', 'father_phone', 'mother_phone'},
+    User: {'first_name', 'last_name', 'role', 'whatsapp_number', 'financial_whatsapp', 'financial_phone'},
+    DocumentRequest: {'status', 'message', 'child', 'document_type'},
+}
+
+
+@receiver(post_save, sender=Child)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=DocumentRequest)
+def index_search_entry(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not SEARCH_FIELDS[sender] & set(update_fields):
+        return
+    transaction.on_commit(lambda: index_objects(sender, [instance.pk]))
+
+
+@receiver(post_delete, sender=Child)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=DocumentRequest)
+def remove_search_entry(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_objects(sender, [pk]))
@@ -1,8 +1,31 @@
+import datetime
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.auth.models import Group
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
 
 from accounts.utils import normalize_whatsapp_number
+from children.models import Child, ChildFace, GuardianChild
+from core.kpis import kpis_for_role
+from core.models import ReportSnapshot, SearchEntry
+from core.permissions import accessible_child_ids
+from core.search import rebuild_search_index
+from core.throttle import throttle_stats
+from finance.models import Fee
 
 
 class NormalizeNumberTests(TestCase):
@@ -33,6 +56,43 @@ class LoginRedirectTests(TestCase):
         self.assertContains(response, 'Número ou senha não conferem', status_code=200)
 
 
+@override_settings(
+    LOGIN_THROTTLE_ENABLED=True,
+    LOGIN_THROTTLE_IP_BURST=4,
+    LOGIN_THROTTLE_IP_PER_MINUTE=1,
+    LOGIN_THROTTLE_NUMBER_BURST=2,
+    LOGIN_THROTTLE_NUMBER_PER_MINUTE=1,
+)
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_user_model().objects.create_user('+5511999999999', 'senha123')
+
+    def _login(self, number, password, ip='10.0.0.1'):
+        return self.client.post(
+            reverse('login'), {'whatsapp_number': number, 'password': password}, REMOTE_ADDR=ip
+        )
+
+    def test_wrong_passwords_lock_the_number_before_hashing(self):
+        self.assertEqual(self._login('11999999999', 'errada').status_code, 200)
+        # Trocar de IP não renova as tentativas contra o mesmo número
+        self.assertEqual(self._login('11999999999', 'errada', ip='10.0.0.2').status_code, 200)
+        with mock.patch('core.views.authenticate') as authenticate:
+            response = self._login('11999999999', 'senha123', ip='10.0.0.3')
+        authenticate.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        # Outro número, do mesmo IP, continua entrando
+        get_user_model().objects.create_user('+5511988888888', 'senha123')
+        self.assertEqual(self._login('11988888888', 'senha123', ip='10.0.0.3').status_code, 302)
+
+    def test_ip_bucket_sheds_bursts_and_counts_rejections(self):
+        statuses = [self._login(f'1198888000{idx}', 'x').status_code for idx in range(6)]
+        self.assertEqual(statuses, [200, 200, 200, 200, 429, 429])
+        stats = throttle_stats()
+        self.assertEqual((stats['attempts'], stats['rejected_ip'], stats['failures']), (6, 2, 4))
+
+
 class RBACDashboardTests(TestCase):
     def setUp(self):
         self.User = get_user_model()
@@ -57,3 +117,323 @@ class RBACDashboardTests(TestCase):
         self.client.force_login(user)
         resp = self.client.get(reverse('dashboard'))
         self.assertRedirects(resp, reverse('dashboard-responsavel'))
+
+
+class UserListSearchTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_user('+5511990000000', 'senha123', role=User.Role.DIRETORIA, first_name='Diretor')
+        User.objects.create_user('+5511988887777', 'senha123', first_name='João', last_name='Araújo')
+        Child.objects.create(name='Maria Conceição', birth_date='2018-01-01')
+        self.client.force_login(self.admin)
+
+    def test_search_ignores_accents_and_matches_surname_and_phone_prefix(self):
+        for query in ('joao', 'ARAUJO', '11 98888', '+55 11 98888'):
+            users = self.client.get(reverse('user-list'), {'q': query}).context['users']
+            self.assertEqual([u.first_name for u in users], ['João'], query)
+        children = self.client.get(reverse('user-list'), {'child': 'conceicao'}).context['children']
+        self.assertEqual([c.name for c in children], ['Maria Conceição'])
+
+    def test_lists_are_paginated_separately(self):
+        User = get_user_model()
+        for idx in range(30):
+            User.objects.create_user(f'+55119700000{idx:02d}', 'senha123', first_name=f'Pai {idx:02d}')
+        response = self.client.get(reverse('user-list'), {'page': 2})
+        self.assertEqual(response.context['users'].number, 2)
+        self.assertEqual(len(response.context['users']), 32 - 25)
+        self.assertEqual(response.context['children'].number, 1)
+
+
+class GlobalSearchTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.secretaria = User.objects.create_user('+5511990000000', 'senha123', role=User.Role.SECRETARIA)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user('+5511988887777', 'senha123', first_name='Paulo', last_name='Souza')
+            self.child = Child.objects.create(
+                name='João Souza', birth_date='2018-01-01', mother_name='Márcia Souza', cpf='123.456.789-09'
+            )
+
+    def _search(self, query, **params):
+        self.client.force_login(self.secretaria)
+        response = self.client.get(reverse('global-search'), {'q': query, **params})
+        return [(r['kind'], r['title']) for r in response.json()['results']]
+
+    def test_accent_insensitive_ranked_and_limited_by_role(self):
+        self.assertEqual(self._search('joao'), [('child', 'João Souza')])
+        self.assertEqual(self._search('marcia sou'), [('child', 'João Souza')])
+        self.assertEqual(self._search('12345678909'), [('child', 'João Souza')])
+        # Secretaria não lista usuários, só aventureiros e solicitações
+        self.assertEqual(self._search('souza'), [('child', 'João Souza')])
+
+    def test_index_follows_saves_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.child.name = 'Joana Souza'
+            self.child.save()
+        self.assertEqual(self._search('joana'), [('child', 'Joana Souza')])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.child.delete()
+        self.assertEqual(self._search('joana'), [])
+        total, _ = rebuild_search_index()
+        self.assertEqual(total, SearchEntry.objects.count())
+
+
+class DashboardKpiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_tesoureiro_sees_live_overdue_fees(self):
+        User = get_user_model()
+        user = User.objects.create_user('+5511990000000', 'senha123', role=User.Role.TESOUREIRO)
+        child = Child.objects.create(name='Ana', birth_date='2018-01-01')
+        self.client.force_login(user)
+        before = self.client.get(reverse('dashboard-tesoureiro')).context['kpis']
+        fee = Fee.objects.create(
+            child=child, reference_month='2020-01', amount=30, final_amount=30, due_date=datetime.date(2020, 1, 10)
+        )
+        kpis = self.client.get(reverse('dashboard-tesoureiro')).context['kpis']
+        self.assertEqual(kpis['overdue_count'], before['overdue_count'] + 1)
+        self.assertEqual(kpis['overdue_total'], before['overdue_total'] + fee.final_amount)
+        with self.assertNumQueries(0):
+            kpis_for_role(User.Role.TESOUREIRO)
+
+
+class DirectorReportSnapshotTests(TestCase):
+    def test_report_reads_latest_snapshot_and_series(self):
+        User = get_user_model()
+        director = User.objects.create_user('+5511990000000', 'senha123', role=User.Role.DIRETORIA)
+        Child.objects.create(name='Ana', birth_date='2018-01-01')
+        call_command('snapshot_reports', '--date', '2026-01-01', stdout=StringIO())
+        Child.objects.create(name='Bia', birth_date='2018-01-01')
+        call_command('snapshot_reports', stdout=StringIO())
+        Child.objects.create(name='Caio', birth_date='2018-01-01')
+
+        self.client.force_login(director)
+        resp = self.client.get(reverse('director-reports'))
+        self.assertEqual(resp.context['children_count'], 2)
+        self.assertEqual([p['value'] for p in resp.context['trends']['enrollment']], [1, 2])
+        self.assertEqual(ReportSnapshot.objects.count(), 2)
+
+    def test_viewing_without_snapshot_does_not_write(self):
+        User = get_user_model()
+        director = User.objects.create_user('+5511990000000', 'senha123', role=User.Role.DIRETORIA)
+        Child.objects.create(name='Ana', birth_date='2018-01-01')
+        self.client.force_login(director)
+        url = reverse('director-reports')
+        self.assertContains(self.client.get(url), 'Ainda não há relatório')
+        self.assertFalse(ReportSnapshot.objects.exists())
+
+        self.assertRedirects(self.client.post(url), url)
+        self.assertEqual(self.client.get(url).context['children_count'], 1)
+        self.assertEqual(ReportSnapshot.objects.count(), 1)
+
+
+class SessionRoleCacheTests(TestCase):
+    def setUp(self):
+        self.User = get_user_model()
+        self.user = self.User.objects.create_user('+5511990000000', 'senha123', role=self.User.Role.PROFESSOR)
+        self.client.force_login(self.user)
+
+    def test_roles_cached_until_groups_change(self):
+        self.client.get(reverse('dashboard-professor'))
+        with mock.patch.object(SessionStore, 'save', autospec=True) as save:
+            self.client.get(reverse('dashboard-professor'))
+        save.assert_not_called()
+
+        self.assertEqual(self.client.get(reverse('dashboard-tesoureiro')).status_code, 403)
+        self.user.groups.add(Group.objects.create(name='Tesoureiro'))
+        self.assertEqual(self.client.get(reverse('dashboard-tesoureiro')).status_code, 200)
+        self.assertIn('TESOUREIRO', self.client.session['available_roles'])
+
+
+class GuardianAccessCacheTests(TestCase):
+    def test_child_access_cached_and_invalidated_by_links(self):
+        User = get_user_model()
+        guardian = User.objects.create_user('+5511911111111', 'senha123')
+        child = Child.objects.create(name='Ana', birth_date='2018-01-01')
+        url = reverse('documents-child', args=[child.id])
+        self.client.force_login(guardian)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        link = GuardianChild.objects.create(guardian_user=guardian, child=child)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        request = RequestFactory().get(url)
+        request.user = User.objects.get(pk=guardian.pk)
+        request.session = self.client.session
+        request.session.items()  # carrega a sessão antes de contar as consultas
+        with self.assertNumQueries(0):
+            self.assertEqual(accessible_child_ids(request), {child.id})
+        link.delete()
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class ProtectedMediaTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media, PHOTO_PROCESSING_INLINE=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        User = get_user_model()
+        self.guardian = User.objects.create_user('+5511911111111', 'senha123')
+        self.stranger = User.objects.create_user('+5511922222222', 'senha123')
+        child = Child.objects.create(name='Ana', birth_date='2018-01-01')
+        GuardianChild.objects.create(guardian_user=self.guardian, child=child)
+        name = default_storage.save('child_faces/ana.jpg', ContentFile(b'jpeg'))
+        ChildFace.objects.create(child=child, image=name)
+        self.url = reverse('protected-media', args=[name])
+
+    def test_only_guardian_gets_face(self):
+        self.client.force_login(self.stranger)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.guardian)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'jpeg')
+
+    def test_nginx_backend_delegates_transfer(self):
+        self.client.force_login(self.guardian)
+        with self.settings(PROTECTED_MEDIA_BACKEND='nginx'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/child_faces/ana.jpg')
+        self.assertEqual(response.content, b'')
+
+
+class PortraitProcessingTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+
+    def _upload(self, color=(180, 140, 120)):
+        buffer = BytesIO()
+        image = Image.new('RGB', (3000, 2000), color)
+        exif = image.getexif()
+        exif[0x0112] = 6  # celular de lado: precisa girar 90°
+        image.save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile('foto.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_user_photo_becomes_3x4_variants(self):
+        with override_settings(MEDIA_ROOT=self.media, PHOTO_PROCESSING_INLINE=True, KEEP_ORIGINAL_PHOTOS=False):
+            with self.captureOnCommitCallbacks(execute=True):
+                user = get_user_model().objects.create_user('+5511911111111', 'senha123', photo=self._upload())
+            user.refresh_from_db()
+            self.assertIn('-card.', user.photo.name)
+            with Image.open(user.photo.path) as card:
+                self.assertEqual(card.size, (600, 800))
+                self.assertNotIn(0x0112, card.getexif())
+            with Image.open(user.photo_thumb.path) as thumb:
+                self.assertEqual(thumb.size, (150, 200))
+            self.assertFalse(user.photo_original)
+            self.assertEqual(len(os.listdir(os.path.join(self.media, 'user_photos'))), 2)
+
+    def test_new_photo_deletes_previous_variants(self):
+        with override_settings(MEDIA_ROOT=self.media, PHOTO_PROCESSING_INLINE=True, KEEP_ORIGINAL_PHOTOS=True):
+            user = get_user_model().objects.create_user('+5511911111111', 'senha123', photo=self._upload())
+            user.refresh_from_db()
+            old_names = {user.photo.name, user.photo_thumb.name, user.photo_original.name}
+            user.photo = self._upload(color=(90, 60, 40))
+            with self.captureOnCommitCallbacks(execute=True):
+                user.save()
+            user.refresh_from_db()
+            for name in old_names:
+                self.assertFalse(default_storage.exists(name), name)
+            for name in (user.photo.name, user.photo_thumb.name, user.photo_original.name):
+                self.assertTrue(default_storage.exists(name), name)
+            self.assertEqual(len(os.listdir(os.path.join(self.media, 'user_photos'))), 3)
+
+    def test_original_survives_rollback(self):
+        with override_settings(MEDIA_ROOT=self.media, PHOTO_PROCESSING_INLINE=True, KEEP_ORIGINAL_PHOTOS=False):
+            with self.captureOnCommitCallbacks(execute=False):
+                get_user_model().objects.create_user('+5511911111111', 'senha123', photo=self._upload())
+            # Sem commit o original enviado continua no disco, ao lado das versões novas
+            self.assertEqual(len(os.listdir(os.path.join(self.media, 'user_photos'))), 3)
+
+
+class SignupTransactionTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+
+    def _photo(self):
+        buffer = BytesIO()
+        Image.new('RGB', (300, 400), (180, 140, 120)).save(buffer, 'JPEG')
+        return SimpleUploadedFile('foto.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_signup_creates_family_and_fees_after_commit(self):
+        data = {
+            'signup_type': 'responsavel',
+            'resp_name': 'Carla',
+            'resp_whatsapp': '11988887777',
+            'resp_cpf': '12345678909',
+            'resp_password': 'senha123',
+            'resp_password_confirm': 'senha123',
+            'child_name': ['Lucas', 'Júlia'],
+            'child_last': ['Lima', 'Lima'],
+            'child_birth': ['2018-03-01', '2017-07-05'],
+            'child_gender': ['M', 'F'],
+            'child_identity': ['12345678909', 'Certidão 123'],
+            'child_plan': ['SUS', 'SUS'],
+            'child_emerg': ['Avó', 'Avó'],
+            'child_emerg_phone': ['11977776666', '11977776666'],
+            'child_photo_0': self._photo(),
+            'child_photo_1': self._photo(),
+        }
+        with override_settings(MEDIA_ROOT=self.media):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('signup'), data)
+            self.assertRedirects(response, reverse('login'))
+        guardian = get_user_model().objects.get(whatsapp_number='+5511988887777')
+        children = Child.objects.filter(guardian_links__guardian_user=guardian)
+        self.assertEqual(children.count(), 2)
+        self.assertEqual(ChildFace.objects.filter(child__in=children).count(), 2)
+        self.assertEqual(children.filter(health__emergency_contact='Avó').count(), 2)
+        # As mensalidades saem no próprio request, após o commit
+        months = 13 - datetime.date.today().month
+        self.assertEqual(Fee.objects.filter(child__in=children).count(), 2 * months)
+
+        # Recuperação pelo cron: só cadastros recentes; mensalidades apagadas de um antigo não voltam
+        Fee.objects.filter(child__in=children).delete()
+        old, recent = children.order_by('pk')
+        Child.objects.filter(pk=old.pk).update(created_at=timezone.now() - datetime.timedelta(days=30))
+        call_command('generate_missing_fees', stdout=StringIO())
+        self.assertFalse(Fee.objects.filter(child=old).exists())
+        self.assertEqual(Fee.objects.filter(child=recent).count(), months)
+        # Cadastro anterior à coluna created_at (sem data) também é atendido
+        Child.objects.filter(pk=old.pk).update(created_at=None)
+        call_command('generate_missing_fees', stdout=StringIO())
+        self.assertEqual(Fee.objects.filter(child=old).count(), months)
+
+
+class SessionWriteTests(TestCase):
+    def test_reassigning_same_values_does_not_save_session(self):
+        user = get_user_model().objects.create_user('+5511990000000', 'senha123', role='PROFESSOR')
+        self.client.force_login(user)
+        self.client.get(reverse('switch-role', args=['PROFESSOR']))
+        with mock.patch.object(SessionStore, 'save', autospec=True) as save:
+            self.client.get(reverse('switch-role', args=['PROFESSOR']))
+        save.assert_not_called()
+        # Login troca a chave da sessão: essa gravação continua acontecendo
+        response = self.client.post(reverse('login'), {'whatsapp_number': '11990000000', 'password': 'senha123'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_purge_sessions_deletes_only_expired_in_batches(self):
+        from django.contrib.sessions.models import Session
+        from django.utils import timezone
+
+        yesterday = timezone.now() - datetime.timedelta(days=1)
+        expired = [Session(session_key=f'old{idx:05d}', session_data='', expire_date=yesterday) for idx in range(25)]
+        current = Session(session_key='current', session_data='', expire_date=yesterday + datetime.timedelta(days=2))
+        Session.objects.bulk_create([*expired, current])
+        out = StringIO()
+        call_command('purge_sessions', batch_size=10, sleep=0, stdout=out)
+        self.assertIn('25 sessão', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['current'])
+
+    def test_session_benchmark_keeps_existing_bench_user(self):
+        from core.management.commands.session_benchmark import BENCH_NUMBER
+
+        User = get_user_model()
+        call_command('session_benchmark', requests=1, engines=['db'], stdout=StringIO())
+        self.assertFalse(User.objects.filter(whatsapp_number=BENCH_NUMBER).exists())
+        User.objects.create_user(BENCH_NUMBER, 'senha123', role=User.Role.RESPONSAVEL)
+        call_command('session_benchmark', requests=1, engines=['db'], stdout=StringIO())
+        self.assertTrue(User.objects.filter(whatsapp_number=BENCH_NUMBER).exists())
@@ -0,0 +1,67 @@
+"""
+Limite de tentativas de login (token bucket no cache), conferido antes do hash da senha.
+
+Cada IP e cada número de WhatsApp têm um balde com LOGIN_THROTTLE_*_BURST fichas que se
+recompõem a LOGIN_THROTTLE_*_PER_MINUTE por minuto. O balde do IP gasta uma ficha por POST;
+o do número só nas senhas erradas, para o dono da conta não se bloquear entrando várias vezes.
+O balde do número vale para todos os IPs (trocar de IP não dá novas tentativas contra a
+mesma conta); a capacidade dele é folgada para que erros alheios não travem o dono de cara.
+Sem ficha, o login é recusado com 429 sem chamar authenticate (o PBKDF2 é a parte cara).
+
+O estado fica no cache padrão (CACHE_BACKEND): com vários processos, use um cache compartilhado
+(Redis/Memcached/banco); o LocMem conta por processo. Leitura e gravação não são atômicas:
+sob concorrência o limite pode passar por poucas tentativas, o que basta para cortar rajadas.
+"""
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+
+STATS = ('attempts', 'rejected_ip', 'rejected_number', 'failures')
+STATS_TTL = 60 * 60 * 24 * 2
+
+
+def client_ip(request) -> str:
+    # Atrás do nginx, LOGIN_THROTTLE_IP_HEADER = 'HTTP_X_REAL_IP' (cabeçalho definido pelo proxy)
+    return request.META.get(settings.LOGIN_THROTTLE_IP_HEADER) or request.META.get('REMOTE_ADDR', '')
+
+
+def _bucket(kind: str) -> tuple[int, float]:
+    burst = getattr(settings, f'LOGIN_THROTTLE_{kind}_BURST')
+    per_minute = getattr(settings, f'LOGIN_THROTTLE_{kind}_PER_MINUTE')
+    return burst, per_minute / 60
+
+
+def take_token(kind: str, ident: str, consume: bool = True) -> float:
+    """
+    Gasta (ou só confere, com consume=False) uma ficha do balde. Retorna 0 se havia ficha,
+    senão quantos segundos faltam para a próxima.
+    """
+    capacity, rate = _bucket(kind)
+    key = f'core:throttle:{kind.lower()}:{ident}'
+    now = time.time()
+    tokens, stamp = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - stamp) * rate)
+    if tokens < 1:
+        return (1 - tokens) / rate
+    if consume:
+        # Expira quando o balde estaria cheio de novo: sem chave = balde cheio
+        cache.set(key, (tokens - 1, now), int(capacity / rate) + 1)
+    return 0
+
+
+def count(stat: str) -> None:
+    key = f'core:throttle:stats:{date.today().isoformat()}:{stat}'
+    cache.add(key, 0, STATS_TTL)
+    try:
+        cache.incr(key)
+    except ValueError:  # expirou entre o add e o incr
+        cache.set(key, 1, STATS_TTL)
+
+
+def throttle_stats(day: date | None = None) -> dict:
+    day = day or date.today()
+    keys = {stat: f'core:throttle:stats:{day.isoformat()}:{stat}' for stat in STATS}
+    values = cache.get_many(keys.values())
+    return {stat: values.get(key, 0) for stat, key in keys.items()}
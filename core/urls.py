@@ -21,4 +21,6 @@ urlpatterns = [
     path('sair/', views.logout_view, name='logout'),
     path('trocar-perfil/<str:role>/', views.switch_role, name='switch-role'),
     path('cadastro/', views.signup, name='signup'),
+    path('busca/', views.global_search, name='global-search'),
+    path('media/<path:name>', views.protected_media, name='protected-media'),
 ]
@@ -1,4 +1,7 @@
+from django.http import HttpResponseNotModified, JsonResponse
 from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
 import unicodedata
 
 from accounts.models import User
@@ -56,7 +59,44 @@ def get_available_roles(user: User) -> list[str]:
     return [r for r in roles if r]
 
 
+def set_session_value(session, key: str, value) -> None:
+    """Só grava quando o valor muda: sessão não modificada não é salva no fim do request."""
+    if session.get(key) != value:
+        session[key] = value
+
+
+def resolve_session_roles(request) -> list[str]:
+    """
+    Perfis disponíveis do usuário guardados na sessão junto com `auth_version`.
+    Só recalcula (consultando os grupos) quando role ou grupos mudaram desde a última vez.
+    """
+    user = request.user
+    version = f'{user.pk}:{user.auth_version}'
+    available = request.session.get('available_roles')
+    if available is not None and request.session.get('roles_version') == version:
+        return available
+    available = get_available_roles(user)
+    set_session_value(request.session, 'available_roles', available)
+    set_session_value(request.session, 'roles_version', version)
+    return available
+
+
 def redirect_for_role(user: User):
     role = getattr(user, 'active_role', None) or getattr(user, 'role', None)
     name = ROLE_REDIRECTS.get(role, 'dashboard-responsavel')
     return reverse(name)
+
+
+def conditional_json_response(request, version: str, payload: dict):
+    """
+    Resposta JSON com ETag derivado de `version`. Se o cliente já tem essa versão
+    (If-None-Match), devolve 304 sem corpo. O navegador sempre revalida (no-cache).
+    """
+    etag = quote_etag(version)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(payload)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -1,27 +1,38 @@
 import datetime
+import math
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
-from django.db import models
+from django.core.paginator import Paginator
+from django.db import models, transaction
 import json
 
+from django.http import Http404, JsonResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.views.decorators.http import require_POST
 
-from accounts.utils import normalize_whatsapp_number
+from accounts.utils import digits_only, fold_search_text, normalize_whatsapp_number, prefix_lookup
 
 from accounts.models import User
+from . import throttle
 from .forms import AdventureLoginForm, UserCreateForm, UserEditForm
-from .permissions import role_required
-from .utils import redirect_for_role, get_available_roles
+from .kpis import kpis_for_role
+from .models import ReportSnapshot, SearchEntry
+from .media import IMMUTABLE_PREFIXES, check_access, send_protected_file
+from .permissions import can_access_child, role_required
+from .reports import TREND_DAYS, build_report_snapshot, report_trends
+from .search import search as search_index
+from .utils import redirect_for_role, resolve_session_roles
 from children.models import Child, GuardianChild, ChildHealth
 from children.forms import ChildForm
-from children.utils import collect_children_payload, create_child_with_health
+from children.utils import CLASS_MAP, collect_children_payload, create_children_with_health
+from finance.signals import schedule_fee_generation
 
 ROLE_GROUP_MAP = {
     'DIRETORIA': 'Diretoria',
@@ -32,6 +43,17 @@ ROLE_GROUP_MAP = {
     'ADM': 'ADM',
 }
 
+USER_LIST_PAGE_SIZE = 25
+
+# O que cada função enxerga na busca global (mesmas permissões das telas de destino)
+SEARCH_KINDS = {
+    User.Role.ADM: (SearchEntry.Kind.CHILD, SearchEntry.Kind.USER, SearchEntry.Kind.REQUEST),
+    User.Role.DIRETORIA: (SearchEntry.Kind.CHILD, SearchEntry.Kind.USER, SearchEntry.Kind.REQUEST),
+    User.Role.SECRETARIA: (SearchEntry.Kind.CHILD, SearchEntry.Kind.REQUEST),
+    User.Role.TESOUREIRO: (SearchEntry.Kind.CHILD,),
+    User.Role.PROFESSOR: (SearchEntry.Kind.CHILD,),
+}
+
 
 def assign_user_groups(user, roles):
     names = {ROLE_GROUP_MAP.get(role) for role in roles if ROLE_GROUP_MAP.get(role)}
@@ -110,6 +132,13 @@ def _build_child_draft(post_data):
     return draft
 
 
+def _throttled_login(request, form, wait: float):
+    messages.error(request, f'Muitas tentativas de login. Tente novamente em {math.ceil(wait)} segundos.')
+    response = render(request, 'core/login.html', {'form': form}, status=429)
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
 @never_cache
 @ensure_csrf_cookie
 def login_view(request):
@@ -117,18 +146,34 @@ def login_view(request):
         return redirect('dashboard')
 
     form = AdventureLoginForm(request.POST or None)
+    if request.method == 'POST' and settings.LOGIN_THROTTLE_ENABLED:
+        throttle.count('attempts')
+        wait = throttle.take_token('IP', throttle.client_ip(request))
+        if wait:
+            throttle.count('rejected_ip')
+            return _throttled_login(request, form, wait)
     if request.method == 'POST' and form.is_valid():
         whatsapp_number = form.cleaned_data['whatsapp_number']
         password = form.cleaned_data['password']
 
+        # Confere o balde do número (já normalizado) antes do hash; só senha errada gasta ficha (abaixo)
+        if settings.LOGIN_THROTTLE_ENABLED:
+            wait = throttle.take_token('NUMBER', whatsapp_number, consume=False)
+            if wait:
+                throttle.count('rejected_number')
+                return _throttled_login(request, form, wait)
+
         user = authenticate(request, whatsapp_number=whatsapp_number, password=password)
         if user is not None:
             login(request, user)
             messages.success(request, 'Login realizado com sucesso!', extra_tags='auth')
             request.session['active_role'] = getattr(user, 'role', None)
-            request.session['available_roles'] = get_available_roles(user)
+            resolve_session_roles(request)
             return redirect('dashboard')
 
+        if settings.LOGIN_THROTTLE_ENABLED:
+            throttle.count('failures')
+            throttle.take_token('NUMBER', whatsapp_number)
         pending_user = User.objects.filter(whatsapp_number=whatsapp_number).first()
         if pending_user and not pending_user.is_active:
             messages.error(
@@ -150,22 +195,22 @@ def dashboard(request):
 
 @role_required([User.Role.DIRETORIA])
 def dashboard_diretoria(request):
-    return render(request, 'dashboards/diretoria.html', {'title': 'Diretoria'})
+    return render(request, 'dashboards/diretoria.html', {'title': 'Diretoria', 'kpis': kpis_for_role(User.Role.DIRETORIA)})
 
 
 @role_required([User.Role.SECRETARIA])
 def dashboard_secretaria(request):
-    return render(request, 'dashboards/secretaria.html', {'title': 'Secretaria'})
+    return render(request, 'dashboards/secretaria.html', {'title': 'Secretaria', 'kpis': kpis_for_role(User.Role.SECRETARIA)})
 
 
 @role_required([User.Role.TESOUREIRO])
 def dashboard_tesoureiro(request):
-    return render(request, 'dashboards/tesoureiro.html', {'title': 'Tesoureiro'})
+    return render(request, 'dashboards/tesoureiro.html', {'title': 'Tesoureiro', 'kpis': kpis_for_role(User.Role.TESOUREIRO)})
 
 
 @role_required([User.Role.PROFESSOR])
 def dashboard_professor(request):
-    return render(request, 'dashboards/professor.html', {'title': 'Professor'})
+    return render(request, 'dashboards/professor.html', {'title': 'Professor', 'kpis': kpis_for_role(User.Role.PROFESSOR)})
 
 
 @role_required([User.Role.RESPONSAVEL])
@@ -175,45 +220,34 @@ def dashboard_responsavel(request):
 
 @role_required([User.Role.ADM])
 def config_view(request):
-    return render(request, 'core/config.html')
+    return render(request, 'core/config.html', {'login_stats': throttle.throttle_stats()})
 
 
 @role_required([User.Role.DIRETORIA, User.Role.ADM])
 def director_reports(request):
-    UserModel = get_user_model()
-    from finance.models import Fee
-    from points.models import PointsLedger
-    from attendance.models import AttendanceSession, AttendanceRecord
-
-    users_count = UserModel.objects.count()
-    users_by_role = UserModel.objects.values('role').annotate(total=models.Count('id'))
-    children_count = Child.objects.count()
-    children_by_class = Child.objects.values('class_group').annotate(total=models.Count('id'))
-
-    fees = Fee.objects.all()
-    fee_counts = fees.values('status').annotate(total=models.Count('id'))
-    fee_totals = fees.aggregate(
-        total_amount=models.Sum('amount'),
-        total_discount=models.Sum('discount_amount'),
-        total_final=models.Sum('final_amount'),
-    )
-
-    points_total = PointsLedger.objects.aggregate(total=models.Sum('points'))['total'] or 0
-
-    sessions_count = AttendanceSession.objects.count()
-    attendance_marked = AttendanceRecord.objects.count()
-
+    # Uma consulta pelo índice de data; os números vêm do retrato diário (comando snapshot_reports).
+    # Ver a página não grava nada: o retrato do dia só é refeito pelo botão (POST) ou pelo cron.
+    if request.method == 'POST':
+        build_report_snapshot()
+        messages.success(request, 'Relatório atualizado.')
+        return redirect('director-reports')
+    snapshots = list(ReportSnapshot.objects.all()[:TREND_DAYS])
+    if not snapshots:
+        return render(request, 'core/director_reports.html', {'title': 'Relatórios', 'snapshot': None})
+    latest = snapshots[0]
     context = {
         'title': 'Relatórios',
-        'users_count': users_count,
-        'users_by_role': users_by_role,
-        'children_count': children_count,
-        'children_by_class': children_by_class,
-        'fee_counts': fee_counts,
-        'fee_totals': fee_totals,
-        'points_total': points_total,
-        'sessions_count': sessions_count,
-        'attendance_marked': attendance_marked,
+        'snapshot': latest,
+        'users_count': latest.users_count,
+        'users_by_role': latest.breakdown.get('users_by_role', []),
+        'children_count': latest.children_count,
+        'children_by_class': latest.breakdown.get('children_by_class', []),
+        'fee_counts': latest.breakdown.get('fee_counts', []),
+        'fee_totals': latest.breakdown.get('fee_totals', {}),
+        'points_total': latest.points_total,
+        'sessions_count': latest.sessions_count,
+        'attendance_marked': latest.attendance_marked,
+        'trends': report_trends(snapshots),
     }
     return render(request, 'core/director_reports.html', context)
 
@@ -226,7 +260,7 @@ def logout_view(request):
 
 @login_required
 def switch_role(request, role):
-    available = get_available_roles(request.user)
+    available = resolve_session_roles(request)
     if role in available:
         request.session['active_role'] = role
         request.user.active_role = role
@@ -258,32 +292,32 @@ def user_list(request):
     if role:
         qs = qs.filter(role=role)
     if search:
-        qs = qs.filter(
-            models.Q(first_name__icontains=search)
-            | models.Q(last_name__icontains=search)
-            | models.Q(whatsapp_number__icontains=search)
-        )
+        term = fold_search_text(search)
+        lookup = prefix_lookup('search_name', term) | prefix_lookup('search_surname', term)
+        digits = digits_only(search)
+        if digits:
+            # Números são gravados com o código do país (+55); aceita com ou sem ele
+            lookup |= prefix_lookup('search_phone', digits) | prefix_lookup('search_phone', '55' + digits)
+        qs = qs.filter(lookup)
     qs = qs.order_by('first_name', 'whatsapp_number')
 
     children = Child.objects.all()
     if child_class:
         children = children.filter(class_group=child_class)
     if child_search:
-        children = children.filter(name__icontains=child_search)
+        term = fold_search_text(child_search)
+        children = children.filter(prefix_lookup('search_name', term) | prefix_lookup('search_surname', term))
     children = children.order_by('class_group', 'name')
 
-    class_options = [
-        'Abelhinhas Laboriosas',
-        'Luminares',
-        'Edificadores',
-        'Mãos Ajudadoras',
-    ]
+    users_page = Paginator(qs, USER_LIST_PAGE_SIZE).get_page(request.GET.get('page'))
+    children_page = Paginator(children, USER_LIST_PAGE_SIZE).get_page(request.GET.get('cpage'))
+    class_options = list(CLASS_MAP.values())
     return render(
         request,
         'core/user_list.html',
         {
-            'users': qs,
-            'children': children,
+            'users': users_page,
+            'children': children_page,
             'selected_role': role,
             'search': search,
             'child_search': child_search,
@@ -335,9 +369,8 @@ def child_edit(request, pk):
 def child_overview(request, pk):
     child = get_object_or_404(Child, pk=pk)
     # Restringe responsáveis aos seus próprios aventureiros
-    if getattr(request.user, 'role', None) == User.Role.RESPONSAVEL:
-        if not GuardianChild.objects.filter(guardian_user=request.user, child=child).exists():
-            return render(request, '403.html', {'back_url': '/dashboard/'}, status=403)
+    if getattr(request.user, 'role', None) == User.Role.RESPONSAVEL and not can_access_child(request, child, ()):
+        return render(request, '403.html', {'back_url': '/dashboard/'}, status=403)
 
     from finance.models import Fee
     from points.models import PointsLedger
@@ -516,30 +549,30 @@ def signup(request):
                     },
                 )
 
-        # cria usuário
-        user, created = UserModel.objects.get_or_create(
-            whatsapp_number=resp_whatsapp_norm,
-            defaults={
-                'first_name': resp_name,
-                'last_name': resp_last,
-                'role': User.Role.RESPONSAVEL,
-                'financial_whatsapp': resp_fin_whatsapp_norm or resp_whatsapp_norm,
-                'financial_phone': resp_fin_phone,
-                'address': resp_address,
-            },
-        )
-        user.first_name = resp_name
-        user.last_name = resp_last
-        user.financial_whatsapp = resp_fin_whatsapp_norm or resp_whatsapp_norm
-        user.financial_phone = resp_fin_phone
-        user.address = resp_address
-        user.role = User.Role.RESPONSAVEL
-        user.set_password(resp_password)
-        user.save()
-
-        # cria filhos + saúde + vínculo
-        for payload in children_payload:
-            create_child_with_health(user, payload)
+        # Usuário, aventureiros, vínculos e fichas de saúde numa única transação;
+        # as mensalidades são geradas depois do commit, fora do request.
+        with transaction.atomic():
+            user, created = UserModel.objects.get_or_create(
+                whatsapp_number=resp_whatsapp_norm,
+                defaults={
+                    'first_name': resp_name,
+                    'last_name': resp_last,
+                    'role': User.Role.RESPONSAVEL,
+                    'financial_whatsapp': resp_fin_whatsapp_norm or resp_whatsapp_norm,
+                    'financial_phone': resp_fin_phone,
+                    'address': resp_address,
+                },
+            )
+            user.first_name = resp_name
+            user.last_name = resp_last
+            user.financial_whatsapp = resp_fin_whatsapp_norm or resp_whatsapp_norm
+            user.financial_phone = resp_fin_phone
+            user.address = resp_address
+            user.role = User.Role.RESPONSAVEL
+            user.set_password(resp_password)
+            user.save()
+            children = create_children_with_health(user, children_payload)
+            schedule_fee_generation(child.pk for child in children)
 
         messages.success(request, 'Cadastro enviado! Login liberado e diretoria notificada.')
         return redirect('login')
@@ -558,3 +591,33 @@ def signup(request):
             'children_draft': child_draft_json,
         },
     )
+
+
+@login_required
+def protected_media(request, name):
+    """Confere o acesso ao arquivo e delega o envio ao servidor web (ver core/media.py)."""
+    allowed = check_access(request.user, name, resolve_session_roles(request))
+    if not allowed:
+        # Sem acesso responde igual a inexistente, para não revelar quais arquivos existem.
+        raise Http404
+    download_name = None
+    if name.startswith('documents/'):
+        from documents.models import DocumentFile
+
+        download_name = (
+            DocumentFile.objects.filter(file=name).exclude(original_name='')
+            .values_list('original_name', flat=True).first()
+        )
+    return send_protected_file(name, download_name, immutable=name.startswith(IMMUTABLE_PREFIXES))
+
+
+@role_required(list(SEARCH_KINDS))
+def global_search(request):
+    """Busca global em JSON: ?q=termo[&kind=child|user|request], resultados por relevância."""
+    query = request.GET.get('q', '').strip()
+    kinds = SEARCH_KINDS[request.user.active_role]
+    requested = request.GET.getlist('kind')
+    if requested:
+        kinds = [kind for kind in kinds if kind in requested]
+    results = search_index(query, kinds) if len(query) >= 2 else []
+    return JsonResponse({'query': query, 'results': results})
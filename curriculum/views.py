@@ -6,7 +6,7 @@ from django.utils import timezone
 
 from accounts.models import User
 from children.models import Child, GuardianChild
-from core.permissions import role_required
+from core.permissions import can_access_child, role_required
 
 from .forms import ClassScheduleForm, ContentItemForm, ProgressSelectionForm
 from .models import ChildProgress, ClassSchedule, ContentItem
@@ -28,12 +28,6 @@ def _class_groups():
     )
 
 
-def _child_accessible(request_user, child):
-    if getattr(request_user, 'role', None) == User.Role.RESPONSAVEL:
-        return GuardianChild.objects.filter(guardian_user=request_user, child=child).exists()
-    return getattr(request_user, 'role', None) in STAFF_VIEW_ROLES + PROGRESS_MARK_ROLE
-
-
 @role_required(STAFF_VIEW_ROLES)
 def content_list(request):
     items = ContentItem.objects.all()
@@ -122,7 +116,7 @@ def progress_mark(request):
 @role_required(STAFF_VIEW_ROLES + RESP_ROLE)
 def child_progress(request, child_id):
     child = get_object_or_404(Child, pk=child_id)
-    if not _child_accessible(request.user, child):
+    if not can_access_child(request, child, STAFF_VIEW_ROLES + PROGRESS_MARK_ROLE):
         return render(request, '403.html', {'back_url': '/dashboard/'}, status=403)
     progress = ChildProgress.objects.filter(child=child).select_related('content_item').order_by('content_item__order')
     return render(
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import ChildDocument, DocumentFile, DocumentRequest, DocumentType
+from .models import ChildDocument, DocumentBlob, DocumentExpiryRun, DocumentFile, DocumentRequest, DocumentType
 
 
 @admin.register(DocumentType)
@@ -19,8 +19,8 @@ class ChildDocumentAdmin(admin.ModelAdmin):
 
 @admin.register(DocumentFile)
 class DocumentFileAdmin(admin.ModelAdmin):
-    list_display = ('child_document', 'uploaded_by_user', 'uploaded_at')
-    search_fields = ('child_document__child__name',)
+    list_display = ('child_document', 'original_name', 'uploaded_by_user', 'uploaded_at')
+    search_fields = ('child_document__child__name', 'original_name')
 
 
 @admin.register(DocumentRequest)
@@ -28,3 +28,14 @@ class DocumentRequestAdmin(admin.ModelAdmin):
     list_display = ('child', 'document_type', 'sent_to_user', 'sent_by_user', 'channel', 'status', 'sent_at')
     list_filter = ('channel', 'status', 'document_type')
     search_fields = ('child__name', 'sent_to_user__whatsapp_number')
+
+
+@admin.register(DocumentExpiryRun)
+class DocumentExpiryRunAdmin(admin.ModelAdmin):
+    list_display = ('ran_at', 'reference_date', 'expired_count', 'requests_created')
+
+
+@admin.register(DocumentBlob)
+class DocumentBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'ref_count', 'created_at')
+    search_fields = ('sha256',)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class DocumentsConfig(AppConfig):
     name = 'documents'
+
+    def ready(self):
+        # Import signals
+        from . import signals  # noqa: F401
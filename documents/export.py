@@ -0,0 +1,85 @@
+"""
+Exportação em ZIP dos arquivos de documentos, gerada em streaming.
+
+O zipfile escreve num buffer sem seek (usa data descriptors), e a cada bloco lido do
+storage o que já foi comprimido é entregue ao cliente. Nada é montado em memória ou em
+disco: o uso de memória fica no tamanho de um bloco, qualquer que seja o total.
+"""
+import posixpath
+import zipfile
+
+from django.core.files.storage import default_storage
+from django.utils.text import get_valid_filename
+
+from .models import DocumentFile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ZipStream:
+    """Destino de escrita só-anexar: acumula o que o zipfile grava até ser drenado."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        if data:
+            self._parts.append(bytes(data))
+            self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def export_queryset(child_id=None, class_group='', doctype_id=None):
+    files = DocumentFile.objects.select_related('child_document__child', 'child_document__document_type')
+    if child_id:
+        files = files.filter(child_document__child_id=child_id)
+    if class_group:
+        files = files.filter(child_document__child__class_group=class_group)
+    if doctype_id:
+        files = files.filter(child_document__document_type_id=doctype_id)
+    return files.order_by('child_document__child__class_group', 'child_document__child__name', 'pk')
+
+
+def _archive_name(doc_file: DocumentFile) -> str:
+    child = doc_file.child_document.child
+    doctype = doc_file.child_document.document_type
+    # A extensão do arquivo guardado vale mais que a do nome original: imagens grandes são
+    # recomprimidas para .jpg no upload (documents/storage.py)
+    ext = posixpath.splitext(doc_file.file.name)[1] or posixpath.splitext(doc_file.original_name)[1]
+    ext = ext.lower()
+    folder = get_valid_filename(child.class_group or 'sem-turma')
+    child_folder = get_valid_filename(f'{child.name}-{child.pk}')
+    return f'{folder}/{child_folder}/{get_valid_filename(doctype.name)}-{doc_file.pk}{ext}'
+
+
+def iter_documents_zip(files):
+    """Gera os bytes do ZIP arquivo por arquivo, bloco por bloco."""
+    stream = _ZipStream()
+    # PDFs e fotos já são comprimidos; nível 1 só evita gastar CPU à toa.
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        for doc_file in files.iterator(chunk_size=200):
+            if not doc_file.file or not default_storage.exists(doc_file.file.name):
+                continue
+            with default_storage.open(doc_file.file.name, 'rb') as source, archive.open(
+                _archive_name(doc_file), 'w', force_zip64=True
+            ) as target:
+                for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                    target.write(chunk)
+                    data = stream.drain()
+                    if data:
+                        yield data
+            yield stream.drain()
+    # Diretório central, escrito ao fechar o arquivo
+    yield stream.drain()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from documents.models import DocumentBlob
+from documents.storage import build_preview
+
+
+class Command(BaseCommand):
+    help = "Gera as miniaturas que faltam para os conteúdos de documentos já armazenados"
+
+    def handle(self, *args, **options):
+        created = 0
+        missing = DocumentBlob.objects.filter(preview='')
+        total = missing.count()
+        for blob in missing.iterator(chunk_size=200):
+            if build_preview(blob):
+                created += 1
+        self.stdout.write(self.style.SUCCESS(f'{created} de {total} miniatura(s) gerada(s).'))
@@ -0,0 +1,76 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from children.models import GuardianChild
+from documents.models import ChildDocument, DocumentExpiryRun, DocumentRequest
+from documents.utils import invalidate_compliance_matrix
+
+
+class Command(BaseCommand):
+    help = "Marca como VENCIDO todo documento recebido com validade expirada e solicita um novo aos responsáveis"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Apenas mostra o que seria feito')
+
+    def handle(self, *args, **options):
+        today = date.today()
+        expiring = ChildDocument.objects.filter(status=ChildDocument.Status.RECEBIDO, valid_until__lt=today)
+
+        with transaction.atomic():
+            rows = list(
+                expiring.values_list('child_id', 'child__name', 'document_type_id', 'document_type__name', 'valid_until')
+            )
+            if options['dry_run']:
+                self.stdout.write(f'{len(rows)} documento(s) seriam marcados como vencidos.')
+                return
+
+            expired_count = expiring.update(status=ChildDocument.Status.VENCIDO)
+
+            child_ids = {row[0] for row in rows}
+            guardians = {}
+            for child_id, guardian_id in GuardianChild.objects.filter(child_id__in=child_ids).values_list(
+                'child_id', 'guardian_user_id'
+            ):
+                guardians.setdefault(child_id, []).append(guardian_id)
+            already_open = set(
+                DocumentRequest.objects.filter(
+                    child_id__in=child_ids,
+                    status=DocumentRequest.Status.ENVIADO,
+                ).values_list('child_id', 'document_type_id', 'sent_to_user_id')
+            )
+
+            new_requests = []
+            for child_id, child_name, doctype_id, doctype_name, valid_until in rows:
+                message = (
+                    f"O documento '{doctype_name}' de {child_name} venceu em {valid_until:%d/%m/%Y}. "
+                    'Envie uma via atualizada.'
+                )
+                for guardian_id in guardians.get(child_id, []):
+                    if (child_id, doctype_id, guardian_id) in already_open:
+                        continue
+                    new_requests.append(
+                        DocumentRequest(
+                            child_id=child_id,
+                            document_type_id=doctype_id,
+                            sent_to_user_id=guardian_id,
+                            channel=DocumentRequest.Channel.SITE,
+                            status=DocumentRequest.Status.ENVIADO,
+                            message=message,
+                        )
+                    )
+            DocumentRequest.objects.bulk_create(new_requests, batch_size=500)
+            run = DocumentExpiryRun.objects.create(
+                reference_date=today,
+                expired_count=expired_count,
+                requests_created=len(new_requests),
+            )
+        if expired_count:
+            invalidate_compliance_matrix()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{run.expired_count} documento(s) vencido(s), {run.requests_created} solicitação(ões) criada(s).'
+            )
+        )
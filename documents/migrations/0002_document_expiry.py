@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0004_child_birth_certificate_number_child_father_absent_and_more'),
+        ('documents', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentExpiryRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ran_at', models.DateTimeField(auto_now_add=True, verbose_name='Executado em')),
+                ('reference_date', models.DateField(verbose_name='Data de referência')),
+                ('expired_count', models.PositiveIntegerField(default=0, verbose_name='Documentos vencidos')),
+                ('requests_created', models.PositiveIntegerField(default=0, verbose_name='Solicitações criadas')),
+            ],
+            options={
+                'verbose_name': 'Execução de Vencimento',
+                'verbose_name_plural': 'Execuções de Vencimento',
+                'ordering': ['-ran_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='childdocument',
+            index=models.Index(fields=['status', 'valid_until'], name='documents_status_valid_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_document_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('file', models.FileField(upload_to='documents/sha256/')),
+                ('size', models.PositiveBigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Referências')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Conteúdo de Documento',
+                'verbose_name_plural': 'Conteúdos de Documento',
+            },
+        ),
+        migrations.AddField(
+            model_name='documentfile',
+            name='original_name',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Nome original'),
+        ),
+        migrations.AddField(
+            model_name='documentfile',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='document_files', to='documents.documentblob'),
+        ),
+    ]
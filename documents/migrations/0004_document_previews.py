@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_document_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentblob',
+            name='preview',
+            field=models.ImageField(blank=True, upload_to='documents/sha256/', verbose_name='Miniatura'),
+        ),
+    ]
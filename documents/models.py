@@ -45,6 +45,7 @@ class ChildDocument(models.Model):
 
     class Meta:
         unique_together = ('child', 'document_type')
+        indexes = [models.Index(fields=['status', 'valid_until'], name='documents_status_valid_idx')]
         verbose_name = 'Documento da Criança'
         verbose_name_plural = 'Documentos das Crianças'
 
@@ -60,9 +61,29 @@ class ChildDocument(models.Model):
             self.valid_until = None
 
 
+class DocumentBlob(models.Model):
+    """Conteúdo armazenado uma única vez, identificado pelo SHA-256 do arquivo enviado."""
+
+    sha256 = models.CharField('SHA-256', max_length=64, unique=True)
+    file = models.FileField(upload_to='documents/sha256/')
+    size = models.PositiveBigIntegerField('Tamanho (bytes)', default=0)
+    preview = models.ImageField('Miniatura', upload_to='documents/sha256/', blank=True)
+    ref_count = models.PositiveIntegerField('Referências', default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Conteúdo de Documento'
+        verbose_name_plural = 'Conteúdos de Documento'
+
+    def __str__(self):
+        return f'{self.sha256[:12]} ({self.ref_count} ref.)'
+
+
 class DocumentFile(models.Model):
     child_document = models.ForeignKey(ChildDocument, on_delete=models.CASCADE, related_name='files')
     file = models.FileField(upload_to='documents/')
+    blob = models.ForeignKey(DocumentBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='document_files')
+    original_name = models.CharField('Nome original', max_length=255, blank=True)
     uploaded_by_user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
@@ -110,3 +131,18 @@ class DocumentRequest(models.Model):
 
     def __str__(self):
         return f'{self.child} - {self.document_type} ({self.status})'
+
+
+class DocumentExpiryRun(models.Model):
+    ran_at = models.DateTimeField('Executado em', auto_now_add=True)
+    reference_date = models.DateField('Data de referência')
+    expired_count = models.PositiveIntegerField('Documentos vencidos', default=0)
+    requests_created = models.PositiveIntegerField('Solicitações criadas', default=0)
+
+    class Meta:
+        verbose_name = 'Execução de Vencimento'
+        verbose_name_plural = 'Execuções de Vencimento'
+        ordering = ['-ran_at']
+
+    def __str__(self):
+        return f'{self.ran_at:%d/%m/%Y %H:%M} - {self.expired_count} vencido(s)'
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from children.models import Child
+
+from .models import ChildDocument, DocumentFile, DocumentType
+from .storage import release_blob
+from .utils import invalidate_compliance_matrix
+
+
+@receiver([post_save, post_delete], sender=ChildDocument)
+@receiver([post_save, post_delete], sender=DocumentType)
+@receiver([post_save, post_delete], sender=Child)
+def refresh_compliance_matrix(sender, **kwargs):
+    invalidate_compliance_matrix()
+
+
+@receiver(post_delete, sender=DocumentFile)
+def release_document_blob(sender, instance: DocumentFile, **kwargs):
+    if instance.blob_id:
+        release_blob(instance.blob_id)
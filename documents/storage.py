@@ -0,0 +1,177 @@
+"""
+Armazenamento deduplicado dos arquivos de documentos.
+
+O upload é lido em blocos, gravado num temporário e tem o SHA-256 calculado no caminho.
+Se o mesmo conteúdo já existe, só o contador de referências do DocumentBlob sobe e o
+temporário é descartado; senão o arquivo é movido para `documents/sha256/ab/<hash>.<ext>`.
+Imagens grandes são recomprimidas antes de ir para o lugar definitivo (o hash continua
+sendo o do arquivo enviado, que é o que identifica um reenvio).
+
+Cada conteúdo novo ganha uma miniatura ao lado (`<hash>-preview.<ext>`): imagens são
+reduzidas pelo Pillow e PDFs têm a primeira página renderizada pelo `pdftoppm` (poppler),
+quando instalado. Sem renderizador, o PDF fica sem miniatura e a tela mostra só o link.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from PIL import Image, UnidentifiedImageError
+
+from core.images import encode_image, open_image, output_format, resized_copy
+
+from .models import DocumentBlob
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff'}
+RECOMPRESS_MIN_BYTES = 1_500_000
+RECOMPRESS_MAX_SIZE = (2400, 2400)
+RECOMPRESS_QUALITY = 82
+PREVIEW_SIZE = (320, 320)
+PREVIEW_QUALITY = 70
+PDF_RENDER_TIMEOUT = 20
+
+
+def _spool_and_hash(upload) -> tuple[str, str, int]:
+    tmp_dir = Path(default_storage.path('tmp'))
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as tmp:
+        for chunk in upload.chunks():
+            digest.update(chunk)
+            tmp.write(chunk)
+            size += len(chunk)
+    return tmp.name, digest.hexdigest(), size
+
+
+def _recompress_image(tmp_path: str) -> str | None:
+    """Regrava a imagem menor em JPEG; devolve o novo temporário ou None se não compensar."""
+    try:
+        with open(tmp_path, 'rb') as fh:
+            image = open_image(fh)
+            data = encode_image(resized_copy(image, RECOMPRESS_MAX_SIZE), 'JPEG', RECOMPRESS_QUALITY)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return None
+    if len(data) >= os.path.getsize(tmp_path):
+        return None
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(tmp_path), delete=False) as out:
+        out.write(data)
+    return out.name
+
+
+def _render_pdf_first_page(path: str):
+    """Primeira página do PDF como imagem, via pdftoppm; None se não houver renderizador."""
+    binary = shutil.which('pdftoppm')
+    if not binary:
+        return None
+    with tempfile.TemporaryDirectory() as out_dir:
+        prefix = os.path.join(out_dir, 'page')
+        try:
+            subprocess.run(
+                [binary, '-png', '-f', '1', '-l', '1', '-singlefile', '-scale-to', str(max(PREVIEW_SIZE)), path, prefix],
+                check=True,
+                capture_output=True,
+                timeout=PDF_RENDER_TIMEOUT,
+            )
+            with open(prefix + '.png', 'rb') as fh:
+                return open_image(fh)
+        except (OSError, subprocess.SubprocessError, UnidentifiedImageError):
+            logger.warning('Falha ao renderizar a prévia do PDF %s', path, exc_info=True)
+            return None
+
+
+def build_preview(blob: DocumentBlob) -> bool:
+    """Gera (uma vez) a miniatura do conteúdo e grava ao lado do arquivo. Retorna se gerou."""
+    if blob.preview:
+        return False
+    name = blob.file.name
+    path = default_storage.path(name)
+    ext = Path(name).suffix.lower()
+    image = None
+    if ext == '.pdf':
+        image = _render_pdf_first_page(path)
+    elif ext in IMAGE_EXTENSIONS:
+        try:
+            with open(path, 'rb') as fh:
+                image = open_image(fh)
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+            image = None
+    if image is None:
+        return False
+    fmt, preview_ext = output_format()
+    data = encode_image(resized_copy(image, PREVIEW_SIZE), fmt, PREVIEW_QUALITY)
+    preview_name = f'{Path(name).with_suffix("")}-preview.{preview_ext}'
+    with open(default_storage.path(preview_name), 'wb') as out:
+        out.write(data)
+    blob.preview.name = preview_name
+    blob.save(update_fields=['preview'])
+    return True
+
+
+def _bump(sha256: str) -> DocumentBlob | None:
+    if DocumentBlob.objects.filter(sha256=sha256).update(ref_count=F('ref_count') + 1):
+        return DocumentBlob.objects.get(sha256=sha256)
+    return None
+
+
+def store_document_upload(upload) -> DocumentBlob:
+    """Guarda o upload (ou reaproveita um conteúdo idêntico) e devolve o blob com +1 referência."""
+    tmp_path, sha256, size = _spool_and_hash(upload)
+    final_path = tmp_path
+    try:
+        blob = _bump(sha256)
+        if blob:
+            return blob
+
+        ext = Path(upload.name or '').suffix.lower()[:10]
+        if ext in IMAGE_EXTENSIONS and size >= RECOMPRESS_MIN_BYTES:
+            recompressed = _recompress_image(tmp_path)
+            if recompressed:
+                final_path, ext = recompressed, '.jpg'
+                size = os.path.getsize(final_path)
+
+        name = f'documents/sha256/{sha256[:2]}/{sha256}{ext}'
+        target = Path(default_storage.path(name))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Sempre troca (o conteúdo é o mesmo): se um release_blob do mesmo conteúdo ainda tiver
+        # a remoção do arquivo pendente, o arquivo volta a existir em vez de ser reaproveitado.
+        os.replace(final_path, target)
+        try:
+            with transaction.atomic():
+                blob = DocumentBlob.objects.create(sha256=sha256, file=name, size=size, ref_count=1)
+        except IntegrityError:
+            # outro upload do mesmo conteúdo ganhou a corrida
+            return _bump(sha256)
+        build_preview(blob)
+        return blob
+    finally:
+        for path in {tmp_path, final_path}:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _delete_files(names: list[str]) -> None:
+    for name in names:
+        # Um upload do mesmo conteúdo pode ter criado um blob novo no mesmo caminho depois do release
+        if DocumentBlob.objects.filter(Q(file=name) | Q(preview=name)).exists():
+            continue
+        default_storage.delete(name)
+
+
+def release_blob(blob_id: int) -> None:
+    """Tira uma referência; o arquivo é apagado quando ninguém mais aponta para ele."""
+    DocumentBlob.objects.filter(pk=blob_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+    orphan = DocumentBlob.objects.filter(pk=blob_id, ref_count=0).first()
+    if orphan is None:
+        return
+    names = [orphan.file.name] + ([orphan.preview.name] if orphan.preview else [])
+    orphan.delete()
+    transaction.on_commit(lambda: _delete_files(names))
@@ -1,9 +1,23 @@
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from children.models import Child, GuardianChild
-from documents.models import ChildDocument, DocumentRequest, DocumentType
+from documents.export import _archive_name
+from documents.models import ChildDocument, DocumentBlob, DocumentExpiryRun, DocumentFile, DocumentRequest, DocumentType
+from documents.storage import release_blob, store_document_upload
+from documents.utils import build_compliance_matrix
 
 
 class DocumentsTests(TestCase):
@@ -34,3 +48,119 @@ class DocumentsTests(TestCase):
         resp = self.client.get(reverse('documents-child', args=[other.id]))
         self.assertEqual(resp.status_code, 403)
 
+    def test_expire_documents_command(self):
+        ChildDocument.objects.filter(pk=self.child_doc.pk).update(
+            status=ChildDocument.Status.RECEBIDO,
+            valid_until=date.today() - timedelta(days=1),
+        )
+        call_command('expire_documents', stdout=StringIO())
+        self.child_doc.refresh_from_db()
+        self.assertEqual(self.child_doc.status, ChildDocument.Status.VENCIDO)
+        self.assertEqual(DocumentRequest.objects.filter(child=self.child, sent_to_user=self.resp).count(), 1)
+        run = DocumentExpiryRun.objects.get()
+        self.assertEqual((run.expired_count, run.requests_created), (1, 1))
+
+    def test_compliance_matrix_fills_missing_cells(self):
+        other_type = DocumentType.objects.create(name='Ficha Médica', required=True)
+        matrix = build_compliance_matrix('Turma A')
+        row = matrix['rows'][0]
+        statuses = {cell['doctype_id']: cell['status'] for cell in row['cells']}
+        self.assertEqual(statuses[other_type.id], ChildDocument.Status.PENDENTE)
+        self.assertFalse(ChildDocument.objects.filter(document_type=other_type).exists())
+        self.child_doc.status = ChildDocument.Status.RECEBIDO
+        self.child_doc.save()
+        matrix = build_compliance_matrix('Turma A')
+        statuses = {cell['doctype_id']: cell['status'] for cell in matrix['rows'][0]['cells']}
+        self.assertEqual(statuses[self.doc_type.id], ChildDocument.Status.RECEBIDO)
+        self.client.force_login(self.secretaria)
+        self.assertContains(self.client.get(reverse('documents-matrix')), 'Doc Child')
+
+    def test_duplicate_uploads_share_one_blob(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        url = reverse('documents-child-upload', args=[self.child.id, self.child_doc.id])
+        self.client.force_login(self.secretaria)
+        with override_settings(MEDIA_ROOT=media):
+            for _ in range(2):
+                upload = SimpleUploadedFile('rg.pdf', b'%PDF-1.4 conteudo', content_type='application/pdf')
+                self.assertEqual(self.client.post(url, {'file': upload}).status_code, 302)
+            blob = DocumentBlob.objects.get()
+            self.assertEqual(blob.ref_count, 2)
+            self.assertEqual(DocumentFile.objects.filter(blob=blob).count(), 2)
+            name = blob.file.name
+            with self.captureOnCommitCallbacks(execute=True):
+                for doc_file in DocumentFile.objects.all():
+                    doc_file.delete()
+            self.assertFalse(DocumentBlob.objects.exists())
+            self.assertFalse(default_storage.exists(name))
+
+    def test_reupload_during_release_keeps_file(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media):
+            blob = store_document_upload(SimpleUploadedFile('rg.pdf', b'%PDF-1.4 conteudo'))
+            with self.captureOnCommitCallbacks() as callbacks:
+                release_blob(blob.pk)
+            # Mesmo conteúdo enviado de novo antes da remoção pendente rodar
+            new_blob = store_document_upload(SimpleUploadedFile('rg.pdf', b'%PDF-1.4 conteudo'))
+            for callback in callbacks:
+                callback()
+            self.assertEqual(new_blob.file.name, blob.file.name)
+            self.assertTrue(default_storage.exists(new_blob.file.name))
+
+    def test_export_zip_streams_class_files(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        other = Child.objects.create(name='Fora', birth_date='2018-02-02', class_group='Turma B')
+        other_doc = ChildDocument.objects.create(child=other, document_type=self.doc_type)
+        self.client.force_login(self.secretaria)
+        with override_settings(MEDIA_ROOT=media):
+            for child, doc, content in ((self.child, self.child_doc, b'rg-a'), (other, other_doc, b'rg-b')):
+                upload = SimpleUploadedFile('rg.pdf', content, content_type='application/pdf')
+                self.client.post(reverse('documents-child-upload', args=[child.id, doc.id]), {'file': upload})
+            resp = self.client.get(reverse('documents-export-zip'), {'class': 'Turma A'})
+            self.assertTrue(resp.streaming)
+            archive = zipfile.ZipFile(BytesIO(b''.join(resp.streaming_content)))
+        names = archive.namelist()
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names[0].startswith('Turma_A/'))
+        self.assertEqual(archive.read(names[0]), b'rg-a')
+
+    def test_archive_name_uses_stored_extension(self):
+        doc_file = DocumentFile.objects.create(
+            child_document=self.child_doc, file='documents/sha256/ab/abc.jpg', original_name='foto.PNG'
+        )
+        self.assertTrue(_archive_name(doc_file).endswith(f'RG-{doc_file.pk}.jpg'))
+
+    def test_bulk_request_one_message_per_guardian(self):
+        cache.clear()
+        DocumentType.objects.create(name='Ficha Médica', required=True)
+        DocumentType.objects.create(name='Opcional', required=False)
+        self.client.force_login(self.secretaria)
+        resp = self.client.post(reverse('documents-bulk-request'), {'class': 'Turma A'})
+        self.assertEqual(resp.status_code, 200)
+        dispatches = resp.context['dispatches']
+        self.assertEqual(len(dispatches), 1)
+        self.assertEqual(dispatches[0]['created'], 2)
+        self.assertIn('Ficha%20M', dispatches[0]['wa_url'])
+        self.assertEqual(DocumentRequest.objects.filter(sent_to_user=self.resp).count(), 2)
+        resp = self.client.post(reverse('documents-bulk-request'), {'class': 'Turma A'})
+        self.assertEqual(resp.context['dispatches'][0]['created'], 0)
+        self.assertEqual(DocumentRequest.objects.count(), 2)
+
+    def test_image_upload_gets_cached_preview(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        buffer = BytesIO()
+        Image.new('RGB', (1600, 1200), (20, 120, 200)).save(buffer, 'JPEG')
+        upload = SimpleUploadedFile('rg.jpg', buffer.getvalue(), content_type='image/jpeg')
+        self.client.force_login(self.secretaria)
+        with override_settings(MEDIA_ROOT=media):
+            self.client.post(reverse('documents-child-upload', args=[self.child.id, self.child_doc.id]), {'file': upload})
+            blob = DocumentBlob.objects.get()
+            self.assertIn('-preview.', blob.preview.name)
+            with Image.open(blob.preview.path) as preview:
+                self.assertLessEqual(max(preview.size), 320)
+            resp = self.client.get(blob.preview.url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertIn('immutable', resp['Cache-Control'])
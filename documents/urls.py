@@ -4,9 +4,12 @@ from . import views
 
 urlpatterns = [
     path('overview/', views.overview, name='documents-overview'),
+    path('matrix/', views.compliance_matrix, name='documents-matrix'),
+    path('export/zip/', views.export_zip, name='documents-export-zip'),
     path('child/<int:child_id>/', views.child_detail, name='documents-child'),
     path('child/<int:child_id>/update/<int:doc_id>/', views.child_doc_update, name='documents-child-update'),
     path('child/<int:child_id>/upload/<int:doc_id>/', views.child_doc_upload, name='documents-child-upload'),
     path('request/<int:child_id>/<int:doctype_id>/', views.send_request, name='documents-request'),
+    path('request/bulk/', views.bulk_request, name='documents-bulk-request'),
     path('my/', views.my_documents, name='documents-my'),
 ]
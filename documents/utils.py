@@ -0,0 +1,176 @@
+import time
+import urllib.parse
+
+from django.core.cache import cache
+from django.db import transaction
+
+from children.models import Child, GuardianChild
+from core.search import index_objects
+
+from .models import ChildDocument, DocumentRequest, DocumentType
+
+MATRIX_CACHE_TTL = 60 * 10
+MATRIX_VERSION_KEY = 'documents:matrix:version'
+# Situações que contam como "faltando" na cobrança em lote
+MISSING_STATUSES = {ChildDocument.Status.PENDENTE, ChildDocument.Status.VENCIDO, ChildDocument.Status.REJEITADO}
+
+
+def invalidate_compliance_matrix() -> None:
+    """Troca a versão das chaves do cache; as matrizes antigas expiram sozinhas."""
+    cache.set(MATRIX_VERSION_KEY, time.time_ns(), None)
+
+
+def _matrix_version():
+    version = cache.get(MATRIX_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        cache.add(MATRIX_VERSION_KEY, version, None)
+        version = cache.get(MATRIX_VERSION_KEY, version)
+    return version
+
+
+def build_compliance_matrix(class_group: str = '') -> dict:
+    """
+    Grade de todos os aventureiros ativos x tipos de documento ativos.
+    Os documentos vêm de uma única consulta values(); células sem ChildDocument
+    aparecem como PENDENTE sem criar linhas no banco. O resultado fica em cache por filtro.
+    """
+    cache_key = f'documents:matrix:{_matrix_version()}:{urllib.parse.quote(class_group)}'
+    matrix = cache.get(cache_key)
+    if matrix is not None:
+        return matrix
+
+    children_qs = Child.objects.filter(active=True)
+    docs_qs = ChildDocument.objects.filter(child__active=True, document_type__active=True)
+    if class_group:
+        children_qs = children_qs.filter(class_group=class_group)
+        docs_qs = docs_qs.filter(child__class_group=class_group)
+    children = list(children_qs.order_by('class_group', 'name').values('id', 'name', 'class_group'))
+    doctypes = list(DocumentType.objects.filter(active=True).order_by('name').values('id', 'name', 'required'))
+
+    cells = {
+        (row['child_id'], row['document_type_id']): row
+        for row in docs_qs.values('id', 'child_id', 'document_type_id', 'status', 'valid_until')
+    }
+    totals = {status: 0 for status in ChildDocument.Status.values}
+    rows = []
+    for child in children:
+        row_cells = []
+        for doctype in doctypes:
+            doc = cells.get((child['id'], doctype['id']))
+            status = doc['status'] if doc else ChildDocument.Status.PENDENTE
+            totals[status] += 1
+            row_cells.append(
+                {
+                    'doctype_id': doctype['id'],
+                    'doc_id': doc['id'] if doc else None,
+                    'status': status,
+                    'valid_until': doc['valid_until'] if doc else None,
+                }
+            )
+        rows.append({'child': child, 'cells': row_cells})
+
+    matrix = {'doctypes': doctypes, 'rows': rows, 'totals': totals, 'class_group': class_group}
+    cache.set(cache_key, matrix, MATRIX_CACHE_TTL)
+    return matrix
+
+
+def missing_document_pairs(class_group: str = '') -> list[tuple[dict, dict, str]]:
+    """(criança, tipo, status) de cada documento obrigatório pendente, vencido ou rejeitado, lido da matriz."""
+    matrix = build_compliance_matrix(class_group)
+    doctypes = {doctype['id']: doctype for doctype in matrix['doctypes']}
+    pairs = []
+    for row in matrix['rows']:
+        for cell in row['cells']:
+            doctype = doctypes[cell['doctype_id']]
+            if doctype['required'] and cell['status'] in MISSING_STATUSES:
+                pairs.append((row['child'], doctype, cell['status']))
+    return pairs
+
+
+def _guardian_message(guardian: dict, items: list[tuple[dict, dict, str]]) -> str:
+    name = f"{guardian['first_name']} {guardian['last_name']}".strip() or guardian['whatsapp_number']
+    by_child = {}
+    for child, doctype, status in items:
+        label = doctype['name'] + (' (vencido)' if status == ChildDocument.Status.VENCIDO else '')
+        by_child.setdefault(child['name'], []).append(label)
+    lines = [f'Olá {name},', 'Precisamos dos seguintes documentos:']
+    for child_name, labels in by_child.items():
+        lines.append(f"- {child_name}: {', '.join(labels)}")
+    lines.append('Envie foto dos documentos aqui no WhatsApp. Obrigado!')
+    return '\n'.join(lines)
+
+
+@transaction.atomic
+def dispatch_bulk_requests(sender, class_group: str = '') -> list[dict]:
+    """
+    Registra as cobranças de todos os documentos faltantes da turma (ou do clube) e monta
+    uma única mensagem de WhatsApp por responsável. Cobranças ainda abertas não são duplicadas.
+    Retorna [{'guardian', 'items', 'created', 'wa_url'}] por responsável.
+    """
+    pairs = missing_document_pairs(class_group)
+    child_ids = {child['id'] for child, _, _ in pairs}
+    guardians_by_child = {}
+    guardians = {}
+    for link in GuardianChild.objects.filter(child_id__in=child_ids).values(
+        'child_id',
+        'guardian_user_id',
+        'guardian_user__first_name',
+        'guardian_user__last_name',
+        'guardian_user__whatsapp_number',
+    ):
+        guardian_id = link['guardian_user_id']
+        guardians_by_child.setdefault(link['child_id'], []).append(guardian_id)
+        guardians[guardian_id] = {
+            'id': guardian_id,
+            'first_name': link['guardian_user__first_name'],
+            'last_name': link['guardian_user__last_name'],
+            'whatsapp_number': link['guardian_user__whatsapp_number'],
+        }
+    already_open = set(
+        DocumentRequest.objects.filter(child_id__in=child_ids, status=DocumentRequest.Status.ENVIADO).values_list(
+            'child_id', 'document_type_id', 'sent_to_user_id'
+        )
+    )
+
+    items_by_guardian = {}
+    for child, doctype, status in pairs:
+        for guardian_id in guardians_by_child.get(child['id'], []):
+            items_by_guardian.setdefault(guardian_id, []).append((child, doctype, status))
+
+    new_requests = []
+    dispatches = []
+    for guardian_id, items in items_by_guardian.items():
+        guardian = guardians[guardian_id]
+        message = _guardian_message(guardian, items)
+        created = 0
+        for child, doctype, _ in items:
+            if (child['id'], doctype['id'], guardian_id) in already_open:
+                continue
+            created += 1
+            new_requests.append(
+                DocumentRequest(
+                    child_id=child['id'],
+                    document_type_id=doctype['id'],
+                    sent_to_user_id=guardian_id,
+                    sent_by_user=sender,
+                    channel=DocumentRequest.Channel.WHATSAPP,
+                    status=DocumentRequest.Status.ENVIADO,
+                    message=message,
+                )
+            )
+        phone = guardian['whatsapp_number'].lstrip('+')
+        dispatches.append(
+            {
+                'guardian': guardian,
+                'items': items,
+                'created': created,
+                'wa_url': f'https://wa.me/{phone}?text={urllib.parse.quote(message)}',
+            }
+        )
+    DocumentRequest.objects.bulk_create(new_requests, batch_size=500)
+    # bulk_create não dispara post_save; a busca global indexa as novas solicitações de uma vez
+    created_ids = [request.pk for request in new_requests]
+    transaction.on_commit(lambda: index_objects(DocumentRequest, created_ids))
+    dispatches.sort(key=lambda d: (d['guardian']['first_name'], d['guardian']['last_name']))
+    return dispatches
@@ -3,14 +3,21 @@ from datetime import date
 
 from django.contrib import messages
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+from django.utils.text import get_valid_filename
 
 from accounts.models import User
 from children.models import Child, GuardianChild
-from core.permissions import role_required
+from core.permissions import can_access_child, role_required
 
+from .export import export_queryset, iter_documents_zip
 from .forms import ChildDocumentUpdateForm, DocumentUploadForm
 from .models import ChildDocument, DocumentFile, DocumentRequest, DocumentType
+from .storage import store_document_upload
+from .utils import build_compliance_matrix, dispatch_bulk_requests, missing_document_pairs
 
 UserModel = get_user_model()
 
@@ -18,14 +25,6 @@ SECRETARIA_ROLES = [User.Role.SECRETARIA, User.Role.DIRETORIA]
 RESP_ROLES = [User.Role.RESPONSAVEL]
 
 
-def _child_accessible(user, child):
-    if getattr(user, 'role', None) in SECRETARIA_ROLES:
-        return True
-    if getattr(user, 'role', None) == User.Role.RESPONSAVEL:
-        return GuardianChild.objects.filter(guardian_user=user, child=child).exists()
-    return False
-
-
 @role_required(SECRETARIA_ROLES)
 def overview(request):
     docs = (
@@ -35,12 +34,60 @@ def overview(request):
     return render(request, 'documents/overview.html', {'docs': docs, 'title': 'Documentação'})
 
 
+@role_required(SECRETARIA_ROLES)
+def compliance_matrix(request):
+    class_group = request.GET.get('class', '').strip()
+    matrix = build_compliance_matrix(class_group)
+    class_options = (
+        Child.objects.filter(active=True)
+        .exclude(class_group='')
+        .values_list('class_group', flat=True)
+        .distinct()
+        .order_by('class_group')
+    )
+    return render(
+        request,
+        'documents/matrix.html',
+        {
+            'matrix': matrix,
+            'class_group': class_group,
+            'class_options': class_options,
+            'doctypes': DocumentType.objects.order_by('name'),
+            'status_labels': dict(ChildDocument.Status.choices),
+            'title': 'Quadro de documentos',
+        },
+    )
+
+
+@role_required(SECRETARIA_ROLES)
+def export_zip(request):
+    """Baixa os arquivos filtrados por criança, turma e/ou tipo de documento num ZIP gerado em streaming."""
+    child_id = request.GET.get('child') or None
+    class_group = request.GET.get('class', '').strip()
+    doctype_id = request.GET.get('doctype') or None
+    if (child_id and not child_id.isdigit()) or (doctype_id and not doctype_id.isdigit()):
+        messages.error(request, 'Filtro inválido.')
+        return redirect('documents-matrix')
+    label = class_group or (f'crianca-{child_id}' if child_id else 'todos')
+    filename = get_valid_filename(f'documentos-{label}-{timezone.localdate():%Y%m%d}.zip')
+    response = StreamingHttpResponse(
+        iter_documents_zip(export_queryset(child_id, class_group, doctype_id)),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @role_required(SECRETARIA_ROLES + RESP_ROLES)
 def child_detail(request, child_id):
     child = get_object_or_404(Child, pk=child_id)
-    if not _child_accessible(request.user, child):
+    if not can_access_child(request, child, SECRETARIA_ROLES):
         return render(request, '403.html', {'back_url': '/dashboard/'}, status=403)
-    docs = ChildDocument.objects.filter(child=child).select_related('document_type')
+    docs = (
+        ChildDocument.objects.filter(child=child)
+        .select_related('document_type')
+        .prefetch_related(Prefetch('files', queryset=DocumentFile.objects.select_related('blob').order_by('-uploaded_at')))
+    )
     requests = DocumentRequest.objects.filter(child=child).order_by('-sent_at')
     return render(
         request,
@@ -71,9 +118,14 @@ def child_doc_upload(request, child_id, doc_id):
     doc = get_object_or_404(ChildDocument, pk=doc_id, child=child)
     form = DocumentUploadForm(request.POST or None, request.FILES or None)
     if request.method == 'POST' and form.is_valid():
+        uploaded = form.cleaned_data['file']
+        blob = store_document_upload(uploaded)
         upload = form.save(commit=False)
         upload.child_document = doc
         upload.uploaded_by_user = request.user
+        upload.blob = blob
+        upload.file = blob.file.name
+        upload.original_name = uploaded.name[:255]
         upload.save()
         messages.success(request, 'Arquivo anexado.')
         return redirect('documents-child', child_id=child.id)
@@ -112,6 +164,32 @@ def send_request(request, child_id, doctype_id):
     return redirect(wa_url)
 
 
+@role_required(SECRETARIA_ROLES)
+def bulk_request(request):
+    """Cobra de uma vez todos os documentos faltantes da turma, com uma mensagem por responsável."""
+    class_group = (request.POST.get('class') or request.GET.get('class') or '').strip()
+    dispatches = None
+    if request.method == 'POST':
+        dispatches = dispatch_bulk_requests(request.user, class_group)
+        created = sum(d['created'] for d in dispatches)
+        messages.success(
+            request,
+            f'{created} cobrança(s) registrada(s) para {len(dispatches)} responsável(is). Abra os links para enviar.',
+        )
+    pending = missing_document_pairs(class_group)
+    return render(
+        request,
+        'documents/bulk_request.html',
+        {
+            'class_group': class_group,
+            'pending_count': len(pending),
+            'children_count': len({child['id'] for child, _, _ in pending}),
+            'dispatches': dispatches,
+            'title': 'Cobrança em lote',
+        },
+    )
+
+
 @role_required(RESP_ROLES)
 def my_documents(request):
     guardian_links = GuardianChild.objects.filter(guardian_user=request.user).select_related('child')
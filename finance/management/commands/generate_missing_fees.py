@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.kpis import invalidate_kpis
+from finance.signals import FEE_RECOVERY_DAYS, children_missing_fees, generate_fees_for_children
+
+
+class Command(BaseCommand):
+    help = "Gera as mensalidades dos aventureiros recentes ou sem data de cadastro que ainda não têm nenhuma (rodar pelo cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Só lista quantos aventureiros seriam atendidos')
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=FEE_RECOVERY_DAYS,
+            help=f'Considera os cadastrados nos últimos N dias (padrão: {FEE_RECOVERY_DAYS})',
+        )
+
+    def handle(self, *args, **options):
+        children = list(children_missing_fees(options['days']))
+        if options['dry_run']:
+            self.stdout.write(f'{len(children)} aventureiro(s) sem mensalidade.')
+            return
+        total = generate_fees_for_children(children)
+        invalidate_kpis('finance')
+        self.stdout.write(self.style.SUCCESS(f'{total} mensalidade(s) geradas para {len(children)} aventureiro(s).'))
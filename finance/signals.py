@@ -1,15 +1,23 @@
 import calendar
-from datetime import date
+import logging
+from datetime import date, timedelta
 from decimal import Decimal
 
+from django.db import transaction
+from django.db.models import Q
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 from children.models import Child
 from .models import Fee
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_FEE_AMOUNT = Decimal('30.00')
 DEFAULT_DUE_DAY = 10
+# Janela do generate_missing_fees: só cadastros recentes (ver children_missing_fees)
+FEE_RECOVERY_DAYS = 3
 
 
 def compute_fee_amount(child: Child, base_amount: Decimal):
@@ -23,8 +31,8 @@ def compute_fee_amount(child: Child, base_amount: Decimal):
     return discount_amount, final
 
 
-def generate_fees_for_child(child: Child):
-    today = date.today()
+def _remaining_months(today: date):
+    """(referência, vencimento) de cada mês de hoje até dezembro."""
     year = today.year
     for month in range(today.month, 13):
         ref = f'{year}-{month:02d}'
@@ -34,6 +42,11 @@ def generate_fees_for_child(child: Child):
             due = date(year, month, due_day)
         except Exception:
             due = today
+        yield ref, due
+
+
+def generate_fees_for_child(child: Child):
+    for ref, due in _remaining_months(date.today()):
         base_amount = DEFAULT_FEE_AMOUNT
         discount_amount, final_amount = compute_fee_amount(child, base_amount)
         Fee.objects.get_or_create(
@@ -49,6 +62,68 @@ def generate_fees_for_child(child: Child):
         )
 
 
+def generate_fees_for_children(children) -> int:
+    """
+    Mesmas mensalidades de generate_fees_for_child para vários aventureiros, num bulk_create.
+    Meses já lançados ficam como estão (ignore_conflicts no unique child+mês). Retorna quantas foram enviadas.
+    """
+    months = list(_remaining_months(date.today()))
+    fees = []
+    for child in children:
+        if not child.active:
+            continue
+        discount_amount, final_amount = compute_fee_amount(child, DEFAULT_FEE_AMOUNT)
+        fees.extend(
+            Fee(
+                child=child,
+                reference_month=ref,
+                amount=DEFAULT_FEE_AMOUNT,
+                discount_amount=discount_amount,
+                final_amount=final_amount,
+                due_date=due,
+                status=Fee.Status.PENDENTE,
+            )
+            for ref, due in months
+        )
+    Fee.objects.bulk_create(fees, batch_size=500, ignore_conflicts=True)
+    return len(fees)
+
+
+def children_missing_fees(days: int = FEE_RECOVERY_DAYS):
+    """
+    Aventureiros ativos sem nenhuma mensalidade cadastrados nos últimos `days` dias (a geração
+    após o cadastro falhou ou o processo caiu antes) ou antes da coluna created_at existir
+    (sem data). Cadastros datados mais antigos ficam de fora: mensalidades apagadas de
+    propósito não voltam.
+    """
+    since = timezone.now() - timedelta(days=days)
+    return Child.objects.filter(
+        Q(created_at__gte=since) | Q(created_at__isnull=True), active=True, fees__isnull=True
+    )
+
+
+def _generate_fees(child_ids) -> None:
+    from core.kpis import invalidate_kpis
+
+    try:
+        generate_fees_for_children(Child.objects.filter(pk__in=child_ids))
+        invalidate_kpis('finance')
+    except Exception:
+        # O comando generate_missing_fees recupera quem ficou sem mensalidade
+        logger.exception('Falha ao gerar mensalidades dos aventureiros %s', child_ids)
+
+
+def schedule_fee_generation(child_ids) -> None:
+    """
+    Gera as mensalidades de aventureiros recém-criados depois do commit, num bulk_create só e
+    fora da transação do cadastro. Se falhar, o comando generate_missing_fees (deploy/crontab)
+    completa as que faltarem.
+    """
+    child_ids = list(child_ids)
+    if child_ids:
+        transaction.on_commit(lambda: _generate_fees(child_ids))
+
+
 @receiver(post_save, sender=Child)
 def create_fees_on_child_creation(sender, instance: Child, created, **kwargs):
     if created and instance.active:
@@ -42,3 +42,19 @@ class FinanceTests(TestCase):
         self.client.force_login(self.dir)
         resp = self.client.get(reverse('finance-reports'))
         self.assertEqual(resp.status_code, 200)
+
+    def test_fee_status_uses_etag(self):
+        fee = Fee.objects.create(child=self.child, reference_month='2025-02', amount=Decimal('10.00'), due_date=date.today())
+        self.client.force_login(self.resp)
+        url = reverse('finance-fee-status', args=[self.child.id, fee.id])
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.json()['paid'])
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 304)
+        Fee.objects.filter(pk=fee.pk).update(status=Fee.Status.PAGO)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.json()['paid'])
+        self.client.force_login(self.tes)
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -11,6 +11,7 @@ urlpatterns = [
     path('my/', views.my_fees, name='finance-my'),
     path('my/<int:child_id>/', views.my_child_fees, name='finance-my-child'),
     path('my/<int:child_id>/fee/<int:fee_id>/pay/', views.fee_payment, name='finance-fee-payment'),
+    path('my/<int:child_id>/fee/<int:fee_id>/status/', views.fee_status, name='finance-fee-status'),
     path('my/<int:child_id>/pay-open/', views.pay_all_open, name='finance-pay-all-open'),
     path('discount/<int:child_id>/', views_discount.apply_discount, name='finance-discount'),
     path('mercadopago/webhook/', views.mercadopago_webhook, name='finance-mercadopago-webhook'),
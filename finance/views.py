@@ -7,17 +7,20 @@ from decimal import Decimal, InvalidOperation
 
 from django.contrib import messages
 from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.db.models import Q
-from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 
 from accounts.models import User
 from children.models import Child, GuardianChild
 from core.mercadopago import create_mercadopago_pix_payment, verify_mercadopago_signature
-from core.permissions import role_required
+from core.permissions import can_access_child, role_required
+from core.utils import conditional_json_response
 
 import config
 
@@ -32,14 +35,6 @@ RESP = [User.Role.RESPONSAVEL]
 DIRETORIA = [User.Role.DIRETORIA]
 
 
-def _child_accessible(user, child):
-    if getattr(user, 'role', None) in TESOUREIRO + DIRETORIA:
-        return True
-    if getattr(user, 'role', None) == User.Role.RESPONSAVEL:
-        return GuardianChild.objects.filter(guardian_user=user, child=child).exists()
-    return False
-
-
 def _effective_status(fee: Fee):
     if fee.status == Fee.Status.PENDENTE and fee.due_date < date.today():
         return Fee.Status.ATRASADO
@@ -133,7 +128,7 @@ def fee_generate(request):
 @role_required(TESOUREIRO + DIRETORIA + RESP)
 def child_fees(request, child_id):
     child = get_object_or_404(Child, pk=child_id)
-    if not _child_accessible(request.user, child):
+    if not can_access_child(request, child, TESOUREIRO + DIRETORIA):
         return render(request, '403.html', {'back_url': '/dashboard/'}, status=403)
     fees = list(Fee.objects.filter(child=child).order_by('-reference_month'))
     for f in fees:
@@ -199,7 +194,7 @@ def my_fees(request):
 @role_required(RESP)
 def my_child_fees(request, child_id):
     child = get_object_or_404(Child, pk=child_id)
-    if not _child_accessible(request.user, child):
+    if not can_access_child(request, child, TESOUREIRO + DIRETORIA):
         return render(request, '403.html', {'back_url': '/dashboard/'}, status=403)
     fees = list(Fee.objects.filter(child=child).order_by('-reference_month'))
     for f in fees:
@@ -210,7 +205,7 @@ def my_child_fees(request, child_id):
 @role_required(RESP)
 def fee_payment(request, child_id, fee_id):
     child = get_object_or_404(Child, pk=child_id)
-    if not _child_accessible(request.user, child):
+    if not can_access_child(request, child, TESOUREIRO + DIRETORIA):
         return render(request, '403.html', {'back_url': '/dashboard/'}, status=403)
     fee = get_object_or_404(Fee, pk=fee_id, child=child)
     effective = _effective_status(fee)
@@ -250,14 +245,33 @@ def fee_payment(request, child_id, fee_id):
             'description': f'Mensalidade {fee.reference_month}',
             'action_url': request.path,
             'status_labels': STATUS_LABELS,
+            'status_url': reverse('finance-fee-status', args=[child.id, fee.id]),
+            'done_url': reverse('finance-my-child', args=[child.id]),
         },
     )
 
 
+@login_required
+def fee_status(request, child_id, fee_id):
+    # Consulta leve para o polling da tela PIX: um lookup indexado, sem chamar o MercadoPago.
+    status = (
+        Fee.objects.filter(pk=fee_id, child_id=child_id, child__guardian_links__guardian_user=request.user)
+        .values_list('status', flat=True)
+        .first()
+    )
+    if status is None:
+        raise Http404
+    return conditional_json_response(
+        request,
+        f'fee-{fee_id}-{status}',
+        {'status': status, 'label': STATUS_LABELS.get(status, status), 'paid': status == Fee.Status.PAGO},
+    )
+
+
 @role_required(RESP)
 def pay_all_open(request, child_id):
     child = get_object_or_404(Child, pk=child_id)
-    if not _child_accessible(request.user, child):
+    if not can_access_child(request, child, TESOUREIRO + DIRETORIA):
         return render(request, '403.html', {'back_url': '/dashboard/'}, status=403)
     current_ref = date.today().strftime('%Y-%m')
     fees = list(Fee.objects.filter(child=child).order_by('-reference_month'))
@@ -5,7 +5,7 @@ from django.shortcuts import get_object_or_404, redirect, render
 
 from accounts.models import User
 from children.models import Child, GuardianChild
-from core.permissions import role_required
+from core.permissions import can_access_child, role_required
 
 from .forms import PointsBatchForm, PointsIndividualForm, PointsExtractForm
 from .models import PointsLedger
@@ -21,10 +21,6 @@ STAFF_ROLES = [
 ]
 
 
-def _user_is_guardian_of(user, child: Child) -> bool:
-    return GuardianChild.objects.filter(guardian_user=user, child=child).exists()
-
-
 def _class_groups():
     return list(
         Child.objects.filter(active=True)
@@ -103,16 +99,10 @@ def add_batch(request):
     )
 
 
-def _child_accessible(request_user, child):
-    if getattr(request_user, 'role', None) == User.Role.RESPONSAVEL:
-        return _user_is_guardian_of(request_user, child)
-    return getattr(request_user, 'role', None) in STAFF_ROLES
-
-
 @role_required(STAFF_ROLES + [User.Role.RESPONSAVEL])
 def child_statement(request, child_id):
     child = get_object_or_404(Child, pk=child_id)
-    if not _child_accessible(request.user, child):
+    if not can_access_child(request, child, STAFF_ROLES):
         return render(request, '403.html', {'back_url': '/dashboard/'}, status=403)
     ledger = PointsLedger.objects.filter(child=child).order_by('-created_at')
     total = sum(item.points for item in ledger)
@@ -147,7 +137,7 @@ def extract(request):
     form = PointsExtractForm(request.GET or None)
     if form.is_valid() and form.cleaned_data.get('child'):
         child = form.cleaned_data['child']
-        if not _child_accessible(request.user, child):
+        if not can_access_child(request, child, STAFF_ROLES):
             return render(request, '403.html', {'back_url': '/dashboard/'}, status=403)
         ledger = PointsLedger.objects.filter(child=child).order_by('-created_at')
         total = sum(item.points for item in ledger)
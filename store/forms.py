@@ -9,7 +9,23 @@ class ProductForm(forms.ModelForm):
         required=False,
         widget=forms.Textarea(attrs={'rows': 4}),
     )
+    image_upload = forms.ImageField(label='Imagem (arquivo)', required=False)
 
     class Meta:
         model = Product
-        fields = ['name', 'description', 'price', 'stock', 'active', 'category', 'image_url', 'options']
+        fields = [
+            'name',
+            'description',
+            'price',
+            'stock',
+            'active',
+            'category',
+            'image_url',
+            'options',
+            'sale_starts_at',
+            'sale_user_limit',
+            'sale_cap',
+        ]
+        widgets = {
+            'sale_starts_at': forms.DateTimeInput(attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'),
+        }
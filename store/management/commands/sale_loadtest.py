@@ -0,0 +1,116 @@
+import http.cookiejar
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from accounts.models import User
+from store.models import Product, SaleAllocation
+
+BUYER_PREFIX = '+5500990'
+BUYER_PASSWORD = 'carga123'
+
+
+class Command(BaseCommand):
+    help = "Simula compradores simultâneos contra o servidor de desenvolvimento (venda com limite)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_id', type=int)
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Endereço do runserver')
+        parser.add_argument('--buyers', type=int, default=50, help='Quantidade de compradores simultâneos')
+        parser.add_argument('--quantity', type=int, default=1, help='Quantidade pedida por comprador')
+        parser.add_argument('--variant', type=int, default=None, help='ID da variação a comprar')
+        parser.add_argument('--reset', action='store_true', help='Zera reservas e alocações do produto antes do teste')
+
+    def handle(self, *args, **options):
+        product = Product.objects.filter(pk=options['product_id']).first()
+        if not product:
+            raise CommandError('Produto não encontrado.')
+        if options['reset']:
+            SaleAllocation.objects.filter(product=product).delete()
+            Product.objects.filter(pk=product.pk).update(sale_reserved=0)
+            product.variants.update(sale_reserved=0)
+
+        buyers = self._ensure_buyers(options['buyers'])
+        base_url = options['url'].rstrip('/')
+        add_url = base_url + reverse('store-add-to-cart', args=[product.pk])
+        results = []
+        lock = threading.Lock()
+        sessions = [self._login(base_url, number) for number in buyers]
+        start_gate = threading.Event()
+
+        def buy(opener):
+            data = {'quantity': options['quantity']}
+            if options['variant']:
+                data['variant_id'] = options['variant']
+            start_gate.wait()
+            started = time.perf_counter()
+            outcome = 'erro'
+            try:
+                response = self._post(opener, add_url, data)
+                outcome = 'aceito' if response.geturl().rstrip('/').endswith('carrinho') else 'recusado'
+            except OSError:
+                # runserver tem fila de conexões pequena; conexões recusadas/resetadas contam como erro
+                pass
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                results.append((outcome, elapsed))
+
+        threads = [threading.Thread(target=buy, args=(opener,)) for opener in sessions if opener]
+        for thread in threads:
+            thread.start()
+        wall_start = time.perf_counter()
+        start_gate.set()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - wall_start
+
+        product.refresh_from_db()
+        timings = sorted(ms for _, ms in results)
+        counts = {label: sum(1 for outcome, _ in results if outcome == label) for label in ('aceito', 'recusado', 'erro')}
+        self.stdout.write(f'Compradores: {len(results)} em {wall:.2f}s')
+        self.stdout.write(f"Aceitos: {counts['aceito']} | Recusados: {counts['recusado']} | Erros: {counts['erro']}")
+        if timings:
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f'Latência (ms): mediana {statistics.median(timings):.1f} | p95 {p95:.1f} | máx {timings[-1]:.1f}'
+            )
+        self.stdout.write(f'Reservados no produto: {product.sale_reserved} / limite {product.sale_cap or "sem limite"}')
+        if product.sale_cap is not None and product.sale_reserved > product.sale_cap:
+            self.stdout.write(self.style.ERROR('Limite total ultrapassado!'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Limite total respeitado.'))
+
+    def _ensure_buyers(self, total):
+        numbers = [f'{BUYER_PREFIX}{idx:05d}' for idx in range(1, total + 1)]
+        existing = set(User.objects.filter(whatsapp_number__in=numbers).values_list('whatsapp_number', flat=True))
+        for number in numbers:
+            if number not in existing:
+                User.objects.create_user(number, BUYER_PASSWORD, first_name='Carga', role=User.Role.RESPONSAVEL)
+        return numbers
+
+    def _post(self, opener, url, data):
+        csrf = next((c.value for c in opener.cookie_jar if c.name == 'csrftoken'), '')
+        body = urllib.parse.urlencode({**data, 'csrfmiddlewaretoken': csrf}).encode()
+        request = urllib.request.Request(url, data=body, headers={'Referer': url, 'X-CSRFToken': csrf})
+        return opener.open(request, timeout=60)
+
+    def _login(self, base_url, number):
+        jar = http.cookiejar.CookieJar()
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+        opener.cookie_jar = jar
+        login_url = base_url + reverse('login')
+        try:
+            opener.open(login_url, timeout=30).read()
+            self._post(opener, login_url, {'whatsapp_number': number, 'password': BUYER_PASSWORD}).read()
+        except urllib.error.URLError as exc:
+            raise CommandError(f'Não foi possível acessar {login_url}: {exc}')
+        if not any(c.name == 'sessionid' for c in jar):
+            self.stderr.write(f'Login falhou para {number}')
+            return None
+        return opener
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from store.models import Cart, CartItem
+from store.sales import release
+
+
+class Command(BaseCommand):
+    help = "Cancela carrinhos abertos parados há muito tempo e apaga seus itens em lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'STORE_CART_IDLE_DAYS', 30),
+            help='Dias sem atividade para considerar o carrinho abandonado',
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='Quantidade de carrinhos por lote')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas mostra o que seria feito')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        chunk_size = max(1, options['chunk_size'])
+        stale = Cart.objects.filter(status=Cart.Status.OPEN, updated_at__lt=cutoff).order_by('pk')
+
+        if options['dry_run']:
+            carts = stale.count()
+            items = CartItem.objects.filter(cart__in=stale).count()
+            self.stdout.write(f'{carts} carrinho(s) e {items} item(ns) seriam removidos (parados desde {cutoff:%d/%m/%Y}).')
+            return
+
+        carts_total = 0
+        items_total = 0
+        released_total = 0
+        last_pk = 0
+        while True:
+            ids = list(stale.filter(pk__gt=last_pk).values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            last_pk = ids[-1]
+            with transaction.atomic():
+                # devolve as reservas das vendas com limite antes de apagar os itens
+                reserved = CartItem.objects.filter(
+                    cart_id__in=ids,
+                    product__sale_reserved__gt=0,
+                ).values_list('cart__user_id', 'product_id', 'variant_id', 'quantity')
+                for user_id, product_id, variant_id, quantity in reserved:
+                    release(user_id, product_id, variant_id, quantity)
+                    released_total += quantity
+                items_deleted, _ = CartItem.objects.filter(cart_id__in=ids).delete()
+                carts_total += Cart.objects.filter(pk__in=ids, status=Cart.Status.OPEN).update(
+                    status=Cart.Status.CANCELLED,
+                    updated_at=timezone.now(),
+                )
+            items_total += items_deleted
+
+        remaining_open = Cart.objects.filter(status=Cart.Status.OPEN).count()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{carts_total} carrinho(s) cancelado(s), {items_total} item(ns) removido(s), '
+                f'{released_total} unidade(s) de reserva devolvida(s). '
+                f'Carrinhos abertos restantes: {remaining_open}.'
+            )
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_productvariant_cartitem_variant_orderitem_variant'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['user', 'status'], name='store_cart_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['status', 'updated_at'], name='store_cart_status_upd_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_cart_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_card',
+            field=models.ImageField(blank=True, upload_to='products/'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_detail',
+            field=models.ImageField(blank=True, upload_to='products/'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_thumb',
+            field=models.ImageField(blank=True, upload_to='products/'),
+        ),
+    ]
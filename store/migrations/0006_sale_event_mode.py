@@ -0,0 +1,58 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_product_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sale_cap',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Limite total da venda'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sale_reserved',
+            field=models.PositiveIntegerField(default=0, verbose_name='Reservados na venda'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sale_starts_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Início da venda'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sale_user_limit',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Limite por usuário'),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='sale_cap',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Limite total da venda'),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='sale_reserved',
+            field=models.PositiveIntegerField(default=0, verbose_name='Reservados na venda'),
+        ),
+        migrations.CreateModel(
+            name='SaleAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sale_allocations', to='store.product')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sale_allocations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'product')},
+            },
+        ),
+    ]
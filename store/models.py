@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.urls import reverse
 
 
 class Category(models.Model):
@@ -20,10 +21,40 @@ class Product(models.Model):
     category = models.ForeignKey(Category, null=True, blank=True, on_delete=models.SET_NULL, related_name='products')
     image_url = models.URLField(blank=True)
     options = models.CharField(max_length=200, blank=True, help_text="Opções separadas por vírgula (ex: P,M,G)")
+    image_thumb = models.ImageField(upload_to='products/', blank=True)
+    image_card = models.ImageField(upload_to='products/', blank=True)
+    image_detail = models.ImageField(upload_to='products/', blank=True)
+    sale_starts_at = models.DateTimeField('Início da venda', null=True, blank=True)
+    sale_user_limit = models.PositiveIntegerField('Limite por usuário', null=True, blank=True)
+    sale_cap = models.PositiveIntegerField('Limite total da venda', null=True, blank=True)
+    sale_reserved = models.PositiveIntegerField('Reservados na venda', default=0)
 
     def __str__(self):
         return self.name
 
+    @property
+    def is_sale_event(self):
+        return bool(self.sale_starts_at or self.sale_user_limit or self.sale_cap is not None)
+
+    def _image_src(self, *fields):
+        for field in fields:
+            value = getattr(self, field)
+            if value:
+                return reverse('store-product-image', args=[value.name])
+        return self.image_url
+
+    @property
+    def thumb_src(self):
+        return self._image_src('image_thumb', 'image_card', 'image_detail')
+
+    @property
+    def card_src(self):
+        return self._image_src('image_card', 'image_detail')
+
+    @property
+    def detail_src(self):
+        return self._image_src('image_detail', 'image_card')
+
 
 class ProductVariant(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='variants')
@@ -31,11 +62,27 @@ class ProductVariant(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
     active = models.BooleanField(default=True)
+    sale_cap = models.PositiveIntegerField('Limite total da venda', null=True, blank=True)
+    sale_reserved = models.PositiveIntegerField('Reservados na venda', default=0)
 
     def __str__(self):
         return f'{self.product.name} - {self.name}'
 
 
+class SaleAllocation(models.Model):
+    """Quantidade já reservada por usuário em um produto com venda limitada."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sale_allocations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='sale_allocations')
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'product')
+
+    def __str__(self):
+        return f'{self.user} - {self.product} ({self.quantity})'
+
+
 class Cart(models.Model):
     class Status(models.TextChoices):
         OPEN = 'OPEN', 'Aberto'
@@ -47,6 +94,12 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'status'], name='store_cart_user_status_idx'),
+            models.Index(fields=['status', 'updated_at'], name='store_cart_status_upd_idx'),
+        ]
+
     def total(self):
         return sum(item.subtotal() for item in self.items.all())
 
@@ -0,0 +1,93 @@
+"""
+Admissão das vendas com limite (ex.: uniformes do campori).
+
+Todos os limites são aplicados com UPDATE condicional (`... WHERE reservado <= limite - qtd`),
+sem select_for_update: quem chega primeiro grava primeiro e o resto recebe "esgotado".
+Quando o limite total acaba, uma marca no cache faz os próximos pedidos serem recusados
+sem nem tocar no banco.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Product, ProductVariant, SaleAllocation
+
+SOLD_OUT_TTL = 60 * 60
+
+
+class SaleRejected(Exception):
+    pass
+
+
+def _sold_out_key(model, pk):
+    return f'store:sale:soldout:{model._meta.model_name}:{pk}'
+
+
+def _take(model, pk, cap, quantity) -> bool:
+    if cap is None:
+        model.objects.filter(pk=pk).update(sale_reserved=F('sale_reserved') + quantity)
+        return True
+    if quantity > cap:
+        return False
+    updated = model.objects.filter(pk=pk, sale_reserved__lte=cap - quantity).update(
+        sale_reserved=F('sale_reserved') + quantity
+    )
+    if not updated:
+        reserved = model.objects.filter(pk=pk).values_list('sale_reserved', flat=True).first()
+        if reserved is not None and reserved >= cap:
+            cache.set(_sold_out_key(model, pk), True, SOLD_OUT_TTL)
+    return bool(updated)
+
+
+def reserve(user, product: Product, variant: ProductVariant | None, quantity: int) -> None:
+    """Reserva `quantity` unidades para o usuário ou levanta SaleRejected com a mensagem para ele."""
+    if not product.is_sale_event:
+        return
+    if product.sale_starts_at and timezone.now() < product.sale_starts_at:
+        start = timezone.localtime(product.sale_starts_at)
+        raise SaleRejected(f'A venda de {product.name} começa em {start:%d/%m às %H:%M}.')
+    if cache.get(_sold_out_key(Product, product.pk)) or (
+        variant is not None and cache.get(_sold_out_key(ProductVariant, variant.pk))
+    ):
+        raise SaleRejected(f'{product.name} esgotado.')
+
+    with transaction.atomic():
+        if product.sale_user_limit:
+            allocation, _ = SaleAllocation.objects.get_or_create(user=user, product=product)
+            updated = SaleAllocation.objects.filter(
+                pk=allocation.pk,
+                quantity__lte=product.sale_user_limit - quantity,
+            ).update(quantity=F('quantity') + quantity)
+            if not updated:
+                raise SaleRejected(f'Limite de {product.sale_user_limit} unidade(s) por família para {product.name}.')
+        if not _take(Product, product.pk, product.sale_cap, quantity):
+            raise SaleRejected(f'{product.name} esgotado.')
+        if variant is not None and not _take(ProductVariant, variant.pk, variant.sale_cap, quantity):
+            raise SaleRejected(f'{product.name} ({variant.name}) esgotado.')
+
+
+def release(user_id, product_id, variant_id, quantity: int) -> None:
+    """Devolve reservas (item removido do carrinho ou carrinho abandonado)."""
+    if quantity <= 0:
+        return
+    Product.objects.filter(pk=product_id, sale_reserved__gt=0).update(
+        sale_reserved=Greatest(F('sale_reserved') - quantity, 0)
+    )
+    SaleAllocation.objects.filter(user_id=user_id, product_id=product_id, quantity__gt=0).update(
+        quantity=Greatest(F('quantity') - quantity, 0)
+    )
+    cache.delete(_sold_out_key(Product, product_id))
+    if variant_id:
+        ProductVariant.objects.filter(pk=variant_id, sale_reserved__gt=0).update(
+            sale_reserved=Greatest(F('sale_reserved') - quantity, 0)
+        )
+        cache.delete(_sold_out_key(ProductVariant, variant_id))
+
+
+def clear_sold_out(product: Product) -> None:
+    """Descarta as marcas de esgotado (ex.: limite alterado na edição do produto)."""
+    keys = [_sold_out_key(Product, product.pk)]
+    keys += [_sold_out_key(ProductVariant, pk) for pk in product.variants.values_list('pk', flat=True)]
+    cache.delete_many(keys)
@@ -0,0 +1,163 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from store.models import Cart, CartItem, Product, ProductVariant, SaleAllocation
+
+
+class ProductVariantSyncTests(TestCase):
+    def setUp(self):
+        self.User = get_user_model()
+        self.tes = self.User.objects.create_user('+5511999999999', 'senha123', role=self.User.Role.TESOUREIRO)
+        self.product = Product.objects.create(name='Camiseta', price=Decimal('40.00'), stock=0)
+        self.small = ProductVariant.objects.create(product=self.product, name='P', price=Decimal('40.00'), stock=3)
+        self.large = ProductVariant.objects.create(product=self.product, name='G', price=Decimal('45.00'), stock=2)
+
+    def _post(self, rows):
+        data = {'name': 'Camiseta', 'price': '40.00', 'stock': '0', 'active': 'on'}
+        data['variant_name'] = [r[0] for r in rows]
+        data['variant_price'] = [r[1] for r in rows]
+        data['variant_stock'] = [r[2] for r in rows]
+        self.client.force_login(self.tes)
+        return self.client.post(reverse('store-product-edit', args=[self.product.id]), data)
+
+    def test_edit_keeps_variant_ids_and_deactivates_missing(self):
+        resp = self._post([('P', '42,00', '5'), ('M', '42.00', '4')])
+        self.assertEqual(resp.status_code, 302)
+        self.small.refresh_from_db()
+        self.large.refresh_from_db()
+        self.assertEqual(self.small.stock, 5)
+        self.assertEqual(self.small.price, Decimal('42.00'))
+        self.assertFalse(self.large.active)
+        self.assertTrue(self.product.variants.filter(name='M', active=True).exists())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 9)
+
+    def test_failed_variant_sync_does_not_leave_product(self):
+        data = {'name': 'Boné', 'price': '30.00', 'stock': '0', 'active': 'on'}
+        data.update(variant_name=['Único'], variant_price=['30.00'], variant_stock=['4'])
+        self.client.force_login(self.tes)
+        with mock.patch('store.views.sync_product_variants', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse('store-product-create'), data)
+        self.assertFalse(Product.objects.filter(name='Boné').exists())
+
+
+class SweepCartsTests(TestCase):
+    def setUp(self):
+        self.User = get_user_model()
+        self.product = Product.objects.create(name='Boné', price=Decimal('20.00'), stock=10)
+
+    def _cart(self, number, days_idle):
+        user = self.User.objects.create_user(number, 'senha123')
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1, unit_price=self.product.price)
+        Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now() - timedelta(days=days_idle))
+        return cart
+
+    def test_cancels_only_idle_carts(self):
+        old = self._cart('+5511911111111', 45)
+        recent = self._cart('+5511922222222', 2)
+        out = StringIO()
+        call_command('sweep_carts', '--days', '30', '--chunk-size', '1', stdout=out)
+        old.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(old.status, Cart.Status.CANCELLED)
+        self.assertFalse(old.items.exists())
+        self.assertEqual(recent.status, Cart.Status.OPEN)
+        self.assertEqual(recent.items.count(), 1)
+        self.assertIn('1 carrinho(s) cancelado(s)', out.getvalue())
+
+
+class ProductImageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        self.User = get_user_model()
+        self.tes = self.User.objects.create_user('+5511999999999', 'senha123', role=self.User.Role.TESOUREIRO)
+
+    def _upload(self):
+        buffer = BytesIO()
+        Image.new('RGB', (2000, 1500), (200, 30, 30)).save(buffer, 'JPEG')
+        return SimpleUploadedFile('foto.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_generates_cacheable_variants(self):
+        with override_settings(MEDIA_ROOT=self.media):
+            self.client.force_login(self.tes)
+            resp = self.client.post(reverse('store-product-create'), {
+                'name': 'Lenço',
+                'price': '15.00',
+                'stock': '3',
+                'active': 'on',
+                'image_upload': self._upload(),
+            })
+            self.assertEqual(resp.status_code, 302)
+            product = Product.objects.get(name='Lenço')
+            self.assertIn('-thumb.', product.image_thumb.name)
+            with Image.open(product.image_thumb.path) as thumb:
+                self.assertLessEqual(max(thumb.size), 160)
+            resp = self.client.get(product.card_src)
+            self.assertEqual(resp.status_code, 200)
+            self.assertIn('immutable', resp['Cache-Control'])
+
+
+class SaleEventTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.User = get_user_model()
+        self.buyer = self.User.objects.create_user('+5511911111111', 'senha123')
+        self.other = self.User.objects.create_user('+5511922222222', 'senha123')
+        self.product = Product.objects.create(
+            name='Uniforme', price=Decimal('80.00'), stock=10, sale_user_limit=2, sale_cap=3
+        )
+
+    def _add(self, user, quantity):
+        self.client.force_login(user)
+        return self.client.post(reverse('store-add-to-cart', args=[self.product.id]), {'quantity': quantity})
+
+    def test_per_user_and_global_caps(self):
+        self.assertRedirects(self._add(self.buyer, 2), reverse('store-cart'), fetch_redirect_response=False)
+        self.assertRedirects(self._add(self.buyer, 1), reverse('store-catalog'), fetch_redirect_response=False)
+        self.assertRedirects(self._add(self.other, 2), reverse('store-catalog'), fetch_redirect_response=False)
+        self.assertRedirects(self._add(self.other, 1), reverse('store-cart'), fetch_redirect_response=False)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.sale_reserved, 3)
+        self.assertRedirects(self._add(self.other, 1), reverse('store-catalog'), fetch_redirect_response=False)
+
+    def test_failed_cart_write_rolls_back_reservation(self):
+        self.client.force_login(self.buyer)
+        with mock.patch.object(CartItem.objects, 'get_or_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse('store-add-to-cart', args=[self.product.id]), {'quantity': 2})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.sale_reserved, 0)
+        self.assertFalse(SaleAllocation.objects.filter(user=self.buyer, quantity__gt=0).exists())
+
+    def test_failed_release_keeps_the_item(self):
+        self._add(self.buyer, 2)
+        item = CartItem.objects.get(cart__user=self.buyer)
+        with mock.patch('store.views.release', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse('store-remove-item', args=[item.id]))
+        self.assertTrue(CartItem.objects.filter(pk=item.pk).exists())
+
+    def test_removing_item_releases_reservation(self):
+        self._add(self.buyer, 2)
+        item = CartItem.objects.get(cart__user=self.buyer)
+        self.client.post(reverse('store-remove-item', args=[item.id]))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.sale_reserved, 0)
+        self.assertEqual(SaleAllocation.objects.get(user=self.buyer, product=self.product).quantity, 0)
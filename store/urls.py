@@ -5,12 +5,14 @@ from . import views
 urlpatterns = [
     path('', views.catalog, name='store-catalog'),
     path('produto/<int:pk>/', views.product_detail, name='store-product'),
+    path('imagens/<path:name>', views.product_image, name='store-product-image'),
     path('carrinho/', views.cart_view, name='store-cart'),
     path('carrinho/adicionar/<int:product_id>/', views.add_to_cart, name='store-add-to-cart'),
     path('carrinho/remover/<int:item_id>/', views.remove_from_cart, name='store-remove-item'),
     path('checkout/', views.checkout, name='store-checkout'),
     path('pedidos/', views.orders, name='store-orders'),
     path('pedidos/<int:order_id>/pagamento/', views.pay_order, name='store-pay-order'),
+    path('pedidos/<int:order_id>/status/', views.order_status, name='store-order-status'),
 
     path('gestao/produtos/', views.manage_products, name='store-manage-products'),
     path('gestao/produtos/novo/', views.product_create, name='store-product-create'),
@@ -0,0 +1,83 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Sum
+
+from core.images import build_variants
+
+from .models import Product, ProductVariant
+
+# Tamanho máximo (largura, altura) de cada versão gerada para as imagens de produto
+PRODUCT_IMAGE_SIZES = {
+    'thumb': (160, 160),
+    'card': (480, 480),
+    'detail': (1200, 1200),
+}
+
+
+def parse_variant_rows(post_data) -> list[tuple[str, Decimal, int, int | None]]:
+    """Lê as linhas de variação do formulário (nome, preço, estoque, limite da venda), ignorando linhas inválidas."""
+    names = post_data.getlist('variant_name')
+    prices = post_data.getlist('variant_price')
+    stocks = post_data.getlist('variant_stock')
+    caps = post_data.getlist('variant_cap')
+    parsed = []
+    seen = set()
+    for idx, (n, p, s) in enumerate(zip(names, prices, stocks)):
+        name = (n or '').strip()
+        if not (name and p and s) or name in seen:
+            continue
+        cap_raw = (caps[idx] if idx < len(caps) else '').strip()
+        try:
+            cap = int(cap_raw) if cap_raw else None
+            parsed.append((name, Decimal(str(p).replace(',', '.')), int(s), cap))
+        except (InvalidOperation, ValueError):
+            continue
+        seen.add(name)
+    return parsed
+
+
+@transaction.atomic
+def sync_product_variants(product: Product, parsed_variants: list[tuple[str, Decimal, int, int | None]]) -> dict:
+    """
+    Sincroniza as variações do produto com as linhas enviadas, comparando pelo nome.
+    Variações existentes são atualizadas (mantendo o id usado por carrinhos e pedidos),
+    novas são criadas e as que sumiram do formulário são desativadas.
+    """
+    existing = {v.name: v for v in product.variants.all()}
+    to_create = []
+    to_update = []
+    for name, price, stock, cap in parsed_variants:
+        variant = existing.pop(name, None)
+        if variant is None:
+            to_create.append(
+                ProductVariant(product=product, name=name, price=price, stock=stock, sale_cap=cap, active=True)
+            )
+        elif variant.price != price or variant.stock != stock or variant.sale_cap != cap or not variant.active:
+            variant.price = price
+            variant.stock = stock
+            variant.sale_cap = cap
+            variant.active = True
+            to_update.append(variant)
+    if to_create:
+        ProductVariant.objects.bulk_create(to_create)
+    if to_update:
+        ProductVariant.objects.bulk_update(to_update, ['price', 'stock', 'sale_cap', 'active'])
+    stale_ids = [v.id for v in existing.values() if v.active]
+    if stale_ids:
+        ProductVariant.objects.filter(pk__in=stale_ids).update(active=False)
+
+    total_stock = product.variants.filter(active=True).aggregate(total=Sum('stock'))['total'] or 0
+    product.stock = total_stock
+    product.price = parsed_variants[0][1]
+    product.save(update_fields=['stock', 'price'])
+    return {'created': len(to_create), 'updated': len(to_update), 'deactivated': len(stale_ids)}
+
+
+def save_product_image(product: Product, upload) -> None:
+    """Gera as versões thumb/card/detail do upload e associa ao produto."""
+    names = build_variants(upload, 'products', PRODUCT_IMAGE_SIZES)
+    product.image_thumb.name = names['thumb']
+    product.image_card.name = names['card']
+    product.image_detail.name = names['detail']
+    product.save(update_fields=['image_thumb', 'image_card', 'image_detail'])
@@ -3,19 +3,31 @@ import logging
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
+from django.db.models import Prefetch
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
 
 from accounts.models import User
+from core.images import FAR_FUTURE_MAX_AGE
 from core.mercadopago import create_mercadopago_pix_payment
 from core.permissions import role_required
+from core.utils import conditional_json_response
 from .forms import ProductForm
-from .models import Cart, CartItem, Category, Order, OrderItem, Product
+from .models import Cart, CartItem, Category, Order, OrderItem, Product, ProductVariant
+from .sales import SaleRejected, clear_sold_out, release, reserve
+from .utils import parse_variant_rows, save_product_image, sync_product_variants
 
 logger = logging.getLogger(__name__)
 
 
 def catalog(request):
-    products = list(Product.objects.filter(active=True).select_related('category'))
+    products = list(
+        Product.objects.filter(active=True)
+        .select_related('category')
+        .prefetch_related(Prefetch('variants', queryset=ProductVariant.objects.filter(active=True), to_attr='active_variants'))
+    )
     for p in products:
         p.opt_list = [o.strip() for o in (p.options or '').split(',') if o.strip()]
     categories = Category.objects.filter(active=True)
@@ -27,6 +39,18 @@ def product_detail(request, pk):
     return render(request, 'store/product_detail.html', {'product': product, 'title': product.name})
 
 
+def product_image(request, name):
+    # Só serve versões geradas (nome com hash do conteúdo), que nunca mudam.
+    if not name.startswith('products/') or '..' in name:
+        raise Http404
+    storage = Product._meta.get_field('image_card').storage
+    if not storage.exists(name):
+        raise Http404
+    response = FileResponse(storage.open(name, 'rb'))
+    patch_cache_control(response, public=True, max_age=FAR_FUTURE_MAX_AGE, immutable=True)
+    return response
+
+
 def _get_open_cart(user):
     cart, _ = Cart.objects.get_or_create(user=user, status=Cart.Status.OPEN)
     return cart
@@ -47,24 +71,43 @@ def add_to_cart(request, product_id):
     else:
         price = product.price
     qty = max(1, qty)
-    item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        product=product,
-        option=option,
-        variant=variant,
-        defaults={'quantity': qty, 'unit_price': price},
-    )
-    if not created:
-        item.quantity += qty
-        item.save()
+    try:
+        # Reserva e item na mesma transação: se a gravação do item falhar, a reserva é desfeita
+        with transaction.atomic():
+            reserve(request.user, product, variant, qty)
+            item, created = CartItem.objects.get_or_create(
+                cart=cart,
+                product=product,
+                option=option,
+                variant=variant,
+                defaults={'quantity': qty, 'unit_price': price},
+            )
+            if not created:
+                item.quantity += qty
+                item.save()
+            # marca atividade no carrinho (usado pelo sweep_carts para achar carrinhos abandonados)
+            cart.save(update_fields=['updated_at'])
+    except SaleRejected as exc:
+        messages.error(request, str(exc))
+        return redirect('store-catalog')
     messages.success(request, f'{product.name} adicionado ao carrinho.')
     return redirect('store-cart')
 
 
 @login_required
 def remove_from_cart(request, item_id):
-    item = get_object_or_404(CartItem, pk=item_id, cart__user=request.user, cart__status=Cart.Status.OPEN)
-    item.delete()
+    item = get_object_or_404(
+        CartItem.objects.select_related('product', 'cart'),
+        pk=item_id,
+        cart__user=request.user,
+        cart__status=Cart.Status.OPEN,
+    )
+    # Item e reserva saem juntos: se a devolução falhar, o item continua no carrinho
+    with transaction.atomic():
+        item.delete()
+        if item.product.is_sale_event:
+            release(request.user.id, item.product_id, item.variant_id, item.quantity)
+        item.cart.save(update_fields=['updated_at'])
     messages.success(request, 'Item removido do carrinho.')
     return redirect('store-cart')
 
@@ -140,10 +183,25 @@ def pay_order(request, order_id):
             'mp_payment': mp_payment,
             'mp_payment_error': mp_payment_error,
             'title': 'Pagamento PIX',
+            'status_url': reverse('store-order-status', args=[order.id]),
+            'done_url': reverse('store-orders'),
         },
     )
 
 
+@login_required
+def order_status(request, order_id):
+    # Consulta leve para o polling da tela PIX: um lookup indexado, sem chamar o MercadoPago.
+    status = Order.objects.filter(pk=order_id, user=request.user).values_list('status', flat=True).first()
+    if status is None:
+        raise Http404
+    return conditional_json_response(
+        request,
+        f'order-{order_id}-{status}',
+        {'status': status, 'label': Order.Status(status).label, 'paid': status == Order.Status.PAID},
+    )
+
+
 @role_required([User.Role.DIRETORIA, User.Role.TESOUREIRO])
 def manage_products(request):
     products = Product.objects.all().select_related('category')
@@ -152,28 +210,17 @@ def manage_products(request):
 
 @role_required([User.Role.DIRETORIA, User.Role.TESOUREIRO])
 def product_create(request):
-    form = ProductForm(request.POST or None)
+    form = ProductForm(request.POST or None, request.FILES or None)
     if request.method == 'POST' and form.is_valid():
-        product = form.save()
-        # criar variações
-        names = request.POST.getlist('variant_name')
-        prices = request.POST.getlist('variant_price')
-        stocks = request.POST.getlist('variant_stock')
-        parsed_variants = []
-        for n, p, s in zip(names, prices, stocks):
-            if n and p and s:
-                try:
-                    parsed_variants.append((n.strip(), float(str(p).replace(',', '.')), int(s)))
-                except ValueError:
-                    continue
-        if parsed_variants:
-            product.variants.all().delete()
-            for name, price, stock in parsed_variants:
-                product.variants.create(name=name, price=price, stock=stock, active=True)
-            total_stock = sum(v[2] for v in parsed_variants)
-            product.stock = total_stock
-            product.price = parsed_variants[0][1]
-            product.save(update_fields=['stock', 'price'])
+        # Produto, imagem e variantes juntos: uma falha na sincronização não deixa meio produto gravado
+        with transaction.atomic():
+            product = form.save()
+            if form.cleaned_data.get('image_upload'):
+                save_product_image(product, form.cleaned_data['image_upload'])
+            parsed_variants = parse_variant_rows(request.POST)
+            if parsed_variants:
+                sync_product_variants(product, parsed_variants)
+        clear_sold_out(product)
         messages.success(request, 'Produto criado.')
         return redirect('store-manage-products')
     return render(
@@ -186,31 +233,25 @@ def product_create(request):
 @role_required([User.Role.DIRETORIA, User.Role.TESOUREIRO])
 def product_edit(request, pk):
     product = get_object_or_404(Product, pk=pk)
-    initial_variants = '\n'.join([f'{v.name};{v.price};{v.stock}' for v in product.variants.all()])
-    form = ProductForm(request.POST or None, instance=product, initial={'variants': initial_variants})
+    active_variants = list(product.variants.filter(active=True))
+    initial_variants = '\n'.join([f'{v.name};{v.price};{v.stock}' for v in active_variants])
+    form = ProductForm(request.POST or None, request.FILES or None, instance=product, initial={'variants': initial_variants})
     if request.method == 'POST' and form.is_valid():
-        product = form.save()
-        names = request.POST.getlist('variant_name')
-        prices = request.POST.getlist('variant_price')
-        stocks = request.POST.getlist('variant_stock')
-        parsed_variants = []
-        for n, p, s in zip(names, prices, stocks):
-            if n and p and s:
-                try:
-                    parsed_variants.append((n.strip(), float(str(p).replace(',', '.')), int(s)))
-                except ValueError:
-                    continue
-        if parsed_variants:
-            product.variants.all().delete()
-            for name, price, stock in parsed_variants:
-                product.variants.create(name=name, price=price, stock=stock, active=True)
-            total_stock = sum(v[2] for v in parsed_variants)
-            product.stock = total_stock
-            product.price = parsed_variants[0][1]
-            product.save(update_fields=['stock', 'price'])
+        # Produto, imagem e variantes juntos: uma falha na sincronização não deixa meio produto gravado
+        with transaction.atomic():
+            product = form.save()
+            if form.cleaned_data.get('image_upload'):
+                save_product_image(product, form.cleaned_data['image_upload'])
+            parsed_variants = parse_variant_rows(request.POST)
+            if parsed_variants:
+                sync_product_variants(product, parsed_variants)
+        clear_sold_out(product)
         messages.success(request, 'Produto atualizado.')
         return redirect('store-manage-products')
-    variant_data = [{'name': v.name, 'price': float(v.price), 'stock': v.stock} for v in product.variants.all()]
+    variant_data = [
+        {'name': v.name, 'price': float(v.price), 'stock': v.stock, 'cap': v.sale_cap}
+        for v in active_variants
+    ]
     return render(
         request,
         'store/product_form.html',